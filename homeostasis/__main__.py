@@ -1,15 +1,35 @@
 """Temporary main module for homeostasis package."""
-from time import sleep
+import gc
+import sys
 
 from homeostasis.simulation.action import EatAction, PlayAction
+from homeostasis.simulation.clock import Scheduler
 from homeostasis.common import Traits, Motives
 from homeostasis.items.food import register_food_items
 from homeostasis.items.play import register_play_items
-from homeostasis.pet import *
+from homeostasis.pet import Pet, PetSpec
 from homeostasis.items.base import ITEMS
 
 
-def main():
+def freeze_gc() -> None:
+    """Move every object alive to the permanent generation of the garbage collector.
+
+    Collections then never visit the catalogue loaded so far, so workers forked afterwards do
+    not write to, and thereby copy, the memory pages holding it. This affects the whole
+    process, which is why only the application opts into it.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def main(tick_seconds: float | None = 2, freeze: bool = False, autonomous_ticks: int = 0):
+    """Feed the pet every food item, then play with every play item.
+
+    Args:
+        tick_seconds (float | None): Wall-clock seconds per tick, or None to run as fast as possible.
+        freeze (bool): Call `freeze_gc` once the items are registered.
+        autonomous_ticks (int): Then let the pet choose its own actions for this many ticks.
+    """
     pet = Pet(
         info=PetSpec(name="Buddy", age=3, style="Casual"),
         personality=Traits(friendliness=5, playfulness=3, laziness=10, curiosity=7),
@@ -22,35 +42,55 @@ def main():
             fun=50,
         ),
     )
+    scheduler = Scheduler(tick_seconds=tick_seconds)
 
-    register_food_items()
-    register_play_items()
+    # A process calling `main` again reuses the items registered the first time
+    if not ITEMS.frozen:
+        register_food_items()
+        register_play_items()
+        ITEMS.freeze()
+    if freeze:
+        freeze_gc()
 
-    FOOD_ITEMS = [item for item in ITEMS.values() if "edible" in item.tags]
-    PLAY_ITEMS = [item for item in ITEMS.values() if "playable" in item.tags]
+    FOOD_ITEMS = ITEMS.with_tags("edible")
+    PLAY_ITEMS = ITEMS.with_tags("playable")
 
     print("Initial pet motives:", pet.motives)
     print("=== Using Food Items ===")
     for food_item in FOOD_ITEMS:
         item_instance = food_item.spawn()
         action = EatAction(item_instance)
-        pet.set_action(action)
-        while pet.is_busy:
-            print(f"Feeding {food_item.name}...")
-            pet.tick()
-            sleep(2)  # Simulate time passing
+        print(f"Feeding {food_item.name}...")
+        scheduler.start_action(pet, action)
+        scheduler.run()
         print(f"After eating {food_item.name}, pet motives: {pet.motives}")
 
     print("=== Using Play Items ===")
     for play_item in PLAY_ITEMS:
         item_instance = play_item.spawn()
         action = PlayAction(item_instance)
-        pet.set_action(action)
-        while pet.is_busy:
-            print(f"Playing with {play_item.name}...")
-            pet.tick()
-            sleep(2)  # Simulate time passing
+        print(f"Playing with {play_item.name}...")
+        scheduler.start_action(pet, action)
+        scheduler.run()
         print(f"After playing with {play_item.name}, pet motives: {pet.motives}")
 
+    if autonomous_ticks > 0:
+        # Imported here, as the decider needs NumPy, which the rest of the demo does not
+        from homeostasis.simulation.decision import UtilityDecider
+
+        print("=== Choosing Actions ===")
+        decider = UtilityDecider([*FOOD_ITEMS, *PLAY_ITEMS])
+        # The decider starts an action now, and another one every time the pet goes idle
+        decider.drive(scheduler, pet)
+        scheduler.run_until(scheduler.now + autonomous_ticks)
+        scheduler.sync(pet)
+        print(f"After {autonomous_ticks} ticks on its own, pet motives: {pet.motives}")
+
+    print(f"Simulated {scheduler.now} ticks.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(
+        tick_seconds=None if "--fast" in sys.argv[1:] else 2,
+        freeze="--freeze-gc" in sys.argv[1:],
+        autonomous_ticks=20 if "--autonomous" in sys.argv[1:] else 0,
+    )
@@ -0,0 +1 @@
+"""Benchmarks for the simulation hot paths."""
@@ -0,0 +1,75 @@
+"""Run the benchmark suite and compare its results against a baseline.
+
+    python -m homeostasis.bench run --output results.json
+    python -m homeostasis.bench run --baseline baseline.json
+    python -m homeostasis.bench compare results.json baseline.json
+
+Detailed reports live in the modules of this package, each runnable on its own:
+`changes`, `contention`, `instrumentation`, `inventory`, `memory`, `population`, `replay`,
+`server`, `sharding`, `social`, `startup`, `sweep` and `telemetry`.
+"""
+import argparse
+import json
+import sys
+
+from homeostasis.bench.suite import POPULATION_SIZES, compare, run_suite
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _report(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print the comparison of two results. Returns whether any benchmark regressed."""
+    comparisons = compare(current, baseline, threshold)
+    for comparison in comparisons:
+        if comparison.baseline is None:
+            print(f"{comparison.name:<32} {'added':>12} -> {comparison.current:>12,.1f} ns/op")
+        elif comparison.current is None:
+            print(f"{comparison.name:<32} {comparison.baseline:>12,.1f} -> {'removed':>12}")
+        else:
+            flag = "REGRESSED" if comparison.regressed else ""
+            print(f"{comparison.name:<32} {comparison.baseline:>12,.1f} -> {comparison.current:>12,.1f} ns/op "
+                  f"({comparison.change:+.1%}) {flag}")
+    # Results are expected to come from different revisions
+    environments = [{**result["environment"], "revision": None} for result in (current, baseline)]
+    if environments[0] != environments[1]:
+        print("Warning: the results were recorded in different environments.", file=sys.stderr)
+    return any(comparison.regressed for comparison in comparisons)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m homeostasis.bench", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--filter", nargs="+", help="only run benchmarks whose name contains one of these")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(POPULATION_SIZES),
+                     help="population sizes of the PetPopulation.tick benchmarks")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repeat")
+    run.add_argument("--output", help="write the results to this JSON file")
+    run.add_argument("--baseline", help="compare the results against this JSON file")
+    run.add_argument("--threshold", type=float, default=0.1, help="relative slowdown counted as a regression")
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("current")
+    diff.add_argument("baseline")
+    diff.add_argument("--threshold", type=float, default=0.1, help="relative slowdown counted as a regression")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return int(_report(_load(args.current), _load(args.baseline), args.threshold))
+
+    results = run_suite(args.filter, args.sizes, args.repeat, args.min_time, log=print)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        return int(_report(results, _load(args.baseline), args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
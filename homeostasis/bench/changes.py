@@ -0,0 +1,78 @@
+"""Finding the changed pets of a world with a `ChangeTracker` instead of a full scan.
+
+Every tick, a few pets of a large world receive a command and are ticked, while the
+others are left alone. The changed pets are then found by draining a `ChangeTracker`, and
+by scanning every pet for a state different from the last one seen, as `WorldServer` used
+to do. Both must find the same pets. Run with `python -m homeostasis.bench.changes`.
+"""
+import argparse
+import random
+from time import perf_counter
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import EatAction, Priority, SleepAction
+from homeostasis.simulation.changes import ChangeTracker
+
+
+def _state(pet: Pet) -> tuple:
+    motives, action = pet.motives, pet.current_action
+    return (
+        motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+        None if action is None else action.name, pet.queued_count,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=100_000)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--active", type=int, default=200, help="pets receiving a command per tick")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    register_food_items()
+    food = ITEMS.with_tags("edible")
+    rng = random.Random(args.seed)
+    pets = [
+        Pet(PetSpec(name=f"Pet {index}", age=1, style="Casual"), Traits(5, 5, 5, 5),
+            Motives(*(rng.uniform(20, 100) for _ in range(6))))
+        for index in range(args.pets)
+    ]
+    tracker = ChangeTracker(pets)
+    last = [_state(pet) for pet in pets]
+
+    drained = scanned = 0.0
+    changed = 0
+    for _ in range(args.ticks):
+        for index in rng.sample(range(args.pets), args.active):
+            action = SleepAction() if rng.random() < 0.3 else EatAction(rng.choice(food).spawn())
+            pets[index].queue_action(action, Priority(rng.randrange(4)))
+            pets[index].tick()
+
+        start = perf_counter()
+        found = {change.index for change in tracker.drain_changes()}
+        drained += perf_counter() - start
+
+        start = perf_counter()
+        expected = set()
+        for index, pet in enumerate(pets):
+            state = _state(pet)
+            if state != last[index]:
+                last[index] = state
+                expected.add(index)
+        scanned += perf_counter() - start
+
+        if found != expected:
+            raise AssertionError("The tracker and the scan found different pets.")
+        changed += len(found)
+
+    print(f"{args.pets:,} pets, {args.ticks} ticks, {changed / args.ticks:.0f} changed pets per tick")
+    print(f"full scan      {scanned / args.ticks * 1e3:8.2f}ms per tick")
+    print(f"drain_changes  {drained / args.ticks * 1e3:8.2f}ms per tick")
+
+
+if __name__ == "__main__":
+    main()
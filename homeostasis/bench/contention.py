@@ -0,0 +1,105 @@
+"""Stress test of shared item instances used by many threads at once.
+
+Threads of a pool reserve uses of a few shared items, then tick pets playing with them.
+Every run must grant exactly the durability of the items, never more. Run with
+`python -m homeostasis.bench.contention`.
+"""
+import argparse
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from homeostasis.bench.memory import make_pets
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS, ItemDefinition, ItemInstance
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, PlayAction
+
+
+def stress_reserve(items: list[ItemInstance], threads: int, seed: int) -> int:
+    """Reserve random amounts from random items on every thread until all items are consumed.
+
+    Returns:
+        int: The total number of uses granted.
+    """
+    def worker(index: int) -> int:
+        rng = random.Random(seed + index)
+        granted = 0
+        while any(item.durability > 0 for item in items):
+            granted += rng.choice(items).reserve(rng.randint(1, 4))
+        return granted
+
+    with ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(worker, range(threads)))
+
+
+def stress_ticks(items: list[ItemInstance], pets: list[Pet], threads: int) -> int:
+    """Tick shards of pets on a thread pool, every pet playing with the shared items until they are consumed.
+
+    Returns:
+        int: The number of plays completed, one use each.
+    """
+    def worker(shard: list[Pet]) -> int:
+        completed = 0
+        active = list(shard)
+        while active:
+            for pet in list(active):
+                if not pet.is_busy:
+                    usable = [item for item in items if item.durability > 0]
+                    if not usable:
+                        active.remove(pet)
+                        continue
+                    pet.set_action(PlayAction(usable[id(pet) % len(usable)]))
+                try:
+                    pet.tick()
+                except ActionInterruptException:
+                    # Another pet took the last use between the check and the tick
+                    pet.cancel_action()
+                else:
+                    completed += not pet.is_busy
+        return completed
+
+    shards = [pets[index::threads] for index in range(threads)]
+    with ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(worker, shards))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--durability", type=int, default=100_000)
+    parser.add_argument("--pets", type=int, default=256)
+    parser.add_argument("--switch-interval", type=float, default=1e-6,
+                        help="seconds between thread switches, small to force contention")
+    args = parser.parse_args()
+
+    register_play_items()
+    toy = next(item for item in ITEMS.values() if "playable" in item.tags)
+    definition = ItemDefinition(
+        name=toy.name, description=toy.description, max_durability=args.durability,
+        personality=toy.personality, effects=toy.effects, effect_weights=toy.effect_weights, tags=toy.tags,
+    )
+    expected = args.items * args.durability
+    sys.setswitchinterval(args.switch_interval)
+
+    items = [definition.spawn_shared() for _ in range(args.items)]
+    start = perf_counter()
+    granted = stress_reserve(items, args.threads, seed=0)
+    elapsed = perf_counter() - start
+    verdict = "ok" if granted == expected and all(item.durability == 0 for item in items) else "OVER-CONSUMED"
+    print(f"reserve: {granted:,} of {expected:,} uses granted in {elapsed:.2f}s on {args.threads} threads ({verdict})")
+
+    items = [definition.spawn_shared() for _ in range(args.items)]
+    pets = make_pets(args.pets, Pet, PetSpec, Traits, Motives)
+    start = perf_counter()
+    completed = stress_ticks(items, pets, args.threads)
+    elapsed = perf_counter() - start
+    verdict = "ok" if completed == expected and all(item.durability == 0 for item in items) else "OVER-CONSUMED"
+    print(f"ticks: {completed:,} of {expected:,} plays completed in {elapsed:.2f}s on {args.threads} threads ({verdict})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Overhead of the tick-loop instrumentation, enabled and disabled.
+
+Run with `python -m homeostasis.bench.instrumentation`.
+"""
+import argparse
+import json
+from time import perf_counter
+
+from homeostasis.bench.memory import make_pets
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import EatAction, PlayAction, SleepAction
+from homeostasis.simulation.instrumentation import Instrumentation, MemorySink
+
+
+def bench_ticks(size: int, ticks: int) -> float:
+    """Measure pet-ticks per second of `Pet.tick`, cycling pets through sleep, eat and play."""
+    food = next(item for item in ITEMS.values() if "edible" in item.tags)
+    toy = next(item for item in ITEMS.values() if "playable" in item.tags)
+    make_actions = [SleepAction, lambda: EatAction(food.spawn()), lambda: PlayAction(toy.spawn())]
+    pets = make_pets(size, Pet, PetSpec, Traits, Motives)
+
+    elapsed = 0.0
+    for tick in range(ticks):
+        for index, pet in enumerate(pets):
+            if not pet.is_busy:
+                pet.set_action(make_actions[(index + tick) % len(make_actions)]())
+        start = perf_counter()
+        for pet in pets:
+            pet.tick()
+        elapsed += perf_counter() - start
+    return size * ticks / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs per mode")
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+
+    originals = (Pet.tick, Pet.advance)
+    sink = MemorySink()
+    instrumentation = Instrumentation([sink])
+    baseline = enabled = disabled = 0.0
+    # Interleave the modes so that they all see the same machine noise
+    for _ in range(args.repeat):
+        baseline = max(baseline, bench_ticks(args.size, args.ticks))
+        with instrumentation:
+            enabled = max(enabled, bench_ticks(args.size, args.ticks))
+        assert (Pet.tick, Pet.advance) == originals
+        disabled = max(disabled, bench_ticks(args.size, args.ticks))
+    instrumentation.flush()
+
+    print(f"{'never enabled':>14} {baseline:>14,.0f} pet-ticks/s")
+    print(f"{'disabled':>14} {disabled:>14,.0f} pet-ticks/s ({disabled / baseline - 1:+.1%})")
+    print(f"{'enabled':>14} {enabled:>14,.0f} pet-ticks/s ({enabled / baseline - 1:+.1%})")
+    print(json.dumps(sink.reports[0], indent=2))
+
+
+if __name__ == "__main__":
+    main()
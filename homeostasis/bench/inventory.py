@@ -0,0 +1,68 @@
+"""Memory of per-pet pantries held as `ItemInstance` lists versus an `Inventory`.
+
+Every pet is given the same number of food items, spread over the edible definitions.
+Run with `python -m homeostasis.bench.inventory`.
+"""
+import argparse
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.inventory import Inventory
+
+
+def measure(build) -> tuple[object, int, float]:
+    """Build something while tracing allocations, returning it, the bytes it holds and the time taken."""
+    tracemalloc.start()
+    start = perf_counter()
+    built = build()
+    elapsed = perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, size, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=20_000)
+    parser.add_argument("--pantry", type=int, default=50, help="food items per pet")
+    args = parser.parse_args()
+
+    register_food_items()
+    food = ITEMS.with_tags("edible")
+    shares = [args.pantry // len(food) + (index < args.pantry % len(food)) for index in range(len(food))]
+
+    def instances() -> list:
+        return [
+            [definition.spawn() for definition, share in zip(food, shares) for _ in range(share)]
+            for _ in range(args.pets)
+        ]
+
+    def inventory() -> Inventory:
+        held = Inventory(args.pets)
+        pets = np.arange(args.pets)
+        for definition, share in zip(food, shares):
+            held.grant(pets, definition, share)
+        return held
+
+    pantries, listed, listed_time = measure(instances)
+    del pantries
+    held, stacked, stacked_time = measure(inventory)
+    print(f"{args.pets:,} pets with {args.pantry} food items each")
+    print(f"ItemInstance lists: {listed / args.pets:>8.1f} bytes per pet, built in {listed_time:.2f}s")
+    print(f"Inventory:          {stacked / args.pets:>8.1f} bytes per pet, built in {stacked_time:.3f}s "
+          f"({listed / stacked:,.0f}x smaller)")
+
+    pets = np.arange(args.pets)
+    start = perf_counter()
+    for definition in food:
+        held.consume(pets, definition)
+    elapsed = perf_counter() - start
+    print(f"consume: {len(food) * args.pets / elapsed:,.0f} pet-items per second")
+
+
+if __name__ == "__main__":
+    main()
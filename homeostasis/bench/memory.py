@@ -0,0 +1,129 @@
+"""Per-pet memory and per-tick allocations of the pet data model.
+
+Memory is compared against the same classes laid out with a per-instance `__dict__`: the
+dict-backed pet holds every attribute of `Pet.__slots__`, with the same values.
+Run with `python -m homeostasis.bench.memory`.
+"""
+import argparse
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import fields, is_dataclass, make_dataclass
+from functools import cache
+
+from homeostasis.common import Motives, MotivesModifier, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import EatAction, PlayAction, SleepAction
+
+
+@cache
+def _dict_backed(cls: type) -> type:
+    """Copy of a dataclass storing its fields in a per-instance `__dict__`."""
+    return make_dataclass(cls.__name__, [(f.name, f.type, f.default) for f in fields(cls)])
+
+
+class _DictPet:
+    """Twin of a `Pet` holding the values of all its slots in a per-instance `__dict__`."""
+    def __init__(self, info, personality, motives) -> None:
+        pet = Pet(info=info, personality=personality, motives=motives)
+        for name in Pet.__slots__:
+            if name == "__weakref__":
+                # Instances with a `__dict__` support weak references already
+                continue
+            value = getattr(pet, name)
+            if is_dataclass(value) and hasattr(type(value), "__slots__"):
+                # Dataclasses the pet creates itself, such as its decay rates, are dict-backed too
+                value = _dict_backed(type(value))(**{f.name: getattr(value, f.name) for f in fields(value)})
+            setattr(self, name, value)
+
+
+def make_pets(size: int, pet: type, spec: type, traits: type, motives: type) -> list:
+    return [
+        pet(
+            info=spec(name="Buddy", age=3, style="Casual"),
+            personality=traits(friendliness=5, playfulness=3, laziness=10, curiosity=7),
+            motives=motives(happiness=50, health=50, hunger=50, energy=50, social=50, fun=50),
+        )
+        for _ in range(size)
+    ]
+
+
+def bytes_per_pet(size: int, factory: Callable[[int], list]) -> float:
+    """Measure the memory held by `size` pets built by `factory`."""
+    tracemalloc.start()
+    try:
+        pets = factory(size)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del pets
+    return current / size
+
+
+def allocations_per_tick(ticks: int) -> dict[str, float]:
+    """Count `Motives` and `MotivesModifier` objects created per `Pet.tick`, per action type."""
+    created = 0
+    originals = {cls: cls.__init__ for cls in (Motives, MotivesModifier)}
+
+    def counting(init):
+        def __init__(self, *args, **kwargs):
+            nonlocal created
+            created += 1
+            init(self, *args, **kwargs)
+        return __init__
+
+    food = next(item for item in ITEMS.values() if "edible" in item.tags)
+    toy = next(item for item in ITEMS.values() if "playable" in item.tags)
+    actions = {
+        "sleep": SleepAction,
+        "eat": lambda: EatAction(food.spawn()),
+        "play": lambda: PlayAction(toy.spawn()),
+    }
+
+    results = {}
+    for name, make_action in actions.items():
+        pet = make_pets(1, Pet, PetSpec, Traits, Motives)[0]
+        pet.motives.energy = 0
+        ticked = 0
+        for cls, init in originals.items():
+            cls.__init__ = counting(init)
+        try:
+            created = 0
+            while ticked < ticks:
+                if not pet.is_busy:
+                    pet.set_action(make_action())
+                pet.tick()
+                pet.motives.energy = 0
+                ticked += 1
+        finally:
+            for cls, init in originals.items():
+                cls.__init__ = init
+        results[name] = created / ticked
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--ticks", type=int, default=10_000)
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+
+    layouts = {
+        "slotted": (Pet, PetSpec, Traits, Motives),
+        "dict-backed": (_DictPet, _dict_backed(PetSpec), _dict_backed(Traits), _dict_backed(Motives)),
+    }
+    for name, classes in layouts.items():
+        size = bytes_per_pet(args.size, lambda count: make_pets(count, *classes))
+        print(f"{name:>12} {args.size:>10,} pets {size:>8.1f} bytes/pet")
+
+    for name, count in allocations_per_tick(args.ticks).items():
+        print(f"{name:>12} {count:>8.3f} Motives/MotivesModifier allocations per tick")
+
+
+if __name__ == "__main__":
+    main()
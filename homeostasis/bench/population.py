@@ -0,0 +1,105 @@
+"""Throughput of `PetPopulation.tick` compared to ticking `Pet` objects one by one.
+
+Run with `python -m homeostasis.bench.population`.
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import EatAction, PlayAction, SleepAction
+from homeostasis.simulation.population import PetPopulation
+
+
+def make_population(size: int, seed: int = 0) -> PetPopulation:
+    """Create a population of idle pets with random motives and traits."""
+    rng = np.random.default_rng(seed)
+    population = PetPopulation(capacity=size)
+    population.extend(rng.uniform(0, 100, (size, 6)), rng.integers(0, 11, (size, 4)).astype(float))
+    return population
+
+
+def assign_actions(population: PetPopulation, definitions: list, rng: np.random.Generator) -> None:
+    """Give every idle pet a sleep, eat or play action."""
+    idle = population.idle()
+    choice = rng.integers(0, len(definitions) + 1, len(idle))
+    population.start_sleep(idle[choice == len(definitions)])
+    for row, definition in enumerate(definitions):
+        selected = idle[choice == row]
+        if "edible" in definition.tags:
+            population.start_eat(selected, definition)
+        else:
+            population.start_play(selected, definition)
+
+
+def bench_population(size: int, ticks: int, seed: int = 0) -> float:
+    """Measure pet-ticks per second of `PetPopulation.tick`."""
+    rng = np.random.default_rng(seed)
+    definitions = list(ITEMS.values())
+    population = make_population(size, seed)
+
+    elapsed = 0.0
+    for _ in range(ticks):
+        assign_actions(population, definitions, rng)
+        start = perf_counter()
+        population.tick()
+        elapsed += perf_counter() - start
+    return size * ticks / elapsed
+
+
+def bench_objects(size: int, ticks: int, seed: int = 0) -> float:
+    """Measure pet-ticks per second of `Pet.tick` called in a loop."""
+    rng = np.random.default_rng(seed)
+    definitions = list(ITEMS.values())
+    pets = [
+        Pet(
+            info=PetSpec(name=f"Pet {index}", age=1, style="Casual"),
+            personality=Traits(*rng.integers(0, 11, 4).tolist()),
+            motives=Motives(*rng.uniform(0, 100, 6).tolist()),
+        )
+        for index in range(size)
+    ]
+
+    elapsed = 0.0
+    for _ in range(ticks):
+        for pet in pets:
+            if not pet.is_busy:
+                row = rng.integers(0, len(definitions) + 1)
+                if row == len(definitions):
+                    pet.set_action(SleepAction())
+                elif "edible" in definitions[row].tags:
+                    pet.set_action(EatAction(definitions[row].spawn()))
+                else:
+                    pet.set_action(PlayAction(definitions[row].spawn()))
+        start = perf_counter()
+        for pet in pets:
+            pet.tick()
+        elapsed += perf_counter() - start
+    return size * ticks / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--objects-size", type=int, default=1_000,
+                        help="number of Pet objects ticked for the baseline")
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+
+    baseline = bench_objects(args.objects_size, args.ticks)
+    print(f"{'Pet.tick loop':>24} {args.objects_size:>10,} pets {baseline:>16,.0f} pet-ticks/s")
+    for size in args.sizes:
+        rate = bench_population(size, args.ticks)
+        print(f"{'PetPopulation.tick':>24} {size:>10,} pets {rate:>16,.0f} pet-ticks/s ({rate / baseline:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
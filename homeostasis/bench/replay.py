@@ -0,0 +1,119 @@
+"""Recomputing a world from a snapshot and its replay log, in parallel and out of order.
+
+A `WorldServer` is run with commands drawn from every pet's `PetRandom` and logged to a
+replay log. The final pets are then recomputed from the starting snapshot by a pool of
+worker processes, each handling its pets in reverse order, and must match the live run
+exactly. Run with `python -m homeostasis.bench.replay`.
+"""
+import argparse
+import multiprocessing
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.replay import Replay, ReplayLog
+from homeostasis.simulation.rng import PetRandom
+from homeostasis.simulation.server import WorldServer
+from homeostasis.snapshot import write_snapshot
+
+PRIORITIES = ("low", "normal", "high", "urgent")
+
+
+def make_world(size: int, seed: int) -> list[Pet]:
+    """Pets with personalities, motives and decay rates drawn from their `PetRandom`."""
+    pets = []
+    for index in range(size):
+        rng = PetRandom(seed, index)
+        pets.append(Pet(
+            PetSpec(name=f"Pet {index}", age=1, style="Casual"),
+            Traits(*(rng.randrange(0, 11, draw) for draw in range(4))),
+            Motives(*(rng.uniform(0, 20, 100, draw) for draw in range(4, 10))),
+            PetDecayRates(*(rng.randrange(0, 3, draw) for draw in range(10, 14))),
+        ))
+    return pets
+
+
+def run_world(server: WorldServer, ticks: int, seed: int, rate: float) -> None:
+    """Step the server, sending commands drawn from the pets' random numbers before every tick."""
+    food = [item.name for item in ITEMS.with_tags("edible")]
+    toys = [item.name for item in ITEMS.with_tags("playable")]
+    randoms = [PetRandom(seed, index) for index in range(len(server.pets))]
+    names = list(server.pets)
+    for tick in range(ticks):
+        for name, rng in zip(names, randoms):
+            if rng.random(tick) >= rate:
+                continue
+            kind = ("feed", "play", "sleep")[rng.randrange(tick, 3, 1)]
+            command = {"command": kind, "pet": name, "priority": PRIORITIES[rng.randrange(tick, 4, 2)]}
+            if kind != "sleep":
+                items = food if kind == "feed" else toys
+                command["item"] = items[rng.randrange(tick, len(items), 3)]
+            server.handle(command)
+        server.step()
+
+
+# Replay opened by each worker process, set up by `_open`
+_replay: Replay | None = None
+
+
+def _open(snapshot: str, log: str) -> None:
+    global _replay
+    _replay = Replay(snapshot, log)
+
+
+def _state(pet: Pet) -> tuple:
+    motives, action = pet.motives, pet.current_action
+    return (
+        motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+        None if action is None else action.name, None if action is None else action.remaining_ticks,
+        pet.queued_count,
+    )
+
+
+def _recompute(indices: list[int], tick: int) -> list[tuple[int, tuple]]:
+    """Recompute pets in reverse order, returning their index and state."""
+    return [(index, _state(_replay.pet(index, tick))) for index in reversed(indices)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=2_000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=0.05, help="probability of a command per pet per tick")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot, log = Path(directory, "world.snap"), Path(directory, "world.replay")
+        pets = make_world(args.pets, args.seed)
+        write_snapshot(snapshot, pets)
+
+        with ReplayLog(log, seed=args.seed) as replay_log:
+            server = WorldServer(pets, replay_log=replay_log)
+            start = perf_counter()
+            run_world(server, args.ticks, args.seed, args.rate)
+            live = perf_counter() - start
+        expected = [_state(pet) for pet in pets]
+
+        shards = [list(range(worker, args.pets, args.workers)) for worker in range(args.workers)]
+        start = perf_counter()
+        with multiprocessing.Pool(args.workers, initializer=_open, initargs=(str(snapshot), str(log))) as pool:
+            results = pool.starmap(_recompute, [(shard, args.ticks) for shard in shards])
+        replayed = perf_counter() - start
+
+        mismatches = sum(expected[index] != state for states in results for index, state in states)
+        print(f"{args.pets:,} pets, {args.ticks} ticks, log of {log.stat().st_size:,} bytes")
+        print(f"live run {live:.2f}s, replay on {args.workers} workers {replayed:.2f}s, "
+              f"{mismatches} mismatched pets ({'exact' if not mismatches else 'NOT EXACT'})")
+
+
+if __name__ == "__main__":
+    main()
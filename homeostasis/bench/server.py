@@ -0,0 +1,91 @@
+"""Load test of `WorldServer` with many simulated loopback clients.
+
+Every client waits for each tick batch, then sends a feed, play or sleep command for a
+random pet with some probability. Run with `python -m homeostasis.bench.server`.
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from time import perf_counter, perf_counter_ns
+
+from homeostasis.bench.memory import make_pets
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.instrumentation import LatencyHistogram
+from homeostasis.simulation.server import LoopbackClient, WorldServer
+
+
+async def simulate_client(client: LoopbackClient, ticks: int, names: list[str], rate: float, seed: int,
+                          latencies: LatencyHistogram, statuses: Counter) -> None:
+    rng = random.Random(seed)
+    food = [item.name for item in ITEMS.with_tags("edible")]
+    toys = [item.name for item in ITEMS.with_tags("playable")]
+    for _ in range(ticks):
+        await client.updates.get()
+        if rng.random() >= rate:
+            continue
+        kind = rng.choice(("feed", "play", "sleep"))
+        command = {"command": kind, "pet": rng.choice(names)}
+        if kind != "sleep":
+            command["item"] = rng.choice(food if kind == "feed" else toys)
+        start = perf_counter_ns()
+        response = await client.request(command)
+        latencies.record(perf_counter_ns() - start)
+        statuses[response["status"]] += 1
+
+
+async def run(clients: int, pets: int, ticks: int, rate: float) -> None:
+    world = make_pets(pets, Pet, PetSpec, Traits, Motives)
+    for index, pet in enumerate(world):
+        pet.info = PetSpec(name=f"Pet {index}", age=1, style="Casual")
+    server = WorldServer(world)
+    names = list(server.pets)
+    latencies = LatencyHistogram()
+    statuses: Counter[str] = Counter()
+    connected = [server.connect(max_pending=ticks + 1) for _ in range(clients)]
+    tasks = [
+        asyncio.create_task(simulate_client(client, ticks, names, rate, seed, latencies, statuses))
+        for seed, client in enumerate(connected)
+    ]
+
+    steps = LatencyHistogram()
+    changes = 0
+    start = perf_counter()
+    for _ in range(ticks):
+        step_start = perf_counter_ns()
+        changes += len(server.step()["pets"])
+        steps.record(perf_counter_ns() - step_start)
+        # Let every client handle the batch before the next tick
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    elapsed = perf_counter() - start
+
+    print(f"{clients:,} clients, {pets:,} pets, {ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:,.1f} ticks/s)")
+    print(f"step + broadcast: p50 {steps.percentile(50) / 1e6:.2f} ms, p99 {steps.percentile(99) / 1e6:.2f} ms")
+    print(f"batches delivered: {clients * ticks:,} ({clients * ticks / elapsed:,.0f}/s), "
+          f"pet changes broadcast: {changes:,}")
+    print(f"commands: {latencies.count:,} ({latencies.count / elapsed:,.0f}/s), "
+          f"p50 {latencies.percentile(50) / 1e3:.1f} us, p99 {latencies.percentile(99) / 1e3:.1f} us, "
+          + ", ".join(f"{status} {count:,}" for status, count in sorted(statuses.items())))
+    print(f"lagging clients: {sum(client.lagging for client in connected)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--pets", type=int, default=1_000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=0.1, help="probability of a command per client per tick")
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+    asyncio.run(run(args.clients, args.pets, args.ticks, args.rate))
+
+
+if __name__ == "__main__":
+    main()
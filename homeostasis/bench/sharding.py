@@ -0,0 +1,71 @@
+"""Scaling of `ShardedWorld` across worker processes.
+
+Every run starts from the same population and must end with exactly the motives of a
+single-process `PetPopulation`. Run with `python -m homeostasis.bench.sharding`.
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from homeostasis.bench.population import assign_actions, make_population
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.simulation.sharding import ShardedWorld
+
+
+def run(size: int, ticks: int, workers: int | None, seed: int = 0) -> tuple[float, np.ndarray]:
+    """Tick a population in rounds, reassigning actions to idle pets in between.
+
+    Args:
+        workers (int | None): The number of worker processes, or None for a plain `PetPopulation`.
+
+    Returns:
+        tuple[float, np.ndarray]: The pet-ticks per second and the final motives.
+    """
+    rng = np.random.default_rng(seed)
+    definitions = list(ITEMS.values())
+    population = make_population(size, seed)
+    world = ShardedWorld(population, workers) if workers is not None else None
+    if world is not None:
+        population = world.population
+
+    elapsed = 0.0
+    try:
+        for _ in range(ticks):
+            assign_actions(population, definitions, rng)
+            start = perf_counter()
+            if world is not None:
+                world.tick()
+            else:
+                population.tick()
+            elapsed += perf_counter() - start
+        motives = population.motives.copy()
+    finally:
+        if world is not None:
+            del population
+            world.close()
+    return size * ticks / elapsed, motives
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+
+    reference_rate, reference = run(args.size, args.ticks, None)
+    print(f"{'in-process':>12} {reference_rate:>16,.0f} pet-ticks/s")
+    for workers in args.workers:
+        rate, motives = run(args.size, args.ticks, workers)
+        identical = "identical" if np.array_equal(motives, reference) else "DIFFERENT"
+        print(f"{workers:>4} workers {rate:>16,.0f} pet-ticks/s ({rate / reference_rate:.2f}x, {identical})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time to pair a room of pets with `SocialIndex`, checked against an all-pairs scan.
+
+Run with `python -m homeostasis.bench.social`.
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from homeostasis.common import Motives, Traits
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.social import SocialIndex
+
+
+def make_room(size: int, seed: int = 0) -> list[Pet]:
+    rng = np.random.default_rng(seed)
+    traits = rng.integers(0, 11, (size, 4)).tolist()
+    social = rng.uniform(0, 100, size).tolist()
+    return [
+        Pet(PetSpec(name=f"Pet {index}", age=1, style="Casual"), Traits(*traits[index]), Motives(social=social[index]))
+        for index in range(size)
+    ]
+
+
+def is_greedy_optimal(pets: list[Pet], pairs: list[tuple[Pet, Pet, float]]) -> bool:
+    """Check that every pet was paired with one of the most compatible pets left, by scanning all pairs."""
+    remaining = dict.fromkeys(sorted(pets, key=lambda pet: pet.motives.social))
+    for pet, partner, compatibility in pairs:
+        if next(iter(remaining)) is not pet:
+            return False
+        del remaining[pet]
+        best = max(Traits.get_compatibility(pet.personality, other.personality) for other in remaining)
+        if compatibility != best:
+            return False
+        del remaining[partner]
+    return len(remaining) <= 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--all-pairs-limit", type=int, default=2_000,
+                        help="largest room whose pairs are checked against an all-pairs scan")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        pets = make_room(size)
+        start = perf_counter()
+        pairs = SocialIndex(pets).pair()
+        indexed = perf_counter() - start
+        line = f"{size:>10,} pets {indexed * 1e3:>10.1f} ms indexed"
+        if size <= args.all_pairs_limit:
+            start = perf_counter()
+            optimal = is_greedy_optimal(pets, pairs)
+            scanned = perf_counter() - start
+            line += f" {scanned * 1e3:>10.1f} ms all-pairs check ({'optimal' if optimal else 'NOT OPTIMAL'})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time from interpreter start to the first tick of a pet, cold and warm.
+
+Each scenario runs in a fresh interpreter. Cold runs start with an empty bytecode cache,
+so every module is compiled; warm runs reuse the cache filled by the previous run. The
+"before" scenario imports and registers what `homeostasis.__main__` did before the package
+namespaces were lazy. Run with `python -m homeostasis.bench.startup`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+FIRST_TICK = """
+pet = Pet(PetSpec(name="Buddy", age=3, style="Casual"), Traits(5, 3, 10, 7), Motives(50, 50, 50, 50, 50, 50))
+pet.set_action(PlayAction(ITEMS["Squeaky Ball"].spawn()))
+pet.tick()
+"""
+
+SCENARIOS = {
+    "interpreter": "pass",
+    # The imports and registrations of `homeostasis.__main__` before the package namespaces were lazy
+    "before": """
+from homeostasis.simulation.action import EatAction, PlayAction
+from homeostasis.simulation.clock import Scheduler
+from homeostasis.common import Traits, Motives
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import *
+from homeostasis.items.base import ITEMS
+register_food_items()
+register_play_items()
+""" + FIRST_TICK,
+    # Only what the first tick needs, through the lazy package namespaces
+    "lazy": """
+from homeostasis.common import Motives, Traits
+from homeostasis.items import ITEMS, register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation import PlayAction
+register_play_items()
+""" + FIRST_TICK,
+    # As above, then `ITEMS.freeze` and the opt-in `gc.freeze` of `python -m homeostasis --freeze-gc`
+    "lazy + freeze": """
+import gc
+from homeostasis.common import Motives, Traits
+from homeostasis.items import ITEMS, register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation import PlayAction
+register_play_items()
+ITEMS.freeze()
+gc.collect()
+gc.freeze()
+""" + FIRST_TICK,
+}
+
+
+def run_once(code: str, cache: str) -> float:
+    """Run code in a fresh interpreter using a bytecode cache directory, returning the wall time."""
+    environment = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+    # Warm runs need the cache written by cold runs
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    start = perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=environment, check=True)
+    return perf_counter() - start
+
+
+def measure(code: str, repeat: int) -> tuple[float, float]:
+    """Median cold and warm wall times of a scenario."""
+    cold, warm = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache:
+            cold.append(run_once(code, cache))
+            warm.append(run_once(code, cache))
+    return statistics.median(cold), statistics.median(warm)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<16}{'cold':>12}{'warm':>12}")
+    for name, code in SCENARIOS.items():
+        cold, warm = measure(code, args.repeat)
+        print(f"{name:<16}{cold * 1e3:>10.1f}ms{warm * 1e3:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
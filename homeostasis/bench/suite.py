@@ -0,0 +1,314 @@
+"""Reproducible micro and population benchmarks of the simulation hot paths.
+
+Every benchmark is a factory registered with `@benchmark`. The factory sets up its inputs
+and returns a callable to time along with the number of operations one call performs.
+`run_suite` times every benchmark and returns a JSON-serializable result, including the
+environment it ran in; `compare` flags the benchmarks that got slower than a baseline,
+and reports those added or removed since.
+"""
+from __future__ import annotations
+
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from homeostasis.bench.population import assign_actions, make_population
+from homeostasis.common import Motives, MotivesModifier, Traits
+from homeostasis.items.base import ITEMS, ItemDefinition, ItemInstance
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import Action, EatAction, PlayAction, SleepAction
+
+type Factory = Callable[[], tuple[Callable[[], object], int]]
+
+FORMAT = 1
+POPULATION_SIZES = (1_000, 100_000, 1_000_000)
+# Ticks per call of an action benchmark
+ACTION_TICKS = 10
+
+BENCHMARKS: dict[str, Factory] = {}
+
+
+def benchmark(name: str) -> Callable[[Factory], Factory]:
+    """Register a benchmark factory under `name`."""
+    def register(factory: Factory) -> Factory:
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def _item(tag: str) -> ItemDefinition:
+    return next(item for item in ITEMS.values() if tag in item.tags)
+
+
+def _pet() -> Pet:
+    return Pet(
+        info=PetSpec(name="Buddy", age=3, style="Casual"),
+        personality=Traits(friendliness=5, playfulness=3, laziness=10, curiosity=7),
+        motives=Motives(happiness=50, health=50, hunger=50, energy=50, social=50, fun=50),
+    )
+
+
+@benchmark("Traits.get_compatibility")
+def _compatibility() -> tuple[Callable[[], object], int]:
+    first, second = Traits(1, 2, 3, 4), Traits(9, 8, 7, 6)
+    return lambda: Traits.get_compatibility(first, second), 1
+
+
+@benchmark("MotivesModifier.apply")
+def _apply() -> tuple[Callable[[], object], int]:
+    modifier, stats = MotivesModifier(1.5, 0.5, 1.0, 2.0, 0.25, 1.0), Motives(10, 20, 30, 40, 50, 60)
+    return lambda: modifier.apply(stats, scale=0.4), 1
+
+
+@benchmark("Motives.add_stats")
+def _add_stats() -> tuple[Callable[[], object], int]:
+    motives, other = Motives(50, 50, 50, 50, 50, 50), Motives(1, -1, 1, -1, 1, -1)
+    return lambda: motives.add_stats(other), 1
+
+
+@benchmark("Motives.add_stats[weights]")
+def _add_weighted_stats() -> tuple[Callable[[], object], int]:
+    motives, other = Motives(50, 50, 50, 50, 50, 50), Motives(1, -1, 1, -1, 1, -1)
+    weights = MotivesModifier(1.5, 0.5, 1.0, 2.0, 0.25, 1.0)
+    return lambda: motives.add_stats(other, weights), 1
+
+
+@benchmark("Motives.clamp_stats")
+def _clamp_stats() -> tuple[Callable[[], object], int]:
+    motives = Motives(-5, 50, 105, 0, 100, 42.5)
+    return motives.clamp_stats, 1
+
+
+@benchmark("ItemInstance.use")
+def _use() -> tuple[Callable[[], object], int]:
+    item = _item("edible").spawn()
+
+    def use() -> None:
+        item.durability = 10
+        for _ in range(10):
+            item.use()
+    return use, 10
+
+
+def _action_tick(action: Action, item: ItemInstance | None = None) -> tuple[Callable[[], object], int]:
+    """Tick `action` from its start, restoring the action, item and energy before every tick."""
+    pet = _pet()
+    ticks = action.remaining_ticks
+
+    def tick() -> None:
+        for _ in range(ACTION_TICKS):
+            action.remaining_ticks = ticks
+            if item is not None:
+                item.durability = item.definition.max_durability
+            pet.motives.energy = 0
+            action.tick(pet)
+    return tick, ACTION_TICKS
+
+
+@benchmark("SleepAction.tick")
+def _sleep_tick() -> tuple[Callable[[], object], int]:
+    return _action_tick(SleepAction())
+
+
+@benchmark("EatAction.tick")
+def _eat_tick() -> tuple[Callable[[], object], int]:
+    food = _item("edible").spawn()
+    return _action_tick(EatAction(food), food)
+
+
+@benchmark("PlayAction.tick")
+def _play_tick() -> tuple[Callable[[], object], int]:
+    toy = _item("playable").spawn()
+    return _action_tick(PlayAction(toy), toy)
+
+
+@benchmark("Pet.tick")
+def _pet_tick() -> tuple[Callable[[], object], int]:
+    pet = _pet()
+
+    def tick() -> None:
+        if not pet.is_busy:
+            pet.set_action(SleepAction())
+        pet.tick()
+    return tick, 1
+
+
+def population_benchmark(size: int) -> Factory:
+    """Benchmark of one `PetPopulation.tick`, after giving an action to every idle pet."""
+    def factory() -> tuple[Callable[[], object], int]:
+        rng = np.random.default_rng(0)
+        definitions = list(ITEMS.values())
+        population = make_population(size)
+
+        def tick() -> None:
+            assign_actions(population, definitions, rng)
+            population.tick()
+        return tick, size
+    return factory
+
+
+@dataclass(slots=True)
+class Measurement:
+    """Timing of one benchmark.
+
+    Attributes:
+        best (float): Nanoseconds per operation of the fastest repeat.
+        median (float): Nanoseconds per operation of the median repeat.
+        operations (int): Operations timed per repeat.
+    """
+    best: float
+    median: float
+    operations: int
+
+
+def measure(function: Callable[[], object], operations: int, repeat: int = 5, min_time: float = 0.2) -> Measurement:
+    """Time `function`, calling it in loops long enough to last `min_time` seconds."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        if time.perf_counter() - start >= min_time / 10 or loops >= 1 << 24:
+            break
+        loops *= 2
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    loops = max(1, int(loops * min_time / elapsed))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) * 1e9 / (loops * operations))
+    return Measurement(best=min(timings), median=statistics.median(timings), operations=loops * operations)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict[str, Any]:
+    """Describe the machine and software the benchmarks run on."""
+    return {
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "revision": _git_revision(),
+    }
+
+
+def run_suite(names: Iterable[str] | None = None, sizes: Sequence[int] = POPULATION_SIZES,
+              repeat: int = 5, min_time: float = 0.2, log: Callable[[str], object] | None = None) -> dict[str, Any]:
+    """Run benchmarks and collect their results.
+
+    Args:
+        names (Iterable[str] | None): Substrings selecting benchmarks by name. Defaults to all.
+        sizes (Sequence[int]): The population sizes of the `PetPopulation.tick` benchmarks.
+        repeat (int): The number of timed repeats per benchmark.
+        min_time (float): The minimum seconds per repeat.
+        log (Callable[[str], object] | None): Called with a line describing every result.
+
+    Returns:
+        dict[str, Any]: The environment, the settings and the results, keyed by benchmark name.
+    """
+    register_food_items()
+    register_play_items()
+
+    benchmarks = dict(BENCHMARKS)
+    for size in sizes:
+        benchmarks[f"PetPopulation.tick[{size}]"] = population_benchmark(size)
+    if names is not None:
+        names = list(names)
+        benchmarks = {name: factory for name, factory in benchmarks.items() if any(part in name for part in names)}
+
+    results = {}
+    for name, factory in benchmarks.items():
+        function, operations = factory()
+        measurement = measure(function, operations, repeat, min_time)
+        results[name] = {
+            "ns_per_op": measurement.best,
+            "median_ns_per_op": measurement.median,
+            "operations": measurement.operations,
+        }
+        if log is not None:
+            log(f"{name:<32} {measurement.best:>12,.1f} ns/op (median {measurement.median:,.1f})")
+    return {
+        "format": FORMAT,
+        "created": time.time(),
+        "environment": environment(),
+        "settings": {"repeat": repeat, "min_time": min_time},
+        "results": results,
+    }
+
+
+@dataclass(slots=True)
+class Comparison:
+    """Timing of one benchmark against its baseline.
+
+    Attributes:
+        name (str): The benchmark name.
+        baseline (float | None): Baseline nanoseconds per operation, or None if the benchmark was added.
+        current (float | None): Current nanoseconds per operation, or None if the benchmark was removed.
+        regressed (bool): Whether the slowdown exceeds the comparison threshold. Always False
+            for an added or removed benchmark.
+    """
+    name: str
+    baseline: float | None
+    current: float | None
+    regressed: bool
+
+    @property
+    def change(self) -> float | None:
+        """Relative change of the time per operation, positive when slower, or None if a side is missing."""
+        if self.baseline is None or self.current is None:
+            return None
+        return self.current / self.baseline - 1
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float = 0.1) -> list[Comparison]:
+    """Compare two results, benchmark by benchmark.
+
+    Args:
+        current (dict[str, Any]): A result of `run_suite`.
+        baseline (dict[str, Any]): The result to compare against.
+        threshold (float): The relative slowdown above which a benchmark has regressed.
+
+    Returns:
+        list[Comparison]: The benchmarks of `current` in order, then those only in `baseline`.
+            A benchmark missing from one side has None as its time there.
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            comparisons.append(Comparison(name, None, result["ns_per_op"], False))
+            continue
+        slowdown = result["ns_per_op"] / reference["ns_per_op"] - 1
+        comparisons.append(Comparison(name, reference["ns_per_op"], result["ns_per_op"], slowdown > threshold))
+    for name, reference in baseline["results"].items():
+        if name not in current["results"]:
+            comparisons.append(Comparison(name, reference["ns_per_op"], None, False))
+    return comparisons
+
+
+__all__ = ["BENCHMARKS", "benchmark", "measure", "run_suite", "compare", "environment", "Measurement", "Comparison"]
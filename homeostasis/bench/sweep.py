@@ -0,0 +1,60 @@
+"""Item balancing sweep over a grid or random sample of variants of one item.
+
+Prints the outcome of the best and worst variants by hunger at equilibrium, and the
+throughput of the sweep in pet-ticks per second. Run with `python -m homeostasis.bench.sweep`.
+"""
+import argparse
+import math
+from time import perf_counter
+
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.simulation.sweep import SweepResult, grid, run_sweep, sample, synthetic_population
+
+
+def describe(result: SweepResult) -> str:
+    starvation = "never" if math.isnan(result.time_to_starvation) else f"tick {result.time_to_starvation:g}"
+    motives = result.equilibrium
+    return (f"{result.variant.name}\n    starved {result.starved:.1%} (median {starvation}), "
+            f"used {result.usage_share:.1%}, equilibrium hunger {motives.hunger:.1f} "
+            f"health {motives.health:.1f} happiness {motives.happiness:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--item", default="Fufu Sauce Graine")
+    parser.add_argument("--pets", type=int, default=1_000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=0, help="random variants instead of the grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--show", type=int, default=3, help="variants shown at each end of the ranking")
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+    base = ITEMS[args.item]
+    if args.samples:
+        variants = sample(base, {"effects.hunger": (0, 60), "effects.health": (-20, 50),
+                                 "personality.playfulness": (0, 10)}, args.samples)
+    else:
+        variants = grid(base, {"effects.hunger": [10, 30, 50], "effects.health": [-20, 0, 50],
+                               "personality.playfulness": [0, 5, 10]})
+    population = synthetic_population(args.pets)
+
+    start = perf_counter()
+    results = run_sweep(list(ITEMS.values()), base.name, variants, population, args.ticks,
+                        workers=args.workers, batch_size=args.batch_size)
+    elapsed = perf_counter() - start
+
+    results.sort(key=lambda result: -result.equilibrium.hunger)
+    shown = results if len(results) <= 2 * args.show else results[:args.show] + results[-args.show:]
+    for result in shown:
+        print(describe(result))
+    print(f"{len(variants):,} variants x {args.pets:,} pets x {args.ticks} ticks in {elapsed:.1f}s "
+          f"({len(variants) * args.pets * args.ticks / elapsed:,.0f} pet-ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Cost of recording the motives of a population every tick with `MotiveRecorder`.
+
+Memory must stay the same however many ticks are recorded, and querying one motive of
+every pet over the last ticks must cost the same at any point of the run. Run with
+`python -m homeostasis.bench.telemetry`.
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from homeostasis.bench.population import assign_actions, make_population
+from homeostasis.items.base import ITEMS
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+from homeostasis.simulation.telemetry import MotiveRecorder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=2_000)
+    parser.add_argument("--recent", type=int, default=256)
+    parser.add_argument("--window", type=int, default=16)
+    parser.add_argument("--windows", type=int, default=64)
+    parser.add_argument("--query", type=int, default=100, help="ticks of hunger queried")
+    args = parser.parse_args()
+
+    register_food_items()
+    register_play_items()
+    definitions = list(ITEMS.values())
+    rng = np.random.default_rng(0)
+    population = make_population(args.pets)
+    recorder = MotiveRecorder(args.pets, recent=args.recent, window=args.window, windows=args.windows)
+    print(f"{args.pets:,} pets, buffers of {recorder.nbytes / 2**20:.1f} MiB")
+
+    ticking = recording = 0.0
+    report = max(1, args.ticks // 4)
+    for tick in range(1, args.ticks + 1):
+        assign_actions(population, definitions, rng)
+        start = perf_counter()
+        population.tick()
+        ticking += perf_counter() - start
+        start = perf_counter()
+        recorder.record(population.motives)
+        recording += perf_counter() - start
+        if tick % report == 0:
+            start = perf_counter()
+            hunger = recorder.recent("hunger", args.query)
+            queried = perf_counter() - start
+            print(f"tick {tick:>7,}: {recorder.nbytes / 2**20:.1f} MiB, "
+                  f"last {len(hunger)} ticks of hunger in {queried * 1e6:.1f} us")
+
+    print(f"tick {ticking / args.ticks * 1e3:.2f} ms, record {recording / args.ticks * 1e3:.2f} ms per tick "
+          f"({recording / ticking:.0%} of the tick)")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "telemetry.npz")
+        start = perf_counter()
+        recorder.export(path)
+        print(f"export {perf_counter() - start:.2f}s, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import math
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
 from typing import Union
 
 
-@dataclass
+@dataclass(slots=True)
 class Traits:
     """Personality traits affecting pet behavior."""
     friendliness: int = 5
@@ -13,20 +15,20 @@ class Traits:
     @staticmethod
     def get_compatibility(matrix1, matrix2) -> float:
         """Calculates compatibility score between two personality matrices."""
-        score = 0
-        fields = 0
-        for trait in Traits.__dataclass_fields__:  # noqa
-            value1 = getattr(matrix1, trait)
-            value2 = getattr(matrix2, trait)
-            score += 10 - abs(value1 - value2)  # Max difference is 10
-            fields += 1
+        # Max difference is 10 for each of the 4 traits
+        score = (
+            (10 - abs(matrix1.friendliness - matrix2.friendliness))
+            + (10 - abs(matrix1.playfulness - matrix2.playfulness))
+            + (10 - abs(matrix1.laziness - matrix2.laziness))
+            + (10 - abs(matrix1.curiosity - matrix2.curiosity))
+        )
 
         # score now ranges from 0 to 10 * number of fields
         # Normalize to [-1, 1]
-        score = (score / (10 * fields)) * 2 - 1 # [0, fields*10] -> [0, 1] -> [0, 2] -> [-1, 1]
+        score = (score / (10 * 4)) * 2 - 1 # [0, fields*10] -> [0, 1] -> [0, 2] -> [-1, 1]
         return score
 
-@dataclass
+@dataclass(slots=True)
 class Motives:
     """Represents the core motives of the pet.
 
@@ -49,30 +51,66 @@ class Motives:
 
     def clamp_stats(self):
         """Ensure all motives are within the range 0-100."""
-        for stat in Motives.__dataclass_fields__: # noqa
-            value = getattr(self, stat)
-            clamped_value = max(0, min(100, value))
-            setattr(self, stat, clamped_value)
+        self.happiness = max(0, min(100, self.happiness))
+        self.health = max(0, min(100, self.health))
+        self.hunger = max(0, min(100, self.hunger))
+        self.energy = max(0, min(100, self.energy))
+        self.social = max(0, min(100, self.social))
+        self.fun = max(0, min(100, self.fun))
 
     def add_stats(self, other: 'Motives', weights: Union['MotivesModifier', None] = None) -> None:
         """Add another PetStats to this one and apply weights.
 
+        Each stat is added and clamped in place, without allocating intermediate objects.
+
         Args:
             other (Motives): The other Stats to add.
             weights (MotivesModifier): The weights to apply to the addition.
         """
         if weights is None:
-            weights = MotivesModifier(1, 1, 1, 1, 1, 1)
+            self.happiness = max(0, min(100, self.happiness + other.happiness))
+            self.health = max(0, min(100, self.health + other.health))
+            self.hunger = max(0, min(100, self.hunger + other.hunger))
+            self.energy = max(0, min(100, self.energy + other.energy))
+            self.social = max(0, min(100, self.social + other.social))
+            self.fun = max(0, min(100, self.fun + other.fun))
+        else:
+            self.happiness = max(0, min(100, self.happiness + other.happiness * weights.happiness))
+            self.health = max(0, min(100, self.health + other.health * weights.health))
+            self.hunger = max(0, min(100, self.hunger + other.hunger * weights.hunger))
+            self.energy = max(0, min(100, self.energy + other.energy * weights.energy))
+            self.social = max(0, min(100, self.social + other.social * weights.social))
+            self.fun = max(0, min(100, self.fun + other.fun * weights.fun))
 
-        for stat in Motives.__dataclass_fields__: # noqa
-            current_value = getattr(self, stat)
-            addition_value = getattr(other, stat)
-            weight = getattr(weights, stat)
-            setattr(self, stat, current_value + (addition_value * weight))
+    def add_stats_repeatedly(self, others: Sequence['Motives'], times: int,
+                             stop_stat: Union[str, None] = None, stop_at: float = 100) -> tuple[int, bool]:
+        """Add each of `others` in turn, `times` times over, in closed form.
 
-        self.clamp_stats()
+        The result is exactly the same as calling `add_stats(other)` for every other, `times` times.
+
+        Args:
+            others (Sequence[Motives]): The Stats added by each repetition, in order.
+            times (int): The number of repetitions.
+            stop_stat (str | None): Stop after the first repetition in which this stat is at least
+                `stop_at` right after adding the first of `others`.
+            stop_at (float): The threshold for `stop_stat`.
 
-@dataclass
+        Returns:
+            tuple[int, bool]: The number of repetitions applied and whether `stop_stat` stopped them.
+        """
+        stopped = False
+        if stop_stat is not None:
+            deltas = [getattr(other, stop_stat) for other in others]
+            value, times, stopped = advance_value(getattr(self, stop_stat), deltas, times, until=stop_at)
+            setattr(self, stop_stat, value)
+
+        for stat in Motives.__dataclass_fields__: # noqa
+            if stat != stop_stat:
+                deltas = [getattr(other, stat) for other in others]
+                setattr(self, stat, advance_value(getattr(self, stat), deltas, times)[0])
+        return times, stopped
+
+@dataclass(slots=True)
 class MotivesModifier:
     """Weights to modify the effect of Motives changes."""
     happiness: float = 1
@@ -92,10 +130,139 @@ class MotivesModifier:
         Returns:
             Motives: The resulting Stats after applying weights and scale.
         """
-        values = {}
-        for stat in Motives.__dataclass_fields__: # noqa
-            # Get the current value of stat, multiply by weight, and scale
-            value = getattr(stats, stat) * getattr(self, stat) * scale
-            values[stat] = value
+        # Multiply the value of each stat by its weight, and scale
+        return Motives(
+            happiness=stats.happiness * self.happiness * scale,
+            health=stats.health * self.health * scale,
+            hunger=stats.hunger * self.hunger * scale,
+            energy=stats.energy * self.energy * scale,
+            social=stats.social * self.social * scale,
+            fun=stats.fun * self.fun * scale,
+        )
+
+
+def _ticks_within(start: int, step: int, low: int, high: int, limit: int) -> int:
+    """Count the consecutive ticks t >= 0, up to `limit`, for which `low <= start + t * step <= high`."""
+    if not low <= start <= high:
+        return 0
+    if step > 0:
+        return min(limit, (high - start) // step + 1)
+    if step < 0:
+        return min(limit, (start - low) // -step + 1)
+    return limit
+
+
+def _ticks_below(start: int, step: int, threshold: int, limit: int) -> int:
+    """Count the consecutive ticks t >= 0, up to `limit`, for which `start + t * step < threshold`."""
+    if start >= threshold:
+        return 0
+    if step > 0:
+        return min(limit, -((start - threshold) // step))
+    return limit
+
+
+def advance_value(value: float, deltas: Sequence[float], ticks: int,
+                  until: Union[float, None] = None) -> tuple[float, int, bool]:
+    """Repeatedly add deltas to a motive value, clamping to 0-100 after every addition.
+
+    Each tick adds every delta in turn. When `value` and the deltas all lie on a common binary
+    grid fine enough for every intermediate value to be exact (integers, halves, ... or any
+    value in the same binade as the result), the ticks are computed in closed form on that grid,
+    in a handful of steps regardless of `ticks`. Otherwise the ticks are simulated one by one
+    until the value stops changing, which happens within roughly `100 / |sum(deltas)|` ticks.
+    Either way the result is exactly the same as adding the deltas one at a time.
+
+    Args:
+        value (float): The starting value.
+        deltas (Sequence[float]): The values added by each tick, in order.
+        ticks (int): The number of ticks.
+        until (float | None): Stop after the first tick in which the value is at least `until`
+            right after adding the first delta.
+
+    Returns:
+        tuple[float, int, bool]: The final value, the number of ticks applied and whether `until` stopped the ticks.
+    """
+    if ticks <= 0:
+        return value, 0, False
+
+    bound = max(100, abs(value)) + sum(abs(delta) for delta in deltas)
+    grid = math.ulp(bound)
+    if any(number % grid for number in (value, *deltas)):
+        return _advance_value_slowly(value, deltas, ticks, until)
+
+    current = int(value / grid)
+    steps = [int(delta / grid) for delta in deltas]
+    high = int(100 / grid)
+    threshold = None if until is None else math.ceil(until / grid)
+    total = sum(steps)
+
+    applied = 0
+    while applied < ticks:
+        # Jump over every tick in which no addition is clamped and the stop condition does not hold
+        skip = ticks - applied
+        partial = current
+        for step in steps:
+            partial += step
+            skip = _ticks_within(partial, total, 0, high, skip)
+        if threshold is not None and steps:
+            skip = _ticks_below(current + steps[0], total, threshold, skip)
+        current += skip * total
+        applied += skip
+        if applied == ticks:
+            break
+
+        # Apply the next tick exactly
+        previous = current
+        stopped = False
+        for index, step in enumerate(steps):
+            current = max(0, min(high, current + step))
+            if index == 0 and threshold is not None and current >= threshold:
+                stopped = True
+        applied += 1
+        if stopped:
+            return current * grid, applied, True
+        if current == previous:
+            applied = ticks
+
+    return current * grid, applied, False
+
+
+def _advance_value_slowly(value: float, deltas: Sequence[float], ticks: int,
+                          until: Union[float, None]) -> tuple[float, int, bool]:
+    """Tick-by-tick fallback of `advance_value`."""
+    for applied in range(1, ticks + 1):
+        previous = value
+        for index, delta in enumerate(deltas):
+            value = max(0, min(100, value + delta))
+            if index == 0 and until is not None and value >= until:
+                for remaining in deltas[1:]:
+                    value = max(0, min(100, value + remaining))
+                return value, applied, True
+        if value == previous:
+            break
+    return value, ticks, False
+
+
+def trait_shell(center: Sequence[int], radius: int, low: int = 0, high: int = 10) -> Iterator[tuple[int, ...]]:
+    """Yield every integer trait vector at L1 distance `radius` from `center`.
+
+    Compatibility between personalities only depends on their L1 distance, so walking shells
+    of growing radius visits personalities from the most to the least compatible.
+
+    Args:
+        center (Sequence[int]): The trait values to start from.
+        radius (int): The L1 distance of the yielded vectors.
+        low (int): The lowest value of a trait.
+        high (int): The highest value of a trait.
+    """
+    value = center[0]
+    if len(center) == 1:
+        for candidate in sorted({value - radius, value + radius}):
+            if low <= candidate <= high:
+                yield (candidate,)
+        return
 
-        return Motives(**values)
\ No newline at end of file
+    for offset in range(-radius, radius + 1):
+        if low <= value + offset <= high:
+            for rest in trait_shell(center[1:], radius - abs(offset), low, high):
+                yield (value + offset, *rest)
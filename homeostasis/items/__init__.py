@@ -0,0 +1,45 @@
+"""Item definitions, instances, the item registry and the built-in catalogues.
+
+Names are imported from their submodule on first access (PEP 562), so importing the
+package, or one of its submodules, does not import the others.
+"""
+from importlib import import_module
+
+# Public name -> submodule defining it
+_LAZY = {
+    "ITEMS": "base",
+    "EFFECT_CACHE": "base",
+    "EffectCache": "base",
+    "FrozenRegistryError": "base",
+    "ItemDefinition": "base",
+    "ItemInstance": "base",
+    "ItemQueryError": "base",
+    "ItemRegistry": "base",
+    "ItemStatus": "base",
+    "SharedItemInstance": "base",
+    "register_item": "base",
+    "register_food_items": "food",
+    "register_play_items": "play",
+    "Inventory": "inventory",
+    "InventoryItem": "inventory",
+    "CatalogueError": "catalogue",
+    "compile_catalogue": "catalogue",
+    "load_catalogue": "catalogue",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    # Later lookups find the name without going through `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY})
+
+
+__all__ = list(_LAZY)
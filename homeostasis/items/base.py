@@ -1,7 +1,12 @@
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
 from dataclasses import dataclass, field
 from enum import Enum
 
-from homeostasis.common import Traits, Motives, MotivesModifier
+from homeostasis.common import Traits, Motives, MotivesModifier, trait_shell
 
 
 class ItemStatus(Enum):
@@ -21,7 +26,7 @@ class ItemStatus(Enum):
         else:
             return ItemStatus.NEW
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ItemDefinition:
     """Definition of an item type.
 
@@ -55,11 +60,25 @@ class ItemDefinition:
         weighted_effects = self.effect_weights.apply(self.effects, scale=compatibility)
         return weighted_effects
 
+    def cached_effect(self, pet_personality: Traits) -> Motives:
+        """Same as `effect`, memoized in `EFFECT_CACHE`.
+
+        The returned motives are shared between callers and must not be mutated.
+
+        Args:
+            pet_personality (Traits): The personality matrix of the pet.
+        """
+        return EFFECT_CACHE.get(self, pet_personality)
+
     def spawn(self) -> 'ItemInstance':
         """Create a new instance of the item."""
         return ItemInstance(definition=self)
 
-@dataclass
+    def spawn_shared(self) -> 'SharedItemInstance':
+        """Create a new instance of the item that several pets can use concurrently."""
+        return SharedItemInstance(definition=self)
+
+@dataclass(slots=True)
 class ItemInstance:
     definition: ItemDefinition
     durability: int = field(init=False)
@@ -76,21 +95,415 @@ class ItemInstance:
 
         Args:
             amount (int): The amount to reduce durability by.
+
+        Raises:
+            ValueError: If the item runs out of durability before `amount` uses. The uses that
+                were possible are still applied.
         """
-        for _ in range(amount):
-            if not self.is_usable():
-                raise ValueError(f"Item '{self.definition.name}' is not usable.")
+        if amount <= 0:
+            return self.status
 
-            self.durability -= 1
+        if amount > self.durability:
+            self.durability = min(self.durability, 0)
+            raise ValueError(f"Item '{self.definition.name}' is not usable.")
 
+        self.durability -= amount
         return self.status
 
+    def reserve(self, amount: int) -> int:
+        """Use the item up to `amount` times, as far as its durability allows.
+
+        Returns:
+            int: The number of uses granted.
+        """
+        granted = max(0, min(amount, self.durability))
+        self.durability -= granted
+        return granted
+
     @property
     def status(self) -> ItemStatus:
         """Get the current status of the item instance."""
         return ItemStatus.get_status(self.durability, self.definition.max_durability)
 
-ITEMS = {}
+# Locks shared by every `SharedItemInstance`, so that instances cost no memory for a lock
+# and unrelated instances rarely contend for the same one
+_LOCK_STRIPES = tuple(threading.Lock() for _ in range(64))
+
+@dataclass(slots=True)
+class SharedItemInstance(ItemInstance):
+    """Item instance that several pets can use at once, from several threads.
+
+    Durability changes are made under one of a fixed set of striped locks, picked from the
+    identity of the instance, so concurrent uses never consume more than the durability.
+    """
+    @property
+    def _lock(self) -> threading.Lock:
+        # Objects are 16-byte aligned, the low bits of their id carry no information
+        return _LOCK_STRIPES[(id(self) >> 4) % len(_LOCK_STRIPES)]
+
+    def use(self, amount: int = 1) -> ItemStatus:
+        """Use the item instance atomically, see `ItemInstance.use`."""
+        with self._lock:
+            return ItemInstance.use(self, amount)
+
+    def reserve(self, amount: int) -> int:
+        """Atomically use the item up to `amount` times, see `ItemInstance.reserve`."""
+        with self._lock:
+            granted = max(0, min(amount, self.durability))
+            self.durability -= granted
+        return granted
+
+class EffectCache:
+    """Bounded LRU cache of `ItemDefinition.effect` results.
+
+    Entries are keyed by the identity of the item definition and the pet personality, both of
+    which are fixed for the life of a pet. A definition replaced by registering another one with
+    the same name is a different object, so its cached effects are never returned for the new
+    one; `discard` drops them.
+
+    Attributes:
+        maxsize (int): The maximum number of cached effects.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to compute the effect.
+    """
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Each entry holds its definition, so that the id in its key is not reused while it is cached
+        self._effects: OrderedDict[tuple, tuple[ItemDefinition, Motives]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._effects)
+
+    def get(self, definition: ItemDefinition, pet_personality: Traits) -> Motives:
+        """Get the effect of an item on a pet, computing it on a miss."""
+        key = (
+            id(definition),
+            pet_personality.friendliness,
+            pet_personality.playfulness,
+            pet_personality.laziness,
+            pet_personality.curiosity,
+        )
+        entry = self._effects.get(key)
+        if entry is not None:
+            self.hits += 1
+            try:
+                self._effects.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread since the lookup
+                pass
+            return entry[1]
+
+        self.misses += 1
+        effects = definition.effect(pet_personality)
+        self._effects[key] = (definition, effects)
+        if len(self._effects) > self.maxsize:
+            self._effects.popitem(last=False)
+        return effects
+
+    def discard(self, definitions: Iterable[ItemDefinition]) -> None:
+        """Drop the cached effects of item definitions, typically once they were replaced."""
+        stale = {id(definition) for definition in definitions}
+        if stale:
+            for key in [key for key in list(self._effects) if key[0] in stale]:
+                self._effects.pop(key, None)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Drop every cached effect and reset the counters."""
+        self._effects.clear()
+        self.hits = 0
+        self.misses = 0
+
+EFFECT_CACHE = EffectCache()
+
+class ItemQueryError(Exception):
+    """The tag query is malformed."""
+    pass
+
+class FrozenRegistryError(Exception):
+    """The item registry is frozen and cannot be modified."""
+    pass
+
+# Personalities on the 0-10 integer grid of four traits
+_GRID_POINTS = 11 ** 4
+# Cost of visiting a personality of a shell walk, in candidates scored by a scan
+_SCAN_RATIO = 4
+# Bits set in every byte value, and a pattern finding the non-zero bytes of a bitset
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def _bit_indices(bits: int) -> list[int]:
+    """Get the indices of the bits set in a bitset, in increasing order, skipping zero bytes in C."""
+    data = bits.to_bytes(-(-bits.bit_length() // 8), "little")
+    indices = []
+    for match in _NONZERO.finditer(data):
+        start = match.start()
+        indices.extend(start * 8 + bit for bit in _BYTE_BITS[data[start]])
+    return indices
+
+
+class ItemRegistry(Mapping[str, ItemDefinition]):
+    """Registry of item definitions, indexed by name, tag and personality.
+
+    Every definition keeps the index at which it was first registered, even when replaced.
+    Each tag maps to a bitset of the indices of the items carrying it, so tag queries are a
+    few integer operations whatever the size of the catalogue. Items are also bucketed by
+    personality, which lets `most_compatible` visit personalities from the closest outwards
+    instead of scoring every item.
+
+    Once the catalogue is complete, `freeze` makes the registry read-only.
+    """
+    _TOKENS = re.compile(r"\(|\)|[^\s()]+")
+
+    def __init__(self) -> None:
+        self._indices: dict[str, int] = {}
+        self._definitions: list[ItemDefinition] | tuple[ItemDefinition, ...] = []
+        self._tags: dict[str, int] = {}
+        self._personalities: dict[tuple, list[int] | tuple[int, ...]] = {}
+        # Number of items whose personality is not on the 0-10 integer grid
+        self._off_grid = 0
+        self._frozen = False
+
+    def __getitem__(self, name: str) -> ItemDefinition:
+        return self._definitions[self._indices[name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._indices)
+
+    def __len__(self) -> int:
+        return len(self._definitions)
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def freeze(self) -> None:
+        """Make the registry read-only, typically once the catalogues are loaded and before forking workers.
+
+        The definitions and personality buckets are turned into tuples. Keeping forked workers
+        from copying the memory pages of the catalogue also needs `gc.freeze`, which affects
+        the whole process and is therefore left to the application, see `homeostasis.__main__`.
+
+        Raises:
+            FrozenRegistryError: On any later attempt to register an item.
+        """
+        if self._frozen:
+            return
+        self._definitions = tuple(self._definitions)
+        self._personalities = {key: tuple(indices) for key, indices in self._personalities.items() if indices}
+        self._frozen = True
+
+    def _check_writable(self) -> None:
+        if self._frozen:
+            raise FrozenRegistryError("Cannot register items in a frozen registry.")
+
+    def register(self, item: ItemDefinition) -> int:
+        """Register an item, replacing any item with the same name.
+
+        Returns:
+            int: The index of the item.
+        """
+        self._check_writable()
+        index = self._indices.get(item.name)
+        if index is None:
+            index = len(self._definitions)
+            self._indices[item.name] = index
+            self._definitions.append(item)
+        else:
+            self._unindex(index)
+            self._definitions[index] = item
+
+        bit = 1 << index
+        for tag in item.tags:
+            self._tags[tag] = self._tags.get(tag, 0) | bit
+        key = self._personality_key(item.personality)
+        self._personalities.setdefault(key, []).append(index)
+        self._off_grid += not self._on_grid(key)
+        return index
+
+    def register_many(self, items: Iterable[ItemDefinition]) -> int:
+        """Register several items, exactly as calling `register` for each of them.
+
+        The tag bitsets are built once for the whole batch instead of being grown item by item.
+
+        Returns:
+            int: The number of items registered.
+        """
+        self._check_writable()
+        registered: dict[int, None] = {}
+        count = 0
+        try:
+            for item in items:
+                count += 1
+                index = self._indices.get(item.name)
+                if index is None:
+                    index = len(self._definitions)
+                    self._indices[item.name] = index
+                    self._definitions.append(item)
+                else:
+                    if index not in registered:
+                        self._unindex(index)
+                    self._definitions[index] = item
+                registered[index] = None
+        finally:
+            # Index the items registered so far, even if `items` raised
+            self._index_many(registered)
+        return count
+
+    def _index_many(self, indices: Iterable[int]) -> None:
+        """Add items to the tag and personality indexes."""
+        tagged: dict[str, bytearray] = {}
+        size = (len(self._definitions) + 7) // 8
+        for index in indices:
+            item = self._definitions[index]
+            for tag in item.tags:
+                bits = tagged.get(tag)
+                if bits is None:
+                    bits = tagged[tag] = bytearray(size)
+                bits[index >> 3] |= 1 << (index & 7)
+            key = self._personality_key(item.personality)
+            self._personalities.setdefault(key, []).append(index)
+            self._off_grid += not self._on_grid(key)
+        for tag, bits in tagged.items():
+            self._tags[tag] = self._tags.get(tag, 0) | int.from_bytes(bits, "little")
+
+    def _unindex(self, index: int) -> None:
+        """Remove an item from the tag and personality indexes."""
+        item = self._definitions[index]
+        for tag in item.tags:
+            self._tags[tag] &= ~(1 << index)
+        key = self._personality_key(item.personality)
+        self._personalities[key].remove(index)
+        self._off_grid -= not self._on_grid(key)
+
+    @staticmethod
+    def _personality_key(personality: Traits) -> tuple:
+        return personality.friendliness, personality.playfulness, personality.laziness, personality.curiosity
+
+    @staticmethod
+    def _on_grid(key: tuple) -> bool:
+        return all(isinstance(value, int) and 0 <= value <= 10 for value in key)
+
+    def index(self, name: str) -> int:
+        """Get the index of a registered item."""
+        return self._indices[name]
+
+    def definition(self, index: int) -> ItemDefinition:
+        """Get the item registered at an index."""
+        return self._definitions[index]
+
+    @property
+    def all_bits(self) -> int:
+        """Bitset of every registered item."""
+        return (1 << len(self._definitions)) - 1
+
+    def tag_bits(self, tag: str) -> int:
+        """Bitset of the items carrying a tag."""
+        return self._tags.get(tag, 0)
+
+    def select(self, bits: int) -> list[ItemDefinition]:
+        """Get the items of a bitset, in index order."""
+        definitions = self._definitions
+        return [definitions[index] for index in _bit_indices(bits)]
+
+    def with_tags(self, *tags: str) -> list[ItemDefinition]:
+        """Get the items carrying every one of the tags."""
+        bits = self.all_bits
+        for tag in tags:
+            bits &= self.tag_bits(tag)
+        return self.select(bits)
+
+    def query_bits(self, query: str) -> int:
+        """Evaluate a tag query to a bitset.
+
+        Queries combine tags with `AND`, `OR`, `NOT` and parentheses, e.g.
+        "playable AND quiet AND NOT rest". `NOT` binds tighter than `AND`, which binds tighter than `OR`.
+        """
+        tokens = self._TOKENS.findall(query)
+        bits, position = self._parse_or(tokens, 0)
+        if position != len(tokens):
+            raise ItemQueryError(f"Unexpected '{tokens[position]}' in query '{query}'.")
+        return bits
+
+    def query(self, query: str) -> list[ItemDefinition]:
+        """Get the items matching a tag query, see `query_bits`."""
+        return self.select(self.query_bits(query))
+
+    def _parse_or(self, tokens: list[str], position: int) -> tuple[int, int]:
+        bits, position = self._parse_and(tokens, position)
+        while position < len(tokens) and tokens[position] == "OR":
+            other, position = self._parse_and(tokens, position + 1)
+            bits |= other
+        return bits, position
+
+    def _parse_and(self, tokens: list[str], position: int) -> tuple[int, int]:
+        bits, position = self._parse_not(tokens, position)
+        while position < len(tokens) and tokens[position] == "AND":
+            other, position = self._parse_not(tokens, position + 1)
+            bits &= other
+        return bits, position
+
+    def _parse_not(self, tokens: list[str], position: int) -> tuple[int, int]:
+        if position >= len(tokens):
+            raise ItemQueryError("Unexpected end of query.")
+        token = tokens[position]
+        if token == "NOT":
+            bits, position = self._parse_not(tokens, position + 1)
+            return self.all_bits & ~bits, position
+        if token == "(":
+            bits, position = self._parse_or(tokens, position + 1)
+            if position >= len(tokens) or tokens[position] != ")":
+                raise ItemQueryError("Missing ')' in query.")
+            return bits, position + 1
+        if token in ("AND", "OR", ")"):
+            raise ItemQueryError(f"Unexpected '{token}' in query.")
+        return self.tag_bits(token), position + 1
+
+    def most_compatible(self, personality: Traits, k: int, query: str | None = None) -> list[ItemDefinition]:
+        """Get the `k` items most compatible with a personality.
+
+        Ties are broken by index. Integer personalities within 0-10 are found by walking the
+        personality buckets outwards from `personality`, unless the query leaves so few
+        candidates that scoring each of them is cheaper; other personalities always fall
+        back to scoring every candidate.
+
+        Args:
+            personality (Traits): The personality of the pet.
+            k (int): The number of items to return.
+            query (str | None): Only consider the items matching this tag query.
+        """
+        bits = self.all_bits if query is None else self.query_bits(query)
+        center = self._personality_key(personality)
+        count = bits.bit_count()
+        # Walking the shells visits about k / count of the grid before finding `k` candidates
+        # spread over it, while a scan scores every candidate
+        if self._off_grid or not self._on_grid(center) or count * count <= k * _GRID_POINTS * _SCAN_RATIO:
+            return heapq.nsmallest(
+                k, self.select(bits), key=lambda item: -Traits.get_compatibility(item.personality, personality),
+            )
+
+        found: list[int] = []
+        for radius in range(4 * 10 + 1):
+            if len(found) >= k:
+                break
+            shell = []
+            for key in trait_shell(center, radius):
+                shell.extend(index for index in self._personalities.get(key, ()) if bits >> index & 1)
+            found.extend(sorted(shell))
+        return [self._definitions[index] for index in found[:k]]
+
+ITEMS = ItemRegistry()
 def register_item(item: ItemDefinition):
     """Registers an item in the global items list."""
-    ITEMS[item.name] = item
\ No newline at end of file
+    replaced = ITEMS.get(item.name)
+    ITEMS.register(item)
+    if replaced is not None:
+        EFFECT_CACHE.discard((replaced,))
@@ -0,0 +1,304 @@
+"""Item catalogues loaded from JSON-lines or CSV data files.
+
+A JSON-lines catalogue holds one item per line:
+
+    {"name": "Squeaky Ball", "description": "...", "max_durability": 5,
+     "personality": {"friendliness": 8, "playfulness": 10, "laziness": 3, "curiosity": 7},
+     "effects": {"happiness": 5, "social": 10, "energy": -15},
+     "effect_weights": {"social": 0.5}, "tags": ["playable"]}
+
+A CSV catalogue has a header row with the columns `name`, `description`, `max_durability`,
+one column per trait, one column per motive for the effects, optional `weight_<motive>`
+columns for the effect weights, and a `tags` column separated by `;`. Empty effect and
+weight cells take their default.
+
+Parsed catalogues are compiled to a cache next to the source file, keyed by the SHA-256
+of the source, so later loads skip parsing and validation while the source is unchanged.
+The cache is plain JSON data, never code, and gets the permissions of the source; a cache
+that cannot be decoded is ignored and rewritten.
+"""
+import csv
+import hashlib
+import json
+import os
+import stat
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from dataclasses import fields
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+from homeostasis.common import Motives, MotivesModifier, Traits
+from homeostasis.items.base import EFFECT_CACHE, ITEMS, ItemDefinition, ItemRegistry
+
+# Version of the compiled cache layout, part of its validity check
+CACHE_FORMAT = 2
+TAG_SEPARATOR = ";"
+
+_TRAITS = tuple(field.name for field in fields(Traits))
+_MOTIVES = tuple(field.name for field in fields(Motives))
+_WEIGHTS = tuple(field.name for field in fields(MotivesModifier))
+_KEYS = {"name", "description", "max_durability", "personality", "effects", "effect_weights", "tags"}
+
+
+class CatalogueError(Exception):
+    """The catalogue file is malformed or holds an invalid item."""
+    pass
+
+
+class TagInterner:
+    """Shares one string per tag and one frozenset per distinct set of tags across items."""
+    def __init__(self) -> None:
+        self._sets: dict[frozenset[str], frozenset[str]] = {}
+
+    def __call__(self, tags: Iterable[str]) -> frozenset[str]:
+        interned = frozenset(sys.intern(tag) for tag in tags)
+        return self._sets.setdefault(interned, interned)
+
+
+def _number(value: Any, field: str, low: float | None = None, high: float | None = None) -> int | float:
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            try:
+                value = float(value)
+            except ValueError:
+                raise CatalogueError(f"'{field}' must be a number, not '{value}'.") from None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise CatalogueError(f"'{field}' must be a number, not {value!r}.")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise CatalogueError(f"'{field}' must be between {low} and {high}, not {value}.")
+    return value
+
+
+def _fields(values: Any, names: tuple[str, ...], field: str, low: float | None = None,
+            high: float | None = None, required: bool = False) -> dict[str, int | float]:
+    if not isinstance(values, dict):
+        raise CatalogueError(f"'{field}' must be an object.")
+    unknown = values.keys() - set(names)
+    if unknown:
+        raise CatalogueError(f"Unknown '{field}' fields: {', '.join(sorted(unknown))}.")
+    if required and len(values) != len(names):
+        raise CatalogueError(f"'{field}' must have the fields {', '.join(names)}.")
+    return {name: _number(value, f"{field}.{name}", low, high) for name, value in values.items()}
+
+
+def parse_item(record: dict[str, Any], intern_tags: TagInterner) -> ItemDefinition:
+    """Validate a catalogue record and build its item definition.
+
+    Raises:
+        CatalogueError: If the record is invalid.
+    """
+    unknown = record.keys() - _KEYS
+    if unknown:
+        raise CatalogueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    name = record.get("name")
+    if not isinstance(name, str) or not name:
+        raise CatalogueError("'name' must be a non-empty string.")
+    description = record.get("description", "")
+    if not isinstance(description, str):
+        raise CatalogueError("'description' must be a string.")
+    max_durability = _number(record.get("max_durability"), "max_durability", 1)
+    if not isinstance(max_durability, int):
+        raise CatalogueError("'max_durability' must be an integer.")
+    tags = record.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) and tag for tag in tags):
+        raise CatalogueError("'tags' must be a list of non-empty strings.")
+
+    return ItemDefinition(
+        name=name,
+        description=description,
+        max_durability=max_durability,
+        personality=Traits(**_fields(record.get("personality"), _TRAITS, "personality", 0, 10, required=True)),
+        effects=Motives(**_fields(record.get("effects", {}), _MOTIVES, "effects")),
+        effect_weights=MotivesModifier(**_fields(record.get("effect_weights", {}), _WEIGHTS, "effect_weights")),
+        tags=intern_tags(tags),
+    )
+
+
+def _csv_record(row: dict[str, str]) -> dict[str, Any]:
+    """Nest the flat columns of a CSV row into the JSON-lines record layout."""
+    if None in row:
+        raise CatalogueError("The row has more cells than the header.")
+    row = dict(row)
+    record: dict[str, Any] = {
+        "personality": {trait: row.pop(trait) for trait in _TRAITS if trait in row},
+        "effects": {motive: value for motive in _MOTIVES if (value := row.pop(motive, ""))},
+        "effect_weights": {
+            weight: value for weight in _WEIGHTS if (value := row.pop(f"weight_{weight}", ""))
+        },
+        "tags": [tag.strip() for tag in row.pop("tags", "").split(TAG_SEPARATOR) if tag.strip()],
+    }
+    record.update(row)
+    return record
+
+
+def iter_catalogue(path: str | PathLike) -> Iterator[ItemDefinition]:
+    """Stream the item definitions of a `.jsonl` or `.csv` catalogue, validating every item.
+
+    Raises:
+        CatalogueError: If the file is malformed or an item is invalid, with its line number.
+    """
+    path = Path(path)
+    intern_tags = TagInterner()
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.suffix == ".csv":
+            reader = csv.DictReader(file)
+            records = ((reader.line_num, row) for row in reader)
+        elif path.suffix in (".jsonl", ".ndjson"):
+            records = ((number, line) for number, line in enumerate(file, 1) if line.strip())
+        else:
+            raise CatalogueError(f"Unsupported catalogue format '{path.suffix}'.")
+
+        for number, record in records:
+            try:
+                if isinstance(record, str):
+                    try:
+                        record = json.loads(record)
+                    except json.JSONDecodeError as error:
+                        raise CatalogueError(f"Invalid JSON: {error.msg}.") from None
+                    if not isinstance(record, dict):
+                        raise CatalogueError("Each line must hold an object.")
+                else:
+                    record = _csv_record(record)
+                yield parse_item(record, intern_tags)
+            except CatalogueError as error:
+                raise CatalogueError(f"{path}:{number}: {error}") from None
+
+
+def source_hash(path: str | PathLike) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_cache_path(path: str | PathLike) -> Path:
+    path = Path(path)
+    return path.with_name(f".{path.name}.cache")
+
+
+def _compile(items: list[ItemDefinition]) -> dict[str, Any]:
+    """Flatten item definitions into rows of plain values, which decode much faster than records validate."""
+    tag_sets: dict[frozenset[str], int] = {}
+    rows = [
+        (
+            item.name,
+            item.description,
+            item.max_durability,
+            tuple(getattr(item.personality, trait) for trait in _TRAITS),
+            tuple(getattr(item.effects, motive) for motive in _MOTIVES),
+            tuple(getattr(item.effect_weights, weight) for weight in _WEIGHTS),
+            tag_sets.setdefault(item.tags, len(tag_sets)),
+        )
+        for item in items
+    ]
+    return {"tag_sets": [sorted(tags) for tags in tag_sets], "rows": rows}
+
+
+def _decompile(compiled: dict[str, Any]) -> list[ItemDefinition]:
+    intern_tags = TagInterner()
+    tag_sets = [intern_tags(tags) for tags in compiled["tag_sets"]]
+    return [
+        ItemDefinition(
+            name, description, max_durability, Traits(*personality), Motives(*effects),
+            MotivesModifier(*weights), tag_sets[tags],
+        )
+        for name, description, max_durability, personality, effects, weights, tags in compiled["rows"]
+    ]
+
+
+def _read_cache(cache_path: Path, digest: str) -> list[ItemDefinition] | None:
+    """Read the cache, or get None if it is missing, stale or cannot be decoded."""
+    try:
+        with open(cache_path, "rb") as file:
+            cached = json.loads(file.read())
+        if not isinstance(cached, dict) or cached.get("format") != CACHE_FORMAT or cached.get("sha256") != digest:
+            return None
+        return _decompile(cached["items"])
+    except (OSError, ValueError, TypeError, KeyError, IndexError):
+        # Includes malformed JSON and text, and rows of the wrong shape
+        return None
+
+
+def _write_cache(cache_path: Path, digest: str, items: list[ItemDefinition], source: Path) -> None:
+    """Write the cache atomically, with the permissions of the source. A cache that cannot be written is skipped."""
+    compiled = {"format": CACHE_FORMAT, "sha256": digest, "items": _compile(items)}
+    temporary = None
+    try:
+        descriptor, temporary = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(compiled, file, separators=(",", ":"))
+        os.chmod(temporary, stat.S_IMODE(os.stat(source).st_mode))
+        os.replace(temporary, cache_path)
+    except OSError:
+        if temporary is not None:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+
+def compile_catalogue(path: str | PathLike, cache_path: str | PathLike | None = None) -> list[ItemDefinition]:
+    """Get the item definitions of a catalogue, from its compiled cache when it is up to date.
+
+    Args:
+        path (str | PathLike): The `.jsonl` or `.csv` catalogue.
+        cache_path (str | PathLike | None): The compiled cache. Defaults to a hidden file
+            next to the catalogue.
+
+    Raises:
+        CatalogueError: If the catalogue is parsed and is invalid.
+    """
+    cache_path = Path(cache_path) if cache_path is not None else default_cache_path(path)
+    digest = source_hash(path)
+    items = _read_cache(cache_path, digest)
+    if items is None:
+        items = list(iter_catalogue(path))
+        _write_cache(cache_path, digest, items, Path(path))
+    return items
+
+
+def load_catalogue(path: str | PathLike, registry: ItemRegistry = ITEMS,
+                   cache_path: str | PathLike | None = None, use_cache: bool = True) -> int:
+    """Register every item of a catalogue, replacing items with the same name.
+
+    Args:
+        path (str | PathLike): The `.jsonl` or `.csv` catalogue.
+        registry (ItemRegistry): The registry to fill.
+        cache_path (str | PathLike | None): The compiled cache, see `compile_catalogue`.
+        use_cache (bool): Whether to read and write the compiled cache. Without it, items
+            are registered as they are streamed from the file.
+
+    Returns:
+        int: The number of items registered.
+
+    Raises:
+        CatalogueError: If the catalogue is invalid. Without the cache, the items streamed
+            before the invalid one stay registered.
+    """
+    items = compile_catalogue(path, cache_path) if use_cache else iter_catalogue(path)
+    replaced = []
+
+    def track_replaced(items: Iterable[ItemDefinition]) -> Iterator[ItemDefinition]:
+        for item in items:
+            previous = registry.get(item.name)
+            if previous is not None:
+                replaced.append(previous)
+            yield item
+
+    try:
+        return registry.register_many(track_replaced(items))
+    finally:
+        EFFECT_CACHE.discard(replaced)
+
+
+__all__ = [
+    "CatalogueError", "TagInterner", "parse_item", "iter_catalogue", "compile_catalogue", "load_catalogue",
+    "source_hash",
+]
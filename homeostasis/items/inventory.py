@@ -0,0 +1,198 @@
+"""Per-pet inventories stored as counts and durability arrays instead of item instances.
+
+An `Inventory` holds the items of many pets, addressed by index like the pets of a
+`PetPopulation`. Untouched instances of a definition are only counted: one int32 column per
+definition holds every pet's stack. Once an instance has been used, its remaining
+durability lives in a second column of the same definition, the opened instance of each
+pet, which is used up before another instance is taken from the stack. Definitions with a
+durability of 1 are used up at once and never have an opened instance.
+
+Columns are keyed by the identity of the definition, as in an `ItemTable`, so variants
+of an item sharing its name are held apart.
+
+A pantry of 50 food items therefore costs each pet a few bytes per kind of food, instead
+of 50 `ItemInstance` objects. Granting and consuming items work on arrays of pets at once.
+The columns are dense: every definition ever granted costs 4 bytes per pet, or 8 if its
+durability is above 1, for every pet of the inventory whether it holds the item or not.
+A million pets and a catalogue of 200 items take up to 1.6 GB; `nbytes` reports the
+current cost. Worlds with large catalogues of rarely held items should split their pets
+over several inventories, or keep such items as free-standing instances.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from homeostasis.items.base import ItemDefinition, ItemInstance
+
+
+class InventoryItem(ItemInstance):
+    """The opened instance of an item in a pet's inventory, usable by actions as an `ItemInstance`.
+
+    The durability is read from and written to the inventory, so uses made by an action
+    are kept when the action ends, and the next action continues the same instance.
+    """
+    __slots__ = ("_inventory", "_pet")
+
+    def __init__(self, definition: ItemDefinition, inventory: Inventory, pet: int) -> None:
+        self.definition = definition
+        self._inventory = inventory
+        self._pet = pet
+
+    @property
+    def durability(self) -> int:
+        return int(self._inventory._opened[id(self.definition)][self._pet])
+
+    @durability.setter
+    def durability(self, durability: int) -> None:
+        self._inventory._opened[id(self.definition)][self._pet] = max(durability, 0)
+
+
+class Inventory:
+    """Items held by the pets of a population, see the module documentation.
+
+    Arrays of pet indices given to the bulk operations must not hold duplicates, except
+    for `grant`.
+    """
+    def __init__(self, pets: int = 0) -> None:
+        self._size = pets
+        self._capacity = pets
+        # Definition id -> definition, which keeps the id from being reused while the columns exist
+        self._definitions: dict[int, ItemDefinition] = {}
+        # Definition id -> untouched instances held by every pet
+        self._stacks: dict[int, np.ndarray] = {}
+        # Definition id -> durability left of every pet's opened instance, 0 for none
+        self._opened: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stack and durability columns."""
+        return sum(column.nbytes for column in (*self._stacks.values(), *self._opened.values()))
+
+    def add_pets(self, count: int) -> range:
+        """Add pets with empty inventories.
+
+        Returns:
+            range: The indices of the new pets.
+        """
+        start = self._size
+        self._size += count
+        if self._size > self._capacity:
+            self._capacity = max(self._size, 2 * self._capacity)
+            for columns in (self._stacks, self._opened):
+                for key, column in columns.items():
+                    grown = np.zeros(self._capacity, dtype=column.dtype)
+                    grown[:start] = column[:start]
+                    columns[key] = grown
+        return range(start, self._size)
+
+    def _columns(self, definition: ItemDefinition) -> tuple[np.ndarray, np.ndarray | None]:
+        """Get the stack and opened columns of a definition, creating them if needed."""
+        key = id(definition)
+        stack = self._stacks.get(key)
+        if stack is None:
+            self._definitions[key] = definition
+            stack = self._stacks[key] = np.zeros(self._capacity, dtype=np.int32)
+            if definition.max_durability > 1:
+                self._opened[key] = np.zeros(self._capacity, dtype=np.int32)
+        return stack, self._opened.get(key)
+
+    def grant(self, pets: int | Iterable[int] | np.ndarray, definition: ItemDefinition,
+              count: int | np.ndarray = 1) -> None:
+        """Give untouched instances of an item to one or many pets.
+
+        Args:
+            pets (int | Iterable[int] | np.ndarray): The pets, possibly repeated.
+            definition (ItemDefinition): The item.
+            count (int | np.ndarray): The number of instances, for all pets or per pet.
+        """
+        stack, _ = self._columns(definition)
+        pets = np.asarray(pets, dtype=np.intp)
+        self._check(pets)
+        np.add.at(stack, pets, count)
+
+    def _check(self, pets: np.ndarray) -> None:
+        if pets.size and (pets.min() < 0 or pets.max() >= self._size):
+            raise IndexError(f"Pet index out of range for an inventory of {self._size} pets.")
+
+    def count(self, pet: int, definition: ItemDefinition) -> int:
+        """Get the number of instances of an item held by a pet, opened or not, in O(1)."""
+        self._check(np.asarray(pet))
+        stack = self._stacks.get(id(definition))
+        return 0 if stack is None else self._count(id(definition), stack, pet)
+
+    def _count(self, key: int, stack: np.ndarray, pet: int) -> int:
+        opened = self._opened.get(key)
+        return int(stack[pet]) + (opened is not None and int(opened[pet]) > 0)
+
+    def counts(self, definition: ItemDefinition) -> np.ndarray:
+        """Get the number of instances of an item held by every pet, opened or not."""
+        stack = self._stacks.get(id(definition))
+        if stack is None:
+            return np.zeros(self._size, dtype=np.int32)
+        opened = self._opened.get(id(definition))
+        if opened is None:
+            return stack[:self._size].copy()
+        return stack[:self._size] + (opened[:self._size] > 0)
+
+    def items(self, pet: int) -> dict[str, int]:
+        """Get the number of instances of every item held by a pet, by item name, reading only the pet's row.
+
+        The instances of definitions sharing a name are counted together.
+        """
+        self._check(np.asarray(pet))
+        counts: dict[str, int] = {}
+        for key, stack in self._stacks.items():
+            count = self._count(key, stack, pet)
+            if count:
+                name = self._definitions[key].name
+                counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def take(self, pet: int, definition: ItemDefinition) -> ItemInstance | None:
+        """Get the opened instance of an item for an action, opening one from the stack if needed.
+
+        Instances with a durability of 1 have no opened instance: taking one removes it from
+        the stack and returns a free-standing `ItemInstance`.
+
+        Returns:
+            ItemInstance | None: The instance, or None if the pet holds none.
+        """
+        self._check(np.asarray(pet))
+        stack, opened = self._columns(definition)
+        if opened is not None and opened[pet] > 0:
+            return InventoryItem(definition, self, pet)
+        if stack[pet] <= 0:
+            return None
+        stack[pet] -= 1
+        if opened is None:
+            return definition.spawn()
+        opened[pet] = definition.max_durability
+        return InventoryItem(definition, self, pet)
+
+    def consume(self, pets: np.ndarray, definition: ItemDefinition) -> np.ndarray:
+        """Use one durability of an item for each of many pets, as `take` then `use(1)` would.
+
+        Returns:
+            np.ndarray: Boolean mask of the pets that held the item, and used it.
+        """
+        pets = np.asarray(pets, dtype=np.intp)
+        self._check(pets)
+        stack, opened = self._columns(definition)
+        held = stack[pets] > 0
+        if opened is not None:
+            has_opened = opened[pets] > 0
+            opened[pets[has_opened]] -= 1
+            from_stack = pets[~has_opened & held]
+            stack[from_stack] -= 1
+            opened[from_stack] = definition.max_durability - 1
+            return has_opened | held
+        stack[pets[held]] -= 1
+        return held
+
+
+__all__ = ["Inventory", "InventoryItem"]
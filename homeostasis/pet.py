@@ -1,15 +1,26 @@
+import heapq
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from itertools import count
 
 from homeostasis.common import Traits, Motives
+from homeostasis.simulation.action import Action, ActionInterruptException, Priority
+from homeostasis.simulation.changes import Change, action_item
+from homeostasis.types import Ticks
 
+# Orders queued actions of the same priority: preempted actions first, then first in first out
+_queue_order = count()
+# The `Change` flags as plain ints, which are cheaper to combine on every tick
+_MOTIVES, _ACTION, _ITEM = int(Change.MOTIVES), int(Change.ACTION), int(Change.ITEM)
 
-@dataclass
+
+@dataclass(slots=True)
 class PetSpec:
     name: str
     age: int
     style: str
 
-@dataclass
+@dataclass(slots=True)
 class PetDecayRates:
     """Rates at which the pet's motives decay over time."""
     happiness_decay: int = 1
@@ -22,28 +33,296 @@ class BusyPetException(Exception):
     pass
 
 class Pet:
-    def __init__(self, info: PetSpec, personality: Traits, motives: Motives) -> None:
+    """A pet whose motives change through its actions and decay every tick.
+
+    An eager pet (the default) only changes when `tick` or `advance` is called. A lazy pet
+    is given a `clock` returning the current tick of the world: it stores its motives as of
+    the last tick it was brought up to date, and catches up with the clock when its motives
+    are read or it is acted upon. A lazy pet therefore costs nothing while nobody looks at it,
+    and does not need to be ticked at all, whether idle or busy. An action interrupted while
+    a lazy pet catches up is cancelled, as `advance(cancel_interrupted=True)` does.
+
+    Actions can be queued with a priority instead of set directly. When the current action
+    completes, the queued action with the highest priority starts; an action queued with a
+    higher priority than the current one preempts it, and the preempted action resumes
+    later with the ticks and item durability it had left.
+
+    A watched pet reports what changed about it to a callback, see `ChangeTracker`.
+    """
+    # Weak references let a `Scheduler` forget the pets nobody else refers to
+    __slots__ = (
+        "info", "personality", "current_action", "_motives", "_decay", "_decay_effect", "_clock", "_as_of",
+        "_priority", "_queue", "_on_change", "__weakref__",
+    )
+
+    def __init__(self, info: PetSpec, personality: Traits, motives: Motives,
+                 decay: PetDecayRates | None = None, clock: Callable[[], Ticks] | None = None) -> None:
         self.info: PetSpec = info
-        self.motives: Motives = motives
         self.personality: Traits = personality
         self.current_action = None
+        self._motives: Motives = motives
+        self.decay = decay if decay is not None else PetDecayRates()
+        self._clock = clock
+        self._as_of: Ticks = clock() if clock is not None else 0
+        self._priority = Priority.NORMAL
+        # Heap of (-priority, order, action, preempted), created on first use
+        self._queue: list[tuple[int, int, Action, bool]] | None = None
+        self._on_change: Callable[[int], None] | None = None
+
+    @property
+    def motives(self) -> Motives:
+        if self._clock is not None:
+            self.catch_up()
+        return self._motives
+
+    @motives.setter
+    def motives(self, motives: Motives) -> None:
+        self._motives = motives
+        if self._clock is not None:
+            self._as_of = max(self._as_of, self._clock())
+        self.mark_changed(_MOTIVES)
+
+    @property
+    def decay(self) -> PetDecayRates:
+        return self._decay
+
+    @decay.setter
+    def decay(self, decay: PetDecayRates) -> None:
+        self._decay = decay
+        self._decay_effect = Motives(
+            happiness=-decay.happiness_decay,
+            energy=-decay.energy_decay,
+            social=-decay.social_decay,
+            hunger=-decay.hunger_decay,
+        )
+
+    @property
+    def decay_effect(self) -> Motives:
+        """The Stats added to the pet's motives at the end of every tick."""
+        return self._decay_effect
+
+    @property
+    def is_lazy(self) -> bool:
+        return self._clock is not None
 
     @property
     def is_busy(self) -> bool:
+        if self._clock is not None:
+            self.catch_up()
         return self.current_action is not None
 
+    @property
+    def current_priority(self) -> Priority:
+        """The priority of the current action. Actions set with `set_action` have normal priority."""
+        return self._priority
+
+    @property
+    def queued_count(self) -> int:
+        """The number of queued actions."""
+        return len(self._queue) if self._queue else 0
+
+    @property
+    def queued_actions(self) -> list[tuple[Priority, Action]]:
+        """The queued actions with their priority, in the order they will start."""
+        return [(Priority(-priority), action) for priority, _, action, _ in sorted(self._queue or ())]
+
+    @property
+    def queued_entries(self) -> list[tuple[Priority, Action, bool]]:
+        """The queued actions with their priority and whether they were preempted, in the order they will start."""
+        return [
+            (Priority(-priority), action, preempted) for priority, _, action, preempted in sorted(self._queue or ())
+        ]
+
+    @property
+    def is_watched(self) -> bool:
+        return self._on_change is not None
+
+    def watch(self, callback: Callable[[int], None] | None) -> None:
+        """Report the `Change` flags of every change of the pet to `callback`, or stop reporting with None."""
+        self._on_change = callback
+
+    def mark_changed(self, flags: int) -> None:
+        """Report changes made to the pet directly, such as assigning a field of its motives.
+
+        Args:
+            flags (int): The `Change` flags of what changed.
+        """
+        if self._on_change is not None:
+            self._on_change(flags)
+
     def set_action(self, action) -> None:
         """Set the current action for the pet."""
         if self.is_busy:
             raise BusyPetException
         self.current_action = action
+        self._priority = Priority.NORMAL
+        self.mark_changed(_ACTION)
+
+    def queue_action(self, action: Action, priority: Priority = Priority.NORMAL) -> bool:
+        """Start an action, preempt the current one with it, or queue it, in O(log n).
+
+        Args:
+            action (Action): The action to perform.
+            priority (Priority): The action starts right away if the pet is idle or the
+                current action has a lower priority; otherwise it waits behind every queued
+                action of the same or higher priority.
+
+        Returns:
+            bool: Whether the action started right away.
+        """
+        if self.is_busy:
+            if priority <= self._priority:
+                self._push(action, priority, preempted=False)
+                self.mark_changed(_ACTION)
+                return False
+            preempted = self.current_action
+            preempted.on_interrupt(self)
+            self._push(preempted, self._priority, preempted=True)
+        self.current_action = action
+        self._priority = priority
+        self.mark_changed(_ACTION)
+        return True
+
+    def _push(self, action: Action, priority: Priority, preempted: bool) -> None:
+        if self._queue is None:
+            self._queue = []
+        order = next(_queue_order)
+        heapq.heappush(self._queue, (-priority, -order if preempted else order, action, preempted))
+
+    def restore_queue(self, entries: Iterable[tuple[Priority, Action, bool]]) -> None:
+        """Replace the queue with entries listed by `queued_entries`, for instance decoded from a snapshot.
+
+        The entries start in the order given, and actions queued or preempted later are
+        ordered around them as they would have been around the original ones.
+        """
+        had_queue = bool(self._queue)
+        # Fresh orders in start order sort after any action preempted later, and before any action queued later
+        queue = [(-priority, next(_queue_order), action, preempted) for priority, action, preempted in entries]
+        heapq.heapify(queue)
+        self._queue = queue or None
+        if queue or had_queue:
+            self.mark_changed(_ACTION)
+
+    def clear_queue(self) -> list[Action]:
+        """Drop every queued action.
+
+        Returns:
+            list[Action]: The dropped actions, in the order they would have started.
+        """
+        dropped = [action for _, action in self.queued_actions]
+        self._queue = None
+        if dropped:
+            self.mark_changed(_ACTION)
+        return dropped
+
+    def cancel_action(self) -> Action | None:
+        """Drop the current action, for instance after it was interrupted, and start the next queued one.
+
+        Returns:
+            Action | None: The dropped action.
+        """
+        action = self.current_action
+        if action is not None:
+            self._next_action()
+            self.mark_changed(_ACTION)
+        return action
+
+    def _next_action(self) -> None:
+        """Replace the completed current action with the next queued one, if any."""
+        if not self._queue:
+            self.current_action = None
+            self._priority = Priority.NORMAL
+            return
+        priority, _, action, preempted = heapq.heappop(self._queue)
+        self.current_action = action
+        self._priority = Priority(-priority)
+        if preempted:
+            action.on_resume(self)
+
+    def catch_up(self) -> None:
+        """Bring a lazy pet up to the current tick of its clock. Does nothing for an eager pet."""
+        if self._clock is not None:
+            now = self._clock()
+            if now > self._as_of:
+                elapsed = now - self._as_of
+                # Move the pet's time first so that reads made while catching up do not recurse
+                self._as_of = now
+                # Interrupted actions are cancelled as a world ticking eager pets does, so that
+                # reading a lazy pet never raises and never loses the elapsed ticks
+                self._run(self._advance, elapsed, True)
 
     def tick(self) -> None:
-        """Advance the pet's current action by one tick."""
+        """Advance the pet's current action by one tick, then decay its motives."""
+        self.catch_up()
+        self._as_of += 1
+        self._run(self._tick)
+
+    def _run(self, step: Callable[..., None], *args) -> None:
+        """Run a step of the simulation, reporting what it changed if the pet is watched."""
+        if self._on_change is None:
+            step(*args)
+            return
+        motives, action, queue = self._motives, self.current_action, self._queue
+        before = (motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun)
+        queued = len(queue) if queue else 0
+        item = None if action is None else action_item(action)
+        durability = None if item is None else item.durability
+        try:
+            step(*args)
+        finally:
+            flags = 0
+            if before != (motives.happiness, motives.health, motives.hunger, motives.energy, motives.social,
+                          motives.fun):
+                flags = _MOTIVES
+            queue = self._queue
+            if self.current_action is not action or (len(queue) if queue else 0) != queued:
+                flags |= _ACTION
+            if item is not None and item.durability != durability:
+                flags |= _ITEM
+            if flags:
+                self._on_change(flags)
+
+    def _tick(self) -> None:
         if self.current_action is not None:
             self.current_action.tick(self)
             if self.current_action.is_complete():
-                self.current_action = None
+                self._next_action()
+        self._motives.add_stats(self._decay_effect)
+
+    def advance(self, ticks: int, cancel_interrupted: bool = False) -> None:
+        """Advance the pet by several ticks at once, exactly as calling `tick` that many times.
+
+        Args:
+            ticks (int): The number of ticks.
+            cancel_interrupted (bool): Cancel interrupted actions and keep going, as if every
+                `tick` raising `ActionInterruptException` were followed by `cancel_action`,
+                instead of letting the exception through.
+        """
+        self.catch_up()
+        if ticks > 0:
+            self._as_of += ticks
+            self._run(self._advance, ticks, cancel_interrupted)
+
+    def _advance(self, ticks: int, cancel_interrupted: bool = False) -> None:
+        while ticks > 0 and self.current_action is not None:
+            action = self.current_action
+            advanced = 0 if action.is_complete() else action.advance(self, ticks, self._decay_effect)
+            ticks -= advanced
+            if advanced and action.is_complete():
+                self._next_action()
+            elif ticks > 0:
+                # The action has no closed form for its next tick, or was complete before it
+                # started, which `tick` spends a tick on
+                ticks -= 1
+                try:
+                    self._tick()
+                except ActionInterruptException:
+                    if not cancel_interrupted:
+                        raise
+                    self.cancel_action()
+
+        if ticks > 0:
+            self._motives.add_stats_repeatedly((self._decay_effect,), ticks)
 
 
 __all__ = ["Pet", "PetSpec", "PetDecayRates", "BusyPetException"]
\ No newline at end of file
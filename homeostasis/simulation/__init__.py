@@ -0,0 +1,56 @@
+"""Actions, clocks and the engines running a world of pets.
+
+Names are imported from their submodule on first access (PEP 562), so that a tool using
+the scheduler does not pay for NumPy, asyncio or multiprocessing imports it never uses.
+"""
+from importlib import import_module
+
+# Public name -> submodule defining it
+_LAZY = {
+    "Action": "action",
+    "ActionInterruptException": "action",
+    "EatAction": "action",
+    "ItemAction": "action",
+    "PlayAction": "action",
+    "Priority": "action",
+    "SleepAction": "action",
+    "Change": "changes",
+    "ChangeTracker": "changes",
+    "PetChange": "changes",
+    "Event": "clock",
+    "Scheduler": "clock",
+    "UtilityDecider": "decision",
+    "Instrumentation": "instrumentation",
+    "LatencyHistogram": "instrumentation",
+    "ActionKind": "population",
+    "ItemTable": "population",
+    "PetPopulation": "population",
+    "Replay": "replay",
+    "ReplayLog": "replay",
+    "PetRandom": "rng",
+    "WorldServer": "server",
+    "ShardedWorld": "sharding",
+    "MotiveRecorder": "telemetry",
+    "SocialAction": "social",
+    "SweepResult": "sweep",
+    "run_sweep": "sweep",
+    "SocialIndex": "social",
+    "socialize": "social",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    # Later lookups find the name without going through `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY})
+
+
+__all__ = list(_LAZY)
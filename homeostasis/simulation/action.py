@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from collections.abc import Collection
+from enum import IntEnum
 from typing import TYPE_CHECKING
 
-from homeostasis.common import Motives
+from homeostasis.common import Motives, advance_value
 from homeostasis.items.base import ItemInstance
 from homeostasis.types import Ticks
 
@@ -14,6 +15,13 @@ class ActionInterruptException(Exception):
     """The action was interrupted."""
     pass
 
+class Priority(IntEnum):
+    """Priority of a queued action. A higher priority action preempts a lower priority one."""
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    URGENT = 3
+
 class Action:
     def __init__(self, name: str, remaining_ticks: Ticks) -> None:
         self.name = name
@@ -30,6 +38,29 @@ class Action:
         if self.is_complete():
             self.on_complete(pet)
 
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        """Advance the action by up to `ticks` ticks at once.
+
+        The result is exactly the same as calling `tick`, then adding `decay` to the pet's
+        motives, `ticks` times. Subclasses compute it in closed form. Advancing stops early
+        when the action completes, or before a tick that has to be stepped on its own, such
+        as one interrupting the action; `Pet.advance` steps such ticks with `Pet.tick`.
+        This default implementation has no closed form and always stops right away.
+
+        Args:
+            pet (Pet): The pet performing the action.
+            ticks (Ticks): The maximum number of ticks to advance.
+            decay (Motives | None): Stats added to the pet's motives after every tick of the action.
+
+        Returns:
+            Ticks: The number of ticks advanced.
+        """
+        return 0
+
+    def duration(self, pet: Pet) -> Ticks:
+        """Number of ticks until the action completes if nothing else affects the pet."""
+        return max(self.remaining_ticks, 0)
+
     def on_tick(self, pet: Pet) -> None:
         """Hook for performing effects on the pet each tick."""
         raise NotImplementedError()
@@ -38,6 +69,17 @@ class Action:
         """Hook for performing effects on the pet when the action is complete."""
         raise NotImplementedError()
 
+    def on_interrupt(self, pet: Pet) -> None:
+        """Hook called when a higher priority action preempts this one.
+
+        The action keeps its remaining ticks and its item, so it resumes where it stopped.
+        """
+        pass
+
+    def on_resume(self, pet: Pet) -> None:
+        """Hook called when the action becomes current again after being preempted."""
+        pass
+
     def interrupt(self, pet: Pet) -> None:
         """Interrupt the action."""
         raise ActionInterruptException(f"The action '{self.name}' was interrupted.")
@@ -46,17 +88,53 @@ class Action:
         """Check if the action is complete."""
         return self.remaining_ticks <= 0
 
+def _advance_with_item(action: Action, pet: Pet, item: ItemInstance, ticks: Ticks, decay: Motives | None) -> Ticks:
+    """Closed-form `Action.advance` for actions using one durability of an item per tick.
+
+    Stops before the tick that finds the item consumed, which interrupts the action. Uses
+    are reserved at once, so an item shared with other pets is never over-consumed.
+    """
+    usable = item.reserve(min(ticks, action.remaining_ticks))
+    if usable:
+        action.remaining_ticks -= usable
+        effects = item.definition.cached_effect(pet.personality)
+        pet.motives.add_stats_repeatedly((effects,) if decay is None else (effects, decay), usable)
+        if action.is_complete():
+            action.on_complete(pet)
+    return usable
+
 class SleepAction(Action):
     MAX_SLEEP_TICKS = 100
+    ENERGY_PER_TICK = Motives(energy=2)
     def __init__(self) -> None:
         super().__init__("sleep", self.MAX_SLEEP_TICKS)
 
     def on_tick(self, pet: Pet) -> None:
         """Increase energy stat each tick."""
-        pet.motives.add_stats(Motives(energy=2))
+        pet.motives.add_stats(self.ENERGY_PER_TICK)
         if pet.motives.energy >= 100:
             self.remaining_ticks = 0
 
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        """Advance the sleep in closed form, stopping as soon as energy reaches 100."""
+        ticks = min(ticks, self.remaining_ticks)
+        if ticks <= 0:
+            return 0
+
+        effects = (self.ENERGY_PER_TICK,) if decay is None else (self.ENERGY_PER_TICK, decay)
+        applied, rested = pet.motives.add_stats_repeatedly(effects, ticks, stop_stat="energy")
+        self.remaining_ticks = 0 if rested else self.remaining_ticks - applied
+        if self.is_complete():
+            self.on_complete(pet)
+        return applied
+
+    def duration(self, pet: Pet) -> Ticks:
+        """Number of ticks until energy reaches 100 or the maximum sleep time is over."""
+        if self.remaining_ticks <= 0:
+            return 0
+        deltas = (self.ENERGY_PER_TICK.energy, pet.decay_effect.energy)
+        return advance_value(pet.motives.energy, deltas, self.remaining_ticks, until=100)[1]
+
     def on_complete(self, pet: Pet) -> None:
         pass
 
@@ -77,9 +155,12 @@ class ItemAction(Action):
             raise ActionInterruptException(f"{self.item.definition.name} cannot be used as it has been consumed.")
 
         # Increase pet motives
-        effects = self.item.definition.effect(pet.personality)
+        effects = self.item.definition.cached_effect(pet.personality)
         pet.motives.add_stats(effects)
 
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        return _advance_with_item(self, pet, self.item, ticks, decay)
+
     def on_complete(self, pet: Pet) -> None:
         pass
 
@@ -99,9 +180,12 @@ class PlayAction(Action):
         except ValueError:
             raise ActionInterruptException(f"{self.play_item.definition.name} cannot be used as it has been consumed.")
         # Increase pet motives
-        effects = self.play_item.definition.effect(pet.personality)
+        effects = self.play_item.definition.cached_effect(pet.personality)
         pet.motives.add_stats(effects)
 
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        return _advance_with_item(self, pet, self.play_item, ticks, decay)
+
     def on_complete(self, pet: Pet) -> None:
         pass
 
@@ -121,8 +205,11 @@ class EatAction(Action):
         except ValueError:
             raise ActionInterruptException(f"{self.food_item.definition.name} cannot be used as it has been consumed.")
         # Increase pet motives
-        effects = self.food_item.definition.effect(pet.personality)
+        effects = self.food_item.definition.cached_effect(pet.personality)
         pet.motives.add_stats(effects)
 
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        return _advance_with_item(self, pet, self.food_item, ticks, decay)
+
     def on_complete(self, pet: Pet) -> None:
         pass
\ No newline at end of file
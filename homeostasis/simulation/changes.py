@@ -0,0 +1,169 @@
+"""Change feed of the pets of a world, built from dirty bits instead of scans.
+
+A `ChangeTracker` gives every pet it tracks an index and one byte of `Change` flags. A
+tracked pet sets its flags as it changes:
+
+- `MOTIVES` when a tick, an `advance` or a lazy pet catching up changes its motives, or
+  when its motives are replaced;
+- `ACTION` when its current action starts, completes, is preempted or cancelled, or when
+  its queue changes;
+- `ITEM` when the item used by its action loses durability.
+
+The first flag set on a pet also appends its index to the dirty list, so `drain_changes`
+only visits the pets that changed, however many pets are tracked. Changes made to a pet
+behind its back, such as assigning a field of its `Motives` or using its item directly,
+are not seen; `Pet.mark_changed` reports them.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import IntFlag
+from functools import partial
+from typing import TYPE_CHECKING
+
+from homeostasis.items.base import ItemInstance
+from homeostasis.simulation.action import Action, EatAction, ItemAction, PlayAction
+
+if TYPE_CHECKING:
+    from homeostasis.pet import Pet
+
+
+class Change(IntFlag):
+    """What changed about a pet."""
+    MOTIVES = 1
+    ACTION = 2
+    ITEM = 4
+
+
+# Every combination of flags, built once instead of on every drained change
+_FLAGS = tuple(Change(bits) for bits in range(8))
+_MOTIVES, _ACTION_OR_ITEM, _ACTION = int(Change.MOTIVES), int(Change.ACTION | Change.ITEM), int(Change.ACTION)
+
+
+def action_item(action: Action | None) -> ItemInstance | None:
+    """Get the item used by an action, if any."""
+    if isinstance(action, EatAction):
+        return action.food_item
+    if isinstance(action, PlayAction):
+        return action.play_item
+    if isinstance(action, ItemAction):
+        return action.item
+    return None
+
+
+@dataclass(slots=True)
+class PetChange:
+    """The state of a changed pet, holding only the parts that changed.
+
+    Attributes:
+        index (int): The index of the pet in its tracker.
+        pet (Pet): The pet.
+        flags (Change): What changed since the last drain.
+        motives (tuple[float, ...] | None): The motives in `Motives` field order, if they changed.
+        action (str | None): The name of the current action, or None if the pet is idle.
+            Only meaningful if the action or its item changed.
+        remaining_ticks (int | None): The ticks left of the current action, if the action or its item changed.
+        queued (int | None): The number of queued actions, if the action changed.
+        durability (int | None): The durability left of the item of the current action, if
+            the action or its item changed and the action uses an item.
+    """
+    index: int
+    pet: Pet
+    flags: Change
+    motives: tuple[float, ...] | None = None
+    action: str | None = None
+    remaining_ticks: int | None = None
+    queued: int | None = None
+    durability: int | None = None
+
+
+class ChangeTracker:
+    """Dirty bits of many pets, drained into compact deltas, see the module documentation.
+
+    A pet can only be tracked by one tracker at a time.
+    """
+    def __init__(self, pets: Iterable[Pet] = ()) -> None:
+        self._pets: list[Pet] = []
+        # One byte of `Change` flags per pet
+        self._flags = bytearray()
+        # Indices of the pets with flags set, in the order they were first marked
+        self._dirty: list[int] = []
+        for pet in pets:
+            self.track(pet)
+
+    def __len__(self) -> int:
+        return len(self._pets)
+
+    @property
+    def dirty_count(self) -> int:
+        """The number of pets changed since the last drain."""
+        return len(self._dirty)
+
+    def track(self, pet: Pet) -> int:
+        """Start tracking the changes of a pet.
+
+        Returns:
+            int: The index of the pet in the tracker.
+
+        Raises:
+            ValueError: If the pet is already tracked.
+        """
+        if pet.is_watched:
+            raise ValueError(f"The pet '{pet.info.name}' is already tracked.")
+        index = len(self._pets)
+        self._pets.append(pet)
+        self._flags.append(0)
+        pet.watch(partial(self.mark, index))
+        return index
+
+    def flags(self, index: int) -> Change:
+        """Get what changed about a pet since the last drain."""
+        return _FLAGS[self._flags[index]]
+
+    def mark(self, index: int, flags: int) -> None:
+        """Record the `Change` flags of a pet. Called by tracked pets, in O(1)."""
+        if not self._flags[index]:
+            self._dirty.append(index)
+        self._flags[index] |= flags
+
+    def drain_changes(self) -> list[PetChange]:
+        """Get the changes of every pet changed since the last drain, and clear them.
+
+        Only the pets already marked are visited. A dirty lazy pet is brought up to date
+        first, and the changes this causes are part of the delta returned. A lazy pet that
+        was not marked is not caught up: the ticks it has not run yet are reported by the
+        drain following the next read of the pet or action on it.
+
+        Returns:
+            list[PetChange]: One delta per changed pet, in the order the pets first changed.
+        """
+        dirty, self._dirty = self._dirty, []
+        flags = self._flags
+        changes = []
+        for index in dirty:
+            pet = self._pets[index]
+            pet.catch_up()
+            bits = flags[index]
+            change = PetChange(index, pet, _FLAGS[bits])
+            if bits & _MOTIVES:
+                motives = pet.motives
+                change.motives = (
+                    motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+                )
+            if bits & _ACTION_OR_ITEM:
+                action = pet.current_action
+                if action is not None:
+                    change.action = action.name
+                    change.remaining_ticks = action.remaining_ticks
+                    item = action_item(action)
+                    if item is not None:
+                        change.durability = item.durability
+                if bits & _ACTION:
+                    change.queued = pet.queued_count
+            flags[index] = 0
+            changes.append(change)
+        return changes
+
+
+__all__ = ["Change", "ChangeTracker", "PetChange", "action_item"]
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import count
+from time import monotonic, sleep
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+from homeostasis.common import Motives, advance_value
+from homeostasis.types import Ticks
+
+from homeostasis.simulation.action import Priority
+
+if TYPE_CHECKING:
+    from homeostasis.pet import Pet
+    from homeostasis.simulation.action import Action
+
+
+@dataclass(eq=False)
+class Event:
+    """A callback scheduled to run at a given tick."""
+    tick: Ticks
+    callback: Callable[[], None]
+    cancelled: bool = False
+
+
+@dataclass(eq=False)
+class _MotiveWatch:
+    """A callback waiting for a motive of a pet to reach a level."""
+    motive: str
+    level: float
+    rising: bool
+    callback: Callable[[], None]
+
+    def is_reached(self, value: float) -> bool:
+        return value >= self.level if self.rising else value <= self.level
+
+
+# Ticks looked ahead for the motive of an idle pet to reach a level
+_HORIZON: Ticks = 1 << 40
+
+
+def _ticks_until(watch: _MotiveWatch, value: float, delta: float) -> Ticks | None:
+    """Count the ticks until a motive decaying by `delta` every tick reaches the level of a watch.
+
+    Adding the same delta every tick moves a clamped value in one direction only, so the
+    first tick at which the level is reached is found by bisection over `advance_value`.
+
+    Returns:
+        Ticks | None: The number of ticks, or None if the level is never reached.
+    """
+    if watch.is_reached(value):
+        return 0
+    if not watch.is_reached(advance_value(value, (delta,), _HORIZON)[0]):
+        return None
+    # The level is not reached after `low` ticks, and is after `high` ticks
+    low, high = 0, _HORIZON
+    while high - low > 1:
+        middle = (low + high) // 2
+        if watch.is_reached(advance_value(value, (delta,), middle)[0]):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+class Scheduler:
+    """Event-driven simulation clock backed by a priority queue.
+
+    Instead of advancing time one tick at a time, the scheduler jumps straight to the next
+    tick at which an event is due. Events due at the same tick run in scheduling order.
+
+    Pets created with `clock=scheduler.clock` are lazy: they keep decaying between events
+    without being ticked. Eager pets driven by the scheduler are brought up to date by `sync`,
+    which charges them every tick since they were last synced, whether they were busy or idle,
+    so they end up exactly as if they had been ticked every tick.
+
+    Besides action completions, `watch_motive` schedules an event at the tick at which a motive
+    of a pet reaches a level, such as hunger dropping to the level at which the pet needs food.
+
+    The scheduler refers to the pets it drives weakly, except through pending events, so an
+    idle pet is forgotten along with its idle callbacks and motive watches once nothing else
+    refers to it.
+
+    Attributes:
+        now (Ticks): The current simulated tick.
+        tick_seconds (float | None): Wall-clock seconds per tick when pacing in real time,
+            or None to run as fast as possible.
+    """
+    def __init__(self, start: Ticks = 0, tick_seconds: float | None = None) -> None:
+        self.now: Ticks = start
+        self.tick_seconds = tick_seconds
+        self._queue: list[tuple[Ticks, int, Event]] = []
+        self._sequence = count()
+        self._wall_origin = 0.0
+        self._tick_origin: Ticks = start
+        self._synced: WeakKeyDictionary[Pet, Ticks] = WeakKeyDictionary()
+        self._completions: WeakKeyDictionary[Pet, Event] = WeakKeyDictionary()
+        self._on_idle: WeakKeyDictionary[Pet, list[Callable[[], None]]] = WeakKeyDictionary()
+        self._motive_watches: WeakKeyDictionary[Pet, list[_MotiveWatch]] = WeakKeyDictionary()
+        self._motive_checks: WeakKeyDictionary[Pet, Event] = WeakKeyDictionary()
+
+    def clock(self) -> Ticks:
+        """Get the current tick, for use as the clock of lazy pets."""
+        return self.now
+
+    def __len__(self) -> int:
+        """Number of pending events, including cancelled ones not yet discarded."""
+        return len(self._queue)
+
+    def schedule(self, tick: Ticks, callback: Callable[[], None]) -> Event:
+        """Schedule a callback to run at an absolute tick.
+
+        Args:
+            tick (Ticks): The tick at which to run the callback. Must not be in the past.
+            callback (Callable[[], None]): The function to call.
+        """
+        if tick < self.now:
+            raise ValueError(f"Cannot schedule an event at tick {tick}, the clock is at tick {self.now}.")
+        event = Event(tick, callback)
+        heapq.heappush(self._queue, (tick, next(self._sequence), event))
+        return event
+
+    def call_later(self, delay: Ticks, callback: Callable[[], None]) -> Event:
+        """Schedule a callback to run `delay` ticks from now."""
+        return self.schedule(self.now + delay, callback)
+
+    @staticmethod
+    def cancel(event: Event) -> None:
+        """Prevent a scheduled event from running."""
+        event.cancelled = True
+
+    def next_tick(self) -> Ticks | None:
+        """Get the tick of the next pending event, or None if there is none."""
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def _pace(self, tick: Ticks) -> None:
+        """Wait until the wall-clock time of a tick when pacing in real time."""
+        if self.tick_seconds is None:
+            return
+        delay = self._wall_origin + (tick - self._tick_origin) * self.tick_seconds - monotonic()
+        if delay > 0:
+            sleep(delay)
+
+    def _run(self, until: Ticks | None) -> None:
+        """Run due events in order, stopping after `until` if given."""
+        self._wall_origin = monotonic()
+        self._tick_origin = self.now
+        while (next_tick := self.next_tick()) is not None and (until is None or next_tick <= until):
+            _, _, event = heapq.heappop(self._queue)
+            self._pace(event.tick)
+            self.now = event.tick
+            event.callback()
+
+    def run_until(self, tick: Ticks) -> None:
+        """Run every event due up to and including a tick, then move the clock there.
+
+        When pacing in real time, a scheduler that is behind the wall clock catches up
+        without waiting.
+        """
+        self._run(tick)
+        self._pace(tick)
+        self.now = max(self.now, tick)
+
+    def run(self) -> None:
+        """Run events until none are left."""
+        self._run(None)
+
+    def add(self, pet: Pet) -> None:
+        """Drive a pet from the current tick on, so that `sync` charges it every tick from now, busy or idle.
+
+        Starting an action with the scheduler, or watching a motive, adds the pet.
+        """
+        self.sync(pet)
+        self._synced.setdefault(pet, self.now)
+
+    def start_action(self, pet: Pet, action: Action, on_complete: Callable[[], None] | None = None) -> None:
+        """Set a pet's action and advance the pet when the action completes.
+
+        The first tick of the action happens at the next tick of the clock. Rather than ticking
+        the pet every tick, the scheduler jumps to the tick at which the action completes and
+        advances the pet in one go; `sync` brings the pet up to date in between.
+
+        Args:
+            pet (Pet): The pet performing the action.
+            action (Action): The action to perform.
+            on_complete (Callable[[], None] | None): Called once the pet is idle again.
+        """
+        self.sync(pet)
+        pet.set_action(action)
+        self._watch(pet, on_complete)
+
+    def queue_action(self, pet: Pet, action: Action, priority: Priority = Priority.NORMAL,
+                     on_idle: Callable[[], None] | None = None) -> bool:
+        """Queue an action for a pet with `Pet.queue_action`, advancing the pet as in `start_action`.
+
+        Args:
+            pet (Pet): The pet performing the action.
+            action (Action): The action to perform.
+            priority (Priority): The priority of the action.
+            on_idle (Callable[[], None] | None): Called once the pet has no action left.
+
+        Returns:
+            bool: Whether the action started right away.
+        """
+        self.sync(pet)
+        started = pet.queue_action(action, priority)
+        self._watch(pet, on_idle)
+        return started
+
+    def _watch(self, pet: Pet, on_idle: Callable[[], None] | None) -> None:
+        """Schedule the completion of a pet's current action, replacing any earlier one."""
+        self._synced[pet] = self.now
+        if on_idle is not None:
+            self._on_idle.setdefault(pet, []).append(on_idle)
+        previous = self._completions.get(pet)
+        if previous is not None:
+            self.cancel(previous)
+        self._completions[pet] = self.call_later(max(pet.current_action.duration(pet), 1), lambda: self._complete(pet))
+        self._plan_motive_check(pet)
+
+    def _complete(self, pet: Pet) -> None:
+        self.sync(pet)
+        if pet.is_busy:
+            # The action was extended, or the next queued action started
+            self._completions[pet] = self.call_later(
+                max(pet.current_action.duration(pet), 1), lambda: self._complete(pet)
+            )
+            return
+        # The pet stays synced, so that it keeps decaying while idle
+        del self._completions[pet]
+        self._plan_motive_check(pet)
+        for callback in self._on_idle.pop(pet, ()):
+            callback()
+
+    def watch_motive(self, pet: Pet, motive: str, level: float, callback: Callable[[], None],
+                     rising: bool = False) -> None:
+        """Call a callback once, at the first tick at which a motive of a pet reaches a level.
+
+        The pet is driven by the scheduler from then on, as with `start_action`. While the pet
+        is idle, the tick at which its decay makes the motive reach the level is computed in
+        closed form and the scheduler jumps straight to it; while the pet is busy, the motive
+        is checked after every tick, as actions can change it in any way.
+
+        Args:
+            pet (Pet): The pet to watch.
+            motive (str): The name of a field of `Motives`, such as "hunger".
+            level (float): The level to reach. If the motive is already there, the callback
+                runs at the current tick.
+            callback (Callable[[], None]): The function to call.
+            rising (bool): Wait for the motive to be at least `level`, instead of at most `level`.
+
+        Raises:
+            ValueError: If `motive` is not a field of `Motives`.
+        """
+        if motive not in Motives.__dataclass_fields__:
+            raise ValueError(f"Unknown motive '{motive}'.")
+        self.add(pet)
+        self._motive_watches.setdefault(pet, []).append(_MotiveWatch(motive, level, rising, callback))
+        self._plan_motive_check(pet)
+
+    def _plan_motive_check(self, pet: Pet) -> None:
+        """Schedule the next check of the watched motives of a pet, replacing any earlier one."""
+        previous = self._motive_checks.pop(pet, None)
+        if previous is not None:
+            self.cancel(previous)
+        watches = self._motive_watches.get(pet)
+        if not watches:
+            return
+        motives = pet.motives
+        if pet.is_busy:
+            # A level reached by decay at the tick the action started is still due at that tick
+            delay = 0 if any(watch.is_reached(getattr(motives, watch.motive)) for watch in watches) else 1
+        else:
+            decay = pet.decay_effect
+            delays = [
+                delay for watch in watches
+                if (delay := _ticks_until(watch, getattr(motives, watch.motive), getattr(decay, watch.motive)))
+                is not None
+            ]
+            if not delays:
+                return
+            delay = min(delays)
+        self._motive_checks[pet] = self.call_later(delay, lambda: self._check_motives(pet))
+
+    def _check_motives(self, pet: Pet) -> None:
+        del self._motive_checks[pet]
+        self.sync(pet)
+        motives = pet.motives
+        reached = [watch for watch in self._motive_watches[pet] if watch.is_reached(getattr(motives, watch.motive))]
+        remaining = [watch for watch in self._motive_watches[pet] if watch not in reached]
+        if remaining:
+            self._motive_watches[pet] = remaining
+        else:
+            del self._motive_watches[pet]
+        self._plan_motive_check(pet)
+        for watch in reached:
+            watch.callback()
+
+    def sync(self, pet: Pet) -> None:
+        """Advance a pet driven by the scheduler up to the current tick, whether it is busy or idle."""
+        if pet.is_lazy:
+            pet.catch_up()
+            return
+        synced = self._synced.get(pet)
+        if synced is not None and synced < self.now:
+            self._synced[pet] = self.now
+            pet.advance(self.now - synced)
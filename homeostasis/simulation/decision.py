@@ -0,0 +1,173 @@
+"""Need-driven action selection for idle pets.
+
+Every candidate action is scored by how much it would fill a pet's motive deficits, each
+deficit weighted by how fast its motive decays. Scores for all (pet, candidate) pairs are
+computed as batched array operations, over chunks of pets sized so that the scratch
+arrays fit in a memory budget however many candidates there are.
+
+Nothing runs the decider on its own. A loop ticking a `PetPopulation` calls `assign_idle`
+before every tick, as `homeostasis.simulation.sweep` does. A pet driven by a `Scheduler`
+is handed to `drive`, which starts the chosen action every time the pet goes idle, as
+`python -m homeostasis --autonomous` shows.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from homeostasis.items.base import ItemDefinition
+from homeostasis.pet import Pet, PetDecayRates
+from homeostasis.simulation.action import Action, EatAction, PlayAction, SleepAction
+from homeostasis.simulation.population import (
+    ENERGY, MOTIVE_FIELDS, TRAIT_FIELDS, ItemTable, PetPopulation, decay_vector,
+)
+
+if TYPE_CHECKING:
+    from homeostasis.simulation.clock import Scheduler
+
+SLEEP = -1
+IDLE = -2
+# Scratch bytes per (pet, candidate) pair: the gain of every motive and the compatibility
+_PAIR_BYTES = (len(MOTIVE_FIELDS) + 1) * np.dtype(float).itemsize
+
+
+class UtilityDecider:
+    """Chooses the most useful action for idle pets.
+
+    The utility of a candidate for a pet is the sum over motives of the motive gain it
+    provides, clamped to 0-100, times the urgency of that motive: its deficit from 100,
+    scaled by `1 + decay rate`. Item candidates gain `ItemDefinition.effect` for the pet's
+    personality; sleeping gains energy until full. A pet whose best utility does not exceed
+    `threshold` stays idle. Decay rates default to those given to the decider, but the
+    rates of each pet are used when they are known.
+
+    Pets are scored in chunks whose scratch arrays take at most `memory_budget` bytes.
+
+    Attributes:
+        items (list[ItemDefinition]): The candidate items, each either edible or playable.
+        threshold (float): The minimum utility for an action to be chosen.
+    """
+    def __init__(self, items: Sequence[ItemDefinition], decay: PetDecayRates | None = None,
+                 threshold: float = 0.0, memory_budget: int = 64 << 20) -> None:
+        self.items = list(items)
+        for item in self.items:
+            if not {"edible", "playable"} & item.tags:
+                raise ValueError(f"Item '{item.name}' is neither edible nor playable.")
+        self.threshold = threshold
+        self._table = ItemTable()
+        for item in self.items:
+            self._table.index(item)
+        self._chunk_size = max(1, memory_budget // (max(len(self._table), 1) * _PAIR_BYTES))
+        self._decay = decay_vector(decay or PetDecayRates())
+
+    def score(self, motives: np.ndarray, traits: np.ndarray, decay: np.ndarray | None = None) -> np.ndarray:
+        """Utility of every candidate for every pet.
+
+        Args:
+            motives (np.ndarray): (P x 6) motives of the pets.
+            traits (np.ndarray): (P x 4) traits of the pets.
+            decay (np.ndarray | None): (P x 6) decay rates of the pets, see `decay_vector`.
+
+        Returns:
+            np.ndarray: (P x (C + 1)) utilities. Column `c < C` scores `items[c]`, the last column sleeping.
+        """
+        if decay is None:
+            decay = np.broadcast_to(self._decay, motives.shape)
+        scores = np.empty((len(motives), len(self.items) + 1))
+        for start in range(0, len(motives), self._chunk_size):
+            stop = start + self._chunk_size
+            self._score_chunk(motives[start:stop], traits[start:stop], decay[start:stop], scores[start:stop])
+        return scores
+
+    def _score_chunk(self, motives: np.ndarray, traits: np.ndarray, decay: np.ndarray, out: np.ndarray) -> None:
+        table = self._table
+        compatibility = np.zeros((len(motives), len(table)))
+        for column in range(len(TRAIT_FIELDS)):
+            compatibility += 10 - np.abs(traits[:, None, column] - table.personalities[None, :, column])
+        compatibility = (compatibility / (10 * len(TRAIT_FIELDS))) * 2 - 1
+
+        urgency = (100 - motives) / 100 * (1 + decay)
+        # The gains are computed in place, as the one (pets x candidates x motives) array
+        gains = compatibility[:, :, None] * table.weighted_effects[None, :, :]
+        gains += motives[:, None, :]
+        np.clip(gains, 0, 100, out=gains)
+        gains -= motives[:, None, :]
+        np.einsum("pcm,pm->pc", gains, urgency, out=out[:, :-1])
+
+        rest = np.minimum(100 - motives[:, ENERGY], 2 * SleepAction.MAX_SLEEP_TICKS)
+        out[:, -1] = np.maximum(rest, 0) * urgency[:, ENERGY]
+
+    def choose(self, motives: np.ndarray, traits: np.ndarray, decay: np.ndarray | None = None,
+               allowed: np.ndarray | None = None) -> np.ndarray:
+        """Choose an action for every pet, see `score` for the other arguments.
+
+        Args:
+            allowed (np.ndarray | None): (P x C) booleans, the items each pet may choose.
+                Every item is allowed by default; sleeping always is.
+
+        Returns:
+            np.ndarray: Per pet, the index in `items` of the item to use, `SLEEP` or `IDLE`.
+        """
+        scores = self.score(motives, traits, decay)
+        if allowed is not None:
+            scores[:, :-1][~allowed] = -np.inf
+        best = np.argmax(scores, axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        choices = np.where(best == len(self.items), SLEEP, best)
+        choices[best_scores <= self.threshold] = IDLE
+        return choices
+
+    def assign_idle(self, population: PetPopulation) -> int:
+        """Choose and start an action for every idle pet of a population.
+
+        Returns:
+            int: The number of pets that started an action.
+        """
+        idle = population.idle()
+        if not len(idle):
+            return 0
+
+        choices = self.choose(population.motives[idle], population.traits[idle], population.decay[idle])
+        population.start_sleep(idle[choices == SLEEP])
+        for index in np.unique(choices[choices >= 0]):
+            item = self.items[index]
+            selected = idle[choices == index]
+            if "edible" in item.tags:
+                population.start_eat(selected, item)
+            else:
+                population.start_play(selected, item)
+        return int(np.count_nonzero(choices != IDLE))
+
+    def choose_action(self, pet: Pet) -> Action | None:
+        """Choose the action an idle pet should start, or None if it should stay idle."""
+        motives = np.array([[getattr(pet.motives, stat) for stat in MOTIVE_FIELDS]], dtype=float)
+        traits = np.array([[getattr(pet.personality, trait) for trait in TRAIT_FIELDS]], dtype=float)
+        choice = int(self.choose(motives, traits, decay_vector(pet.decay)[None, :])[0])
+        if choice == IDLE:
+            return None
+        if choice == SLEEP:
+            return SleepAction()
+        item = self.items[choice]
+        return EatAction(item.spawn()) if "edible" in item.tags else PlayAction(item.spawn())
+
+    def drive(self, scheduler: Scheduler, pet: Pet, retry: int = 1) -> None:
+        """Start the chosen action of a pet now, and again every time the pet goes idle under a scheduler.
+
+        The pet is driven for as long as the scheduler runs, so `Scheduler.run` never returns;
+        use `Scheduler.run_until`.
+
+        Args:
+            scheduler (Scheduler): The scheduler driving the pet.
+            pet (Pet): The pet, which must be idle.
+            retry (int): The ticks after which a pet that chose to stay idle chooses again.
+        """
+        def next_action() -> None:
+            scheduler.add(pet)
+            action = self.choose_action(pet)
+            if action is None:
+                scheduler.call_later(retry, next_action)
+            else:
+                scheduler.start_action(pet, action, on_complete=next_action)
+        next_action()
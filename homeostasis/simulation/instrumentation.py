@@ -0,0 +1,278 @@
+"""Opt-in profiling of the tick loop.
+
+`Instrumentation.enable` replaces the hot methods of the simulation with timed wrappers:
+`Pet.tick`, `Pet.advance`, `Action.tick`, the `on_tick` hook of every action class,
+`ItemDefinition.effect` and `Motives.add_stats`. `disable` puts the original methods
+back, so instrumentation costs nothing while it is disabled.
+
+Collected measurements are turned into a report by `Instrumentation.report` and sent to
+every sink by `Instrumentation.flush`. A sink is any object with an `emit(report)` method.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from os import PathLike
+from typing import Any, Protocol
+
+from homeostasis.common import Motives
+from homeostasis.items.base import EFFECT_CACHE, ItemDefinition
+from homeostasis.pet import Pet
+from homeostasis.simulation.action import Action
+
+# Sub-buckets per power of two of a latency histogram
+_SUB_BUCKETS = 8
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in nanoseconds.
+
+    Every power of two is split in `_SUB_BUCKETS` buckets, so percentiles are accurate to
+    within 12.5% whatever the range of the samples, in constant memory.
+
+    Attributes:
+        count (int): The number of recorded samples.
+        total (int): The sum of the recorded samples.
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self._buckets: Counter[int] = Counter()
+
+    def record(self, nanoseconds: int) -> None:
+        self.count += 1
+        self.total += nanoseconds
+        self._buckets[self._bucket(nanoseconds)] += 1
+
+    @staticmethod
+    def _bucket(nanoseconds: int) -> int:
+        if nanoseconds < _SUB_BUCKETS:
+            return nanoseconds
+        shift = nanoseconds.bit_length() - _SUB_BUCKETS.bit_length()
+        return shift * _SUB_BUCKETS + (nanoseconds >> shift)
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> int:
+        if bucket < 2 * _SUB_BUCKETS:
+            return bucket
+        shift, sub = divmod(bucket, _SUB_BUCKETS)
+        shift -= 1
+        return ((sub + _SUB_BUCKETS + 1) << shift) - 1
+
+    def percentile(self, q: float) -> int:
+        """Get the upper bound of the bucket holding the `q`-th percentile (0-100)."""
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * q / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return self._upper_bound(bucket)
+        return self._upper_bound(max(self._buckets))
+
+    def summary(self) -> dict[str, int | float]:
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "mean_ns": self.total / self.count if self.count else 0.0,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+        }
+
+
+class Sink(Protocol):
+    """Destination of instrumentation reports."""
+    def emit(self, report: dict[str, Any]) -> None: ...
+
+
+class MemorySink:
+    """Sink keeping every report in memory.
+
+    Attributes:
+        reports (list[dict]): The emitted reports, oldest first.
+    """
+    def __init__(self) -> None:
+        self.reports: list[dict[str, Any]] = []
+
+    def emit(self, report: dict[str, Any]) -> None:
+        self.reports.append(report)
+
+
+class JsonLinesSink:
+    """Sink appending every report to a file as one JSON object per line."""
+    def __init__(self, path: str | PathLike) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __enter__(self) -> JsonLinesSink:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def emit(self, report: dict[str, Any]) -> None:
+        self._file.write(json.dumps(report) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Instrumentation:
+    """Counters and latency histograms of the tick loop.
+
+    Only one instrumentation can be enabled at a time, since the wrapped methods are shared
+    by all pets. Action classes defined after `enable` is called have their `on_tick` hook
+    counted under `Action.tick` only. Use as a context manager to enable it for a block.
+
+    Attributes:
+        sinks (list[Sink]): Where `flush` sends reports.
+        latencies (dict[str, LatencyHistogram]): Latency of every wrapped method, by name.
+            `Action.tick` is recorded under the name of the action class, e.g. `SleepAction.tick`.
+        actions (Counter[str]): Number of action ticks by action class name.
+        allocated_blocks (int): Net number of memory blocks allocated by `Pet.tick` calls.
+    """
+    _active: Instrumentation | None = None
+
+    def __init__(self, sinks: Iterable[Sink] = ()) -> None:
+        self.sinks: list[Sink] = list(sinks)
+        self._originals: list[tuple[type, str, Callable]] = []
+        self.reset()
+
+    def __enter__(self) -> Instrumentation:
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return Instrumentation._active is self
+
+    def reset(self) -> None:
+        """Drop every measurement collected so far."""
+        self.latencies: dict[str, LatencyHistogram] = {}
+        self.actions: Counter[str] = Counter()
+        self.allocated_blocks = 0
+        self._ticks = 0
+        self._cache_hits = EFFECT_CACHE.hits
+        self._cache_misses = EFFECT_CACHE.misses
+        self._started = time.time()
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.latencies.get(name)
+        if histogram is None:
+            histogram = self.latencies[name] = LatencyHistogram()
+        return histogram
+
+    def enable(self) -> None:
+        """Wrap the hot methods of the simulation.
+
+        Raises:
+            RuntimeError: If another instrumentation is enabled.
+        """
+        if Instrumentation._active is self:
+            return
+        if Instrumentation._active is not None:
+            raise RuntimeError("Another instrumentation is already enabled.")
+        Instrumentation._active = self
+
+        self._wrap(Pet, "tick", self._timed_pet_tick)
+        self._wrap(Pet, "advance", functools.partial(self._timed, "Pet.advance"))
+        self._wrap(Action, "tick", self._timed_action_tick)
+        for cls in _action_classes():
+            if "on_tick" in vars(cls):
+                self._wrap(cls, "on_tick", functools.partial(self._timed, f"{cls.__name__}.on_tick"))
+        self._wrap(ItemDefinition, "effect", functools.partial(self._timed, "ItemDefinition.effect"))
+        self._wrap(Motives, "add_stats", functools.partial(self._timed, "Motives.add_stats"))
+
+    def disable(self) -> None:
+        """Restore the original methods. Measurements are kept until `flush` or `reset`."""
+        if Instrumentation._active is not self:
+            return
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+        Instrumentation._active = None
+
+    def _wrap(self, cls: type, name: str, timer: Callable) -> None:
+        original = vars(cls)[name]
+        self._originals.append((cls, name, original))
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            return timer(original, *args, **kwargs)
+        setattr(cls, name, wrapper)
+
+    def _timed(self, name: str, method: Callable, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._histogram(name).record(time.perf_counter_ns() - start)
+
+    def _timed_pet_tick(self, method: Callable, pet: Pet) -> None:
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter_ns()
+        try:
+            method(pet)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self._histogram("Pet.tick").record(elapsed)
+            self._ticks += 1
+            self.allocated_blocks += sys.getallocatedblocks() - blocks
+
+    def _timed_action_tick(self, method: Callable, action: Action, pet: Pet) -> None:
+        name = type(action).__name__
+        self.actions[name] += 1
+        self._timed(f"{name}.tick", method, action, pet)
+
+    def report(self) -> dict[str, Any]:
+        """Summarize the measurements collected since the last `reset`."""
+        hits = EFFECT_CACHE.hits - self._cache_hits
+        misses = EFFECT_CACHE.misses - self._cache_misses
+        return {
+            "started": self._started,
+            "ended": time.time(),
+            "latencies": {name: histogram.summary() for name, histogram in sorted(self.latencies.items())},
+            "actions": dict(self.actions),
+            "allocated_blocks": {
+                "total": self.allocated_blocks,
+                "per_tick": self.allocated_blocks / self._ticks if self._ticks else 0.0,
+            },
+            "effect_cache": {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            },
+        }
+
+    def flush(self) -> dict[str, Any]:
+        """Send a report to every sink, then reset the measurements.
+
+        Returns:
+            dict[str, Any]: The report sent.
+        """
+        report = self.report()
+        for sink in self.sinks:
+            sink.emit(report)
+        self.reset()
+        return report
+
+
+def _action_classes() -> list[type[Action]]:
+    """Every subclass of `Action` defined so far, including indirect ones."""
+    classes, pending = [], [Action]
+    while pending:
+        cls = pending.pop()
+        classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+__all__ = ["Instrumentation", "LatencyHistogram", "Sink", "MemorySink", "JsonLinesSink"]
@@ -0,0 +1,366 @@
+"""Column-oriented pet population advanced with batched NumPy operations.
+
+A `PetPopulation` stores the state of many pets as arrays instead of `Pet` objects:
+one (N x 6) motives matrix, one (N x 4) traits matrix, one (N x 6) matrix of decay rates
+and one column per piece of current-action state. `PetPopulation.tick` produces the same motives as calling
+`Pet.tick` on every pet, but does so with a handful of masked array operations.
+"""
+from __future__ import annotations
+
+from dataclasses import fields
+from enum import IntEnum
+
+import numpy as np
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ItemDefinition
+from homeostasis.items.inventory import Inventory
+from homeostasis.pet import BusyPetException, Pet, PetDecayRates
+from homeostasis.simulation.action import Action, EatAction, PlayAction, SleepAction
+
+MOTIVE_FIELDS = tuple(f.name for f in fields(Motives))
+TRAIT_FIELDS = tuple(f.name for f in fields(Traits))
+ENERGY = MOTIVE_FIELDS.index("energy")
+
+
+class ActionKind(IntEnum):
+    """Action currently performed by a pet of the population."""
+    NONE = 0
+    SLEEP = 1
+    EAT = 2
+    PLAY = 3
+
+
+class ItemTable:
+    """Item definitions used by a population, stored as rows of arrays.
+
+    Row `i` of `weighted_effects` holds `effects * effect_weights` of the i-th definition,
+    and row `i` of `personalities` holds its traits. Definitions are told apart by identity,
+    so that variants of an item sharing its name get rows of their own.
+    """
+    def __init__(self) -> None:
+        self.definitions: list[ItemDefinition] = []
+        # Row of each definition by id, kept valid by `definitions` holding the definitions alive
+        self._index: dict[int, int] = {}
+        self.weighted_effects = np.zeros((0, len(MOTIVE_FIELDS)))
+        self.personalities = np.zeros((0, len(TRAIT_FIELDS)))
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def __getstate__(self) -> dict:
+        # Ids are only meaningful in the process that took them
+        return {name: value for name, value in vars(self).items() if name != "_index"}
+
+    def __setstate__(self, state: dict) -> None:
+        vars(self).update(state)
+        self._index = {id(definition): row for row, definition in enumerate(self.definitions)}
+
+    def index(self, definition: ItemDefinition) -> int:
+        """Get the row of a definition, adding it to the table if needed."""
+        row = self._index.get(id(definition))
+        if row is not None:
+            return row
+
+        effects = [getattr(definition.effects, stat) * getattr(definition.effect_weights, stat)
+                   for stat in MOTIVE_FIELDS]
+        personality = [getattr(definition.personality, trait) for trait in TRAIT_FIELDS]
+        self.weighted_effects = np.vstack([self.weighted_effects, effects])
+        self.personalities = np.vstack([self.personalities, personality])
+
+        row = len(self.definitions)
+        self.definitions.append(definition)
+        self._index[id(definition)] = row
+        return row
+
+
+def decay_vector(decay: PetDecayRates) -> np.ndarray:
+    """Decay rate of every motive, ordered as the fields of `Motives`."""
+    rates = np.zeros(len(MOTIVE_FIELDS))
+    for stat in ("happiness", "energy", "social", "hunger"):
+        rates[MOTIVE_FIELDS.index(stat)] = getattr(decay, f"{stat}_decay")
+    return rates
+
+
+def compatibility(personalities: np.ndarray, traits: np.ndarray) -> np.ndarray:
+    """Row-wise `Traits.get_compatibility` between two (N x 4) trait matrices."""
+    score = np.zeros(len(traits))
+    for column in range(len(TRAIT_FIELDS)):
+        score += 10 - np.abs(personalities[:, column] - traits[:, column])
+    return (score / (10 * len(TRAIT_FIELDS))) * 2 - 1
+
+
+def tick_columns(motives: np.ndarray, traits: np.ndarray, decay: np.ndarray, kind: np.ndarray,
+                 remaining: np.ndarray, item: np.ndarray, durability: np.ndarray, table: ItemTable) -> np.ndarray:
+    """Advance a set of pet columns by one tick, in place.
+
+    All arrays share their first dimension; `item` holds `table` rows and `durability` the
+    durability left on the item of the current action. As in `Pet.tick`, an action with no
+    ticks left completes without any effect, and after the actions the motives of every pet
+    decay by its rates in `decay`, except for the pets whose action was interrupted, which
+    `Pet.tick` leaves as they were when it raised `ActionInterruptException`.
+
+    Returns:
+        np.ndarray: Indices of pets whose action was interrupted because its item was consumed.
+    """
+    busy = kind != ActionKind.NONE
+    kind[busy & (remaining <= 0)] = ActionKind.NONE
+    active = np.flatnonzero(busy & (remaining > 0))
+    remaining[active] -= 1
+    active_kind = kind[active]
+
+    sleeping = active[active_kind == ActionKind.SLEEP]
+    if len(sleeping):
+        rows = motives[sleeping]
+        rows[:, ENERGY] += 2
+        np.clip(rows, 0, 100, out=rows)
+        motives[sleeping] = rows
+        remaining[sleeping[rows[:, ENERGY] >= 100]] = 0
+
+    using = active[active_kind >= ActionKind.EAT]
+    interrupted = using[durability[using] <= 0]
+    if len(interrupted):
+        kind[interrupted] = ActionKind.NONE
+        using = using[durability[using] > 0]
+    if len(using):
+        durability[using] -= 1
+        rows = item[using]
+        scale = compatibility(table.personalities[rows], traits[using])
+        updated = motives[using] + table.weighted_effects[rows] * scale[:, None]
+        np.clip(updated, 0, 100, out=updated)
+        motives[using] = updated
+
+    kind[active[remaining[active] <= 0]] = ActionKind.NONE
+    if len(interrupted):
+        decaying = np.ones(len(motives), dtype=bool)
+        decaying[interrupted] = False
+        motives[decaying] -= decay[decaying]
+    else:
+        motives -= decay
+    np.clip(motives, 0, 100, out=motives)
+    return interrupted
+
+
+class PetPopulation:
+    """Many pets stored as column arrays and ticked together.
+
+    Pets are addressed by their index in the population. Only `SleepAction`, `EatAction`
+    and `PlayAction` can be performed: a `SocialAction` refers to a partner `Pet`, which
+    the columns cannot hold. Where `Pet.tick` raises `ActionInterruptException`
+    for an item that has already been consumed, the population drops the action instead
+    and reports the pet from `tick`.
+    """
+    _COLUMNS = ("motives", "traits", "decay", "kind", "remaining", "item", "durability")
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.items = ItemTable()
+        self._size = 0
+        self._growable = True
+        self._motives = np.zeros((capacity, len(MOTIVE_FIELDS)))
+        self._traits = np.zeros((capacity, len(TRAIT_FIELDS)))
+        self._decay = np.zeros((capacity, len(MOTIVE_FIELDS)))
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._remaining = np.zeros(capacity, dtype=np.int64)
+        self._item = np.zeros(capacity, dtype=np.int64)
+        self._durability = np.zeros(capacity, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray], items: ItemTable) -> PetPopulation:
+        """Create a population over existing state columns, without copying them.
+
+        The population holds as many pets as the columns have rows and cannot grow.
+
+        Args:
+            columns (dict[str, np.ndarray]): Arrays shaped like the result of `columns`.
+            items (ItemTable): The item definitions referenced by the `item` column.
+        """
+        population = cls()
+        population.items = items
+        for name in cls._COLUMNS:
+            setattr(population, f"_{name}", columns[name])
+        population._size = len(columns["kind"])
+        population._growable = False
+        return population
+
+    @classmethod
+    def from_pets(cls, pets: list[Pet]) -> PetPopulation:
+        """Create a population holding a copy of the state of each pet."""
+        population = cls(capacity=len(pets))
+        for pet in pets:
+            population.add(pet)
+        return population
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def motives(self) -> np.ndarray:
+        """(N x 6) motives matrix, columns ordered as the fields of `Motives`."""
+        return self._motives[:self._size]
+
+    @property
+    def traits(self) -> np.ndarray:
+        """(N x 4) traits matrix, columns ordered as the fields of `Traits`."""
+        return self._traits[:self._size]
+
+    @property
+    def decay(self) -> np.ndarray:
+        """(N x 6) motive decay rates per tick, columns ordered as the fields of `Motives`."""
+        return self._decay[:self._size]
+
+    @property
+    def kind(self) -> np.ndarray:
+        """`ActionKind` of the current action of every pet."""
+        return self._kind[:self._size]
+
+    @property
+    def remaining_ticks(self) -> np.ndarray:
+        """Remaining ticks of the current action of every pet."""
+        return self._remaining[:self._size]
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Views of every state column of the population, keyed by name."""
+        return {name: getattr(self, f"_{name}")[:self._size] for name in self._COLUMNS}
+
+    def _reserve(self, count: int) -> None:
+        """Grow the columns so that `count` more pets fit."""
+        needed = self._size + count
+        capacity = len(self._kind)
+        if needed <= capacity:
+            return
+        if not self._growable:
+            raise ValueError("This population is backed by external columns and cannot grow.")
+
+        capacity = max(needed, 2 * capacity)
+        for name in self._COLUMNS:
+            column = getattr(self, f"_{name}")
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, f"_{name}", grown)
+
+    def extend(self, motives: np.ndarray, traits: np.ndarray, decay: np.ndarray | None = None) -> range:
+        """Add idle pets from (N x 6) motives and (N x 4) traits matrices.
+
+        Args:
+            motives (np.ndarray): The motives of the pets.
+            traits (np.ndarray): The traits of the pets.
+            decay (np.ndarray | None): (N x 6) or (6,) decay rates, see `decay_vector`.
+                Defaults to the rates of `PetDecayRates()`.
+
+        Returns:
+            range: The indices of the new pets.
+        """
+        count = len(motives)
+        self._reserve(count)
+        start = self._size
+        self._motives[start:start + count] = motives
+        self._traits[start:start + count] = traits
+        self._decay[start:start + count] = decay_vector(PetDecayRates()) if decay is None else decay
+        self._kind[start:start + count] = ActionKind.NONE
+        self._size += count
+        return range(start, start + count)
+
+    def add(self, pet: Pet) -> int:
+        """Add a copy of a pet's state to the population.
+
+        Returns:
+            int: The index of the pet in the population.
+        """
+        motives = [[getattr(pet.motives, stat) for stat in MOTIVE_FIELDS]]
+        traits = [[getattr(pet.personality, trait) for trait in TRAIT_FIELDS]]
+        index = self.extend(np.array(motives, dtype=float), np.array(traits, dtype=float), decay_vector(pet.decay))[0]
+        if pet.current_action is not None:
+            self._set(index, pet.current_action)
+        return index
+
+    def is_busy(self, index: int) -> bool:
+        return self._kind[index] != ActionKind.NONE
+
+    def idle(self) -> np.ndarray:
+        """Indices of every pet without a current action."""
+        return np.flatnonzero(self.kind == ActionKind.NONE)
+
+    def get_motives(self, index: int) -> Motives:
+        """Get the motives of a pet as a `Motives` object."""
+        return Motives(**dict(zip(MOTIVE_FIELDS, self._motives[index].tolist())))
+
+    def set_action(self, index: int, action: Action) -> None:
+        """Set the current action of a pet from an action object.
+
+        Raises:
+            BusyPetException: The pet already has an action.
+            TypeError: The action is not a sleep, eat or play action, such as a `SocialAction`.
+        """
+        if self.is_busy(index):
+            raise BusyPetException
+        self._set(index, action)
+
+    def _set(self, index: int, action: Action) -> None:
+        if isinstance(action, SleepAction):
+            self._kind[index] = ActionKind.SLEEP
+        elif isinstance(action, EatAction):
+            self._kind[index] = ActionKind.EAT
+            self._item[index] = self.items.index(action.food_item.definition)
+            self._durability[index] = action.food_item.durability
+        elif isinstance(action, PlayAction):
+            self._kind[index] = ActionKind.PLAY
+            self._item[index] = self.items.index(action.play_item.definition)
+            self._durability[index] = action.play_item.durability
+        else:
+            raise TypeError(f"Unsupported action '{action.name}': a population only runs sleep, eat and play actions.")
+        self._remaining[index] = action.remaining_ticks
+
+    def start_sleep(self, indices: np.ndarray) -> None:
+        """Start a fresh `SleepAction` for every given idle pet."""
+        self._kind[indices] = ActionKind.SLEEP
+        self._remaining[indices] = SleepAction.MAX_SLEEP_TICKS
+
+    def start_eat(self, indices: np.ndarray, definition: ItemDefinition,
+                  inventory: Inventory | None = None) -> np.ndarray:
+        """Start an `EatAction` for every given idle pet, see `start_play`."""
+        if "edible" not in definition.tags:
+            raise ValueError("Item is not edible.")
+        return self._start_item(indices, ActionKind.EAT, EatAction.EAT_TICKS, definition, inventory)
+
+    def start_play(self, indices: np.ndarray, definition: ItemDefinition,
+                   inventory: Inventory | None = None) -> np.ndarray:
+        """Start a `PlayAction` for every given idle pet.
+
+        Args:
+            indices (np.ndarray): The pets, without duplicates.
+            definition (ItemDefinition): The item played with.
+            inventory (Inventory | None): Where the pets draw the item from, indexed like the
+                population. Pets that do not hold the item stay idle. Without an inventory,
+                every pet plays with a newly spawned item.
+
+        Returns:
+            np.ndarray: The pets that started playing.
+        """
+        if "playable" not in definition.tags:
+            raise ValueError("Item is not playable.")
+        return self._start_item(indices, ActionKind.PLAY, PlayAction.PLAY_TICKS, definition, inventory)
+
+    def _start_item(self, indices: np.ndarray, kind: ActionKind, ticks: int, definition: ItemDefinition,
+                    inventory: Inventory | None) -> np.ndarray:
+        durability = definition.max_durability
+        if inventory is not None:
+            indices = np.asarray(indices)
+            indices = indices[inventory.consume(indices, definition)]
+            # The action gets the one use drawn from the inventory, which keeps the rest of the item
+            durability = 1
+        self._kind[indices] = kind
+        self._remaining[indices] = ticks
+        self._item[indices] = self.items.index(definition)
+        self._durability[indices] = durability
+        return indices
+
+    def tick(self) -> np.ndarray:
+        """Advance every pet by one tick.
+
+        Returns:
+            np.ndarray: Indices of pets whose action was interrupted.
+        """
+        return tick_columns(**self.columns(), table=self.items)
+
+
+__all__ = ["PetPopulation", "ActionKind", "ItemTable", "MOTIVE_FIELDS", "TRAIT_FIELDS", "decay_vector"]
@@ -0,0 +1,279 @@
+"""Binary log of the actions issued to a world, for recomputing any pet at any tick.
+
+Pets never depend on each other's state within a tick, so the state of a pet at a tick
+follows from its state in a starting snapshot and the actions issued to it since. A replay
+log records those actions as fixed-width entries, with the seed of the world's `PetRandom`
+numbers and the item names they use. `Replay` indexes the entries by pet, so that any pet
+can be recomputed at any tick on its own, advancing it in closed form between its entries,
+and different pets can be recomputed in parallel and in any order.
+
+A `SocialAction` is logged with the index of the partner, and recomputed with the
+partner as decoded from the snapshot: personalities never change, so the compatibility
+is the same.
+
+The snapshot must hold the world as of the log's start tick.
+"""
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from os import PathLike
+
+from homeostasis.common import Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet
+from homeostasis.simulation.action import Action, EatAction, PlayAction, Priority, SleepAction
+from homeostasis.simulation.rng import PetRandom
+from homeostasis.simulation.social import SocialAction
+from homeostasis.snapshot import EAT, NAME_LENGTH, NO_ITEM, PLAY, SLEEP, SOCIAL, Snapshot, _NameTable
+from homeostasis.types import Ticks
+
+MAGIC = b"HMSR"
+VERSION = 1
+
+# magic, version, seed, tick of the starting snapshot
+HEADER = struct.Struct("<4sHxxQQ")
+# tick, pet index, action kind, priority, remaining ticks, item index or partner index, item durability
+ACTION_ENTRY = struct.Struct("<IIBBiii")
+NAME_ENTRY = b"N"
+ISSUED_ENTRY = b"A"
+
+
+class ReplayError(Exception):
+    """The file is not a replay log this version can read, or does not match the world."""
+    pass
+
+
+@dataclass(slots=True)
+class ReplayEntry:
+    """An action issued to a pet, with `Pet.queue_action`, once the world had simulated `tick` ticks.
+
+    `partner` is the index of the other pet of a social action, None for other actions.
+    """
+    tick: Ticks
+    pet: int
+    kind: int
+    priority: Priority
+    remaining_ticks: Ticks
+    item: str | None
+    durability: int
+    partner: int | None = None
+
+    def action(self, pet: Pet | None = None, partner: Pet | None = None) -> Action:
+        """Create the action as it was issued.
+
+        Args:
+            pet (Pet | None): The pet the action is issued to, needed by a social action.
+            partner (Pet | None): The pet at index `partner`, needed by a social action.
+        """
+        if self.kind == SOCIAL:
+            if pet is None or partner is None:
+                raise ValueError("A social action needs the pet and its partner.")
+            action = SocialAction(partner, Traits.get_compatibility(pet.personality, partner.personality))
+        elif self.kind == SLEEP:
+            action = SleepAction()
+        else:
+            item = ITEMS[self.item].spawn()
+            item.durability = self.durability
+            action = EatAction(item) if self.kind == EAT else PlayAction(item)
+        action.remaining_ticks = self.remaining_ticks
+        return action
+
+
+def _read_log(data: bytes) -> tuple[int, Ticks, list[ReplayEntry], int]:
+    """Parse a replay log.
+
+    Returns:
+        tuple[int, Ticks, list[ReplayEntry], int]: The seed, the start tick, the entries
+            in the order they were issued, and the end of the last complete entry.
+    """
+    magic, version, seed, start = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"Unsupported replay log (magic {magic!r}, version {version}).")
+
+    names: list[str] = []
+    entries: list[ReplayEntry] = []
+    end = HEADER.size
+    while end < len(data):
+        entry, offset = data[end:end + 1], end + 1
+        if entry == NAME_ENTRY:
+            if offset + NAME_LENGTH.size > len(data):
+                break
+            (length,) = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size + length
+            if offset > len(data):
+                break
+            names.append(data[offset - length:offset].decode())
+        elif entry == ISSUED_ENTRY:
+            if offset + ACTION_ENTRY.size > len(data):
+                break
+            tick, pet, kind, priority, remaining, item, durability = ACTION_ENTRY.unpack_from(data, offset)
+            if kind == SOCIAL:
+                entries.append(ReplayEntry(tick, pet, kind, Priority(priority), remaining, None, 0, partner=item))
+            else:
+                entries.append(ReplayEntry(
+                    tick, pet, kind, Priority(priority), remaining, None if item == NO_ITEM else names[item],
+                    durability,
+                ))
+            offset += ACTION_ENTRY.size
+        else:
+            raise ReplayError(f"Corrupted replay log entry at offset {end}.")
+        end = offset
+    return seed, start, entries, end
+
+
+class ReplayLog:
+    """Append-only log of the actions issued to the pets of a world.
+
+    Opening an existing log appends to it, after dropping an entry torn by a crash.
+
+    Attributes:
+        seed (int): The seed of the world's random numbers.
+        start (Ticks): The tick of the snapshot the log starts from.
+    """
+    def __init__(self, path: str | PathLike, seed: int = 0, start: Ticks = 0) -> None:
+        self._file = open(path, "ab+")
+        self._file.seek(0)
+        data = self._file.read()
+        self._names = _NameTable()
+        if data:
+            logged_seed, logged_start, entries, end = _read_log(data)
+            if (logged_seed, logged_start) != (seed, start):
+                self._file.close()
+                raise ReplayError(f"The replay log has seed {logged_seed} and start tick {logged_start}.")
+            for entry in entries:
+                if entry.item is not None and self._names.index(entry.item) is None:
+                    self._names.add(entry.item)
+            if end < len(data):
+                self._file.truncate(end)
+        else:
+            self._file.write(HEADER.pack(MAGIC, VERSION, seed, start))
+        self.seed = seed
+        self.start = start
+
+    def __enter__(self) -> ReplayLog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, tick: Ticks, pet: int, action: Action, priority: Priority = Priority.NORMAL,
+               partner: int | None = None) -> None:
+        """Record an action issued with `Pet.queue_action` to the pet at index `pet`, at a tick.
+
+        Args:
+            tick (Ticks): The number of ticks the world had simulated.
+            pet (int): The index of the pet.
+            action (Action): The action, before it starts.
+            priority (Priority): The priority it was queued with.
+            partner (int | None): The index of the partner of a social action.
+
+        Raises:
+            TypeError: The action is not a sleep, eat, play or social action.
+            ValueError: A social action is logged without the index of its partner.
+        """
+        item = None
+        if isinstance(action, SocialAction):
+            if partner is None:
+                raise ValueError(f"Cannot log the action '{action.name}' without the index of the partner.")
+            self._file.write(ISSUED_ENTRY + ACTION_ENTRY.pack(
+                tick, pet, SOCIAL, priority, action.remaining_ticks, partner, 0,
+            ))
+            return
+        if isinstance(action, SleepAction):
+            kind = SLEEP
+        elif isinstance(action, EatAction):
+            kind, item = EAT, action.food_item
+        elif isinstance(action, PlayAction):
+            kind, item = PLAY, action.play_item
+        else:
+            raise TypeError(f"Cannot log the action '{action.name}'.")
+
+        index = NO_ITEM
+        if item is not None:
+            index = self._names.index(item.definition.name)
+            if index is None:
+                encoded = item.definition.name.encode()
+                self._file.write(NAME_ENTRY + NAME_LENGTH.pack(len(encoded)) + encoded)
+                index = self._names.add(item.definition.name)
+        self._file.write(ISSUED_ENTRY + ACTION_ENTRY.pack(
+            tick, pet, kind, priority, action.remaining_ticks, index, 0 if item is None else item.durability,
+        ))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Replay:
+    """A starting snapshot and the replay log written since, indexed by pet.
+
+    Attributes:
+        seed (int): The seed of the world's random numbers.
+        start (Ticks): The tick of the snapshot.
+    """
+    def __init__(self, snapshot: str | PathLike, log: str | PathLike) -> None:
+        with open(log, "rb") as file:
+            self.seed, self.start, entries, _ = _read_log(file.read())
+        self._snapshot = Snapshot(snapshot)
+        self._entries: dict[int, list[ReplayEntry]] = {}
+        for entry in entries:
+            self._entries.setdefault(entry.pet, []).append(entry)
+
+    def __enter__(self) -> Replay:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def entries(self, pet: int) -> list[ReplayEntry]:
+        """Get the entries of the pet at index `pet`, in the order they were issued."""
+        return self._entries.get(pet, [])
+
+    def random(self, pet: int) -> PetRandom:
+        """Get the random numbers of the pet at index `pet`."""
+        return PetRandom(self.seed, pet)
+
+    def pet(self, index: int, tick: Ticks) -> Pet:
+        """Recompute the pet at `index` as of a tick.
+
+        The pet is advanced in closed form from the snapshot, issuing its logged actions on
+        the way; actions interrupted on the way are cancelled, as `WorldServer.step` does.
+
+        Args:
+            index (int): The index of the pet in the snapshot.
+            tick (Ticks): The tick, before the actions issued at that tick.
+
+        Raises:
+            ValueError: The tick is before the snapshot.
+        """
+        if tick < self.start:
+            raise ValueError(f"Cannot recompute tick {tick}, the snapshot is at tick {self.start}.")
+        pet = self._snapshot.pet(index)
+        now = self.start
+        for entry in self.entries(index):
+            if entry.tick >= tick:
+                break
+            pet.advance(entry.tick - now, cancel_interrupted=True)
+            now = entry.tick
+            partner = None if entry.partner is None else self._snapshot.pet(entry.partner)
+            pet.queue_action(entry.action(pet, partner), entry.priority)
+        pet.advance(tick - now, cancel_interrupted=True)
+        return pet
+
+    def pets(self, tick: Ticks) -> Iterator[Pet]:
+        """Recompute every pet as of a tick, in snapshot order."""
+        for index in range(len(self)):
+            yield self.pet(index, tick)
+
+    def close(self) -> None:
+        self._snapshot.close()
+
+
+__all__ = ["Replay", "ReplayLog", "ReplayEntry", "ReplayError"]
@@ -0,0 +1,360 @@
+"""Asyncio world service running the tick loop for many concurrent clients.
+
+Clients send commands as dicts, or as JSON lines over TCP:
+
+    {"id": 1, "command": "feed", "pet": "Buddy", "item": "Dirty Martini"}
+    {"id": 2, "command": "play", "pet": "Buddy", "item": "Squeaky Ball", "queue": false}
+    {"id": 3, "command": "sleep", "pet": "Buddy", "priority": "urgent"}
+    {"id": 4, "command": "state"}
+
+and get a response echoing the `id`, whose `status` is "started", "queued", "rejected",
+"ok" or "error". Actions go through `Pet.queue_action` with the command's `priority`
+("normal" by default): an action for a busy pet preempts the current action if it has a
+higher priority, and is otherwise queued until the pet gets to it, unless the command asks
+for `"queue": false` or the pet's queue is full, in which case it is rejected. A TCP line
+that is not a JSON object, or is longer than the limit of the stream reader (64 KiB by
+default), gets an "error" response and the connection goes on with the next line.
+
+After every tick, the pets whose state changed are broadcast to every client as one batch:
+
+    {"type": "tick", "tick": 42, "pets": {"Buddy": {"motives": [...], "action": "eat"}}}
+
+Changed pets are found with a `ChangeTracker`, without scanning the world. A client that
+falls too far behind stops receiving batches until it asks for the full `state` again.
+
+Given a `ReplayLog`, the server records every action it starts or queues, so that the
+world can later be recomputed from a snapshot with `Replay`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from homeostasis.items.base import ITEMS, ItemRegistry
+from homeostasis.pet import Pet
+from homeostasis.simulation.action import (
+    Action, ActionInterruptException, EatAction, PlayAction, Priority, SleepAction,
+)
+from homeostasis.simulation.changes import ChangeTracker
+from homeostasis.simulation.replay import ReplayLog
+from homeostasis.types import Ticks
+
+# Pending broadcasts per client before it is considered lagging
+MAX_PENDING = 64
+# Bytes buffered for a TCP client before it is considered lagging
+MAX_BUFFERED = 1 << 20
+
+
+class CommandError(Exception):
+    """The command is malformed or refers to an unknown pet or item."""
+    pass
+
+
+def _pet_state(pet: Pet) -> dict[str, Any]:
+    motives = pet.motives
+    action = pet.current_action
+    return {
+        "motives": [motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun],
+        "action": None if action is None else action.name,
+    }
+
+
+class Subscriber:
+    """A client receiving tick batches.
+
+    Attributes:
+        lagging (bool): Whether batches are being dropped because the client is too slow.
+            Cleared when the client requests the full state.
+    """
+    def __init__(self) -> None:
+        self.lagging = False
+
+    def deliver(self, batch: dict[str, Any], encoded: Callable[[], bytes]) -> bool:
+        """Deliver a batch, or return False if the client cannot keep up."""
+        raise NotImplementedError()
+
+
+class LoopbackClient(Subscriber):
+    """In-process client, sending commands and receiving batches without any I/O.
+
+    Attributes:
+        updates (asyncio.Queue): The tick batches received, oldest first.
+    """
+    def __init__(self, server: WorldServer, max_pending: int = MAX_PENDING) -> None:
+        super().__init__()
+        self._server = server
+        self.updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue(max_pending)
+
+    async def request(self, command: dict[str, Any]) -> dict[str, Any]:
+        """Send a command and get its response."""
+        return self._server.handle(command, self)
+
+    def deliver(self, batch: dict[str, Any], encoded: Callable[[], bytes]) -> bool:
+        try:
+            self.updates.put_nowait(batch)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        self._server.unsubscribe(self)
+
+
+class _StreamClient(Subscriber):
+    """Client connected over a TCP stream, exchanging JSON lines."""
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        super().__init__()
+        self.writer = writer
+
+    def deliver(self, batch: dict[str, Any], encoded: Callable[[], bytes]) -> bool:
+        if self.writer.is_closing() or self.writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+            return False
+        self.writer.write(encoded())
+        return True
+
+
+class WorldServer:
+    """Tick loop and command handling for a world of named pets.
+
+    The server runs on a single event loop, so commands and ticks never interleave and
+    pets need no locking. The pets are tracked by the server's `ChangeTracker`, so they
+    cannot be tracked by another one. `step` advances the world by one tick; `start` runs it every
+    `tick_seconds` in a background task.
+
+    Attributes:
+        pets (dict[str, Pet]): The pets of the world, by name.
+        items (ItemRegistry): Where the items named by commands are looked up.
+        now (Ticks): The number of ticks simulated.
+        tick_seconds (float): Wall-clock seconds per tick of the background task.
+        max_queued (int): The maximum number of actions queued per busy pet.
+        replay_log (ReplayLog | None): Where the issued actions are recorded, with pets
+            identified by their index in `pets`.
+    """
+    def __init__(self, pets: Iterable[Pet], tick_seconds: float = 1.0, items: ItemRegistry = ITEMS,
+                 max_queued: int = 8, replay_log: ReplayLog | None = None) -> None:
+        self.pets: dict[str, Pet] = {pet.info.name: pet for pet in pets}
+        self.items = items
+        self.tick_seconds = tick_seconds
+        self.max_queued = max_queued
+        self.replay_log = replay_log
+        self._indices = {name: index for index, name in enumerate(self.pets)}
+        self._names = list(self.pets)
+        self._changes = ChangeTracker(self.pets.values())
+        self.now: Ticks = 0
+        self._subscribers: dict[Subscriber, None] = {}
+        self._last_states: dict[str, dict[str, Any]] = {name: _pet_state(pet) for name, pet in self.pets.items()}
+        self._task: asyncio.Task | None = None
+        self._tcp: asyncio.Server | None = None
+
+    def connect(self, max_pending: int = MAX_PENDING) -> LoopbackClient:
+        """Connect an in-process client."""
+        client = LoopbackClient(self, max_pending)
+        self._subscribers[client] = None
+        return client
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.pop(subscriber, None)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _make_action(self, command: dict[str, Any]) -> Action:
+        kind = command.get("command")
+        if kind == "sleep":
+            return SleepAction()
+        if kind not in ("feed", "play"):
+            raise CommandError(f"Unknown command '{kind}'.")
+        item = command.get("item")
+        definition = self.items.get(item) if isinstance(item, str) else None
+        if definition is None:
+            raise CommandError(f"Unknown item '{item}'.")
+        try:
+            return EatAction(definition.spawn()) if kind == "feed" else PlayAction(definition.spawn())
+        except ValueError as error:
+            raise CommandError(str(error)) from None
+
+    def handle(self, command: dict[str, Any], subscriber: Subscriber | None = None) -> dict[str, Any]:
+        """Run a command and build its response.
+
+        Args:
+            command (dict[str, Any]): The command, see the module documentation.
+            subscriber (Subscriber | None): The client sending it, resynchronized by a `state` command.
+        """
+        response: dict[str, Any] = {"id": command.get("id")} if "id" in command else {}
+        try:
+            if command.get("command") == "state":
+                if subscriber is not None:
+                    subscriber.lagging = False
+                response.update(status="ok", tick=self.now, pets=dict(self._last_states))
+                return response
+
+            name = command.get("pet")
+            pet = self.pets.get(name) if isinstance(name, str) else None
+            if pet is None:
+                raise CommandError(f"Unknown pet '{name}'.")
+            action = self._make_action(command)
+            priority = command.get("priority", "normal")
+            if not isinstance(priority, str) or priority.upper() not in Priority.__members__:
+                raise CommandError(f"Unknown priority '{priority}'.")
+            priority = Priority[priority.upper()]
+        except CommandError as error:
+            response.update(status="error", reason=str(error))
+            return response
+
+        busy = pet.is_busy
+        current = pet.current_action
+        if busy and priority <= pet.current_priority and (
+                not command.get("queue", True) or pet.queued_count >= self.max_queued):
+            response.update(status="rejected", reason=f"'{name}' is busy.")
+            return response
+        if self.replay_log is not None:
+            # Logged before the action starts using its item
+            self.replay_log.append(self.now, self._indices[name], action, priority)
+        if pet.queue_action(action, priority):
+            response.update(status="started")
+            if current is not None:
+                response.update(preempted=current.name)
+        else:
+            response.update(status="queued", queued=pet.queued_count)
+        return response
+
+    def step(self) -> dict[str, Any]:
+        """Advance every pet by one tick and broadcast the changes.
+
+        Returns:
+            dict[str, Any]: The batch broadcast for this tick.
+        """
+        self.now += 1
+        interrupted = []
+        for name, pet in self.pets.items():
+            try:
+                pet.tick()
+            except ActionInterruptException:
+                pet.cancel_action()
+                interrupted.append(name)
+
+        changes = {}
+        # In world order, as pets changed by commands are marked before the tick
+        for change in sorted(self._changes.drain_changes(), key=lambda change: change.index):
+            name = self._names[change.index]
+            state = _pet_state(change.pet)
+            if state != self._last_states[name]:
+                self._last_states[name] = changes[name] = state
+        batch = {"type": "tick", "tick": self.now, "pets": changes}
+        if interrupted:
+            batch["interrupted"] = interrupted
+        self._broadcast(batch)
+        return batch
+
+    def _broadcast(self, batch: dict[str, Any]) -> None:
+        encoded: bytes | None = None
+
+        def encode() -> bytes:
+            # Encoded at most once per tick, and only if a stream client needs it
+            nonlocal encoded
+            if encoded is None:
+                encoded = (json.dumps(batch) + "\n").encode()
+            return encoded
+
+        for subscriber in self._subscribers:
+            if not subscriber.lagging and not subscriber.deliver(batch, encode):
+                subscriber.lagging = True
+
+    async def run(self) -> None:
+        """Step the world every `tick_seconds`, catching up if a step overruns."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            self.step()
+            deadline += self.tick_seconds
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+    def start(self) -> asyncio.Task:
+        """Run the tick loop in a background task of the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Stop the tick loop and the TCP server, if any."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._tcp is not None:
+            self._tcp.close()
+            self._tcp.close_clients()
+            await self._tcp.wait_closed()
+            self._tcp = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Accept clients over TCP, exchanging JSON lines.
+
+        Returns:
+            asyncio.Server: The listening server; port 0 picks a free port.
+        """
+        self._tcp = await asyncio.start_server(self._serve_client, host, port)
+        return self._tcp
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _StreamClient(writer)
+        self._subscribers[client] = None
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    # The last line, without a newline
+                    line = error.partial
+                except asyncio.LimitOverrunError as error:
+                    await self._respond(writer, {"status": "error", "reason": str(error)})
+                    if await self._skip_line(reader):
+                        continue
+                    break
+                if not line:
+                    break
+                try:
+                    command = json.loads(line)
+                    if not isinstance(command, dict):
+                        raise ValueError("A command must be an object.")
+                except (ValueError, RecursionError) as error:
+                    response = {"status": "error", "reason": str(error)}
+                else:
+                    response = self.handle(command, client)
+                await self._respond(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            self.unsubscribe(client)
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader) -> bool:
+        """Discard the rest of a line longer than the limit of the reader.
+
+        Returns:
+            bool: Whether more lines may follow, as opposed to the stream having ended.
+        """
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return True
+            except asyncio.LimitOverrunError as error:
+                # Nothing was removed from the buffer, drop what was scanned
+                await reader.readexactly(error.consumed)
+            except asyncio.IncompleteReadError:
+                return False
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, response: dict[str, Any]) -> None:
+        writer.write((json.dumps({"type": "response", **response}) + "\n").encode())
+        await writer.drain()
+
+
+__all__ = ["WorldServer", "LoopbackClient", "Subscriber", "CommandError"]
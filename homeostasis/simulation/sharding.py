@@ -0,0 +1,96 @@
+"""Population ticked by a pool of worker processes over shared memory.
+
+The state columns of a `PetPopulation` are moved into `multiprocessing.shared_memory`
+blocks. Every worker attaches to the same blocks once, then ticks its own contiguous
+shard of pets in place, so no pet state is pickled between steps. Pets never depend on
+each other within a tick, so results are identical whatever the number of workers.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from homeostasis.simulation.population import ItemTable, PetPopulation, tick_columns
+
+# Shared state of a worker process, set up by `_attach`
+_blocks: list[SharedMemory] = []
+_columns: dict[str, np.ndarray] = {}
+
+
+def _attach(layout: dict[str, tuple[str, tuple[int, ...], str]]) -> None:
+    """Pool initializer attaching a worker to the shared state columns."""
+    for name, (block_name, shape, dtype) in layout.items():
+        block = SharedMemory(name=block_name, track=False)
+        _blocks.append(block)
+        _columns[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _tick_shard(start: int, stop: int, ticks: int, table: ItemTable) -> np.ndarray:
+    """Tick the pets in `[start, stop)` of the shared columns `ticks` times."""
+    if ticks <= 0:
+        return np.empty(0, dtype=np.intp)
+    shard = {name: column[start:stop] for name, column in _columns.items()}
+    interrupted = [tick_columns(**shard, table=table) for _ in range(ticks)]
+    return np.unique(np.concatenate(interrupted)) + start
+
+
+class ShardedWorld:
+    """A pet population partitioned across a `multiprocessing` worker pool.
+
+    The pets are copied into shared memory on creation. `population` is a view over the same
+    memory, so actions can be assigned through it between ticks; it cannot grow.
+
+    Use as a context manager, or call `close` to stop the workers and free the shared memory.
+
+    Attributes:
+        population (PetPopulation): The pets, backed by shared memory.
+        workers (int): The number of worker processes.
+    """
+    def __init__(self, population: PetPopulation, workers: int) -> None:
+        self.workers = workers
+        self._blocks: list[SharedMemory] = []
+        columns = {}
+        layout = {}
+        for name, column in population.columns().items():
+            block = SharedMemory(create=True, size=max(column.nbytes, 1))
+            self._blocks.append(block)
+            shared = np.ndarray(column.shape, dtype=column.dtype, buffer=block.buf)
+            shared[:] = column
+            columns[name] = shared
+            layout[name] = (block.name, column.shape, column.dtype.str)
+
+        self.population = PetPopulation.from_columns(columns, population.items)
+        bounds = np.linspace(0, len(self.population), workers + 1).astype(int)
+        self._shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self._pool = multiprocessing.Pool(workers, initializer=_attach, initargs=(layout,))
+
+    def __enter__(self) -> ShardedWorld:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def tick(self, ticks: int = 1) -> np.ndarray:
+        """Advance every pet by `ticks` ticks.
+
+        Returns:
+            np.ndarray: Indices of pets whose action was interrupted during those ticks.
+        """
+        # Workers may pick up any shard, so each task carries the item table
+        table = self.population.items
+        interrupted = self._pool.starmap(
+            _tick_shard, [(start, stop, ticks, table) for start, stop in self._shards]
+        )
+        return np.concatenate(interrupted)
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        self._pool.close()
+        self._pool.join()
+        self.population = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
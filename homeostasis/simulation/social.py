@@ -0,0 +1,187 @@
+"""Pet-to-pet social interactions.
+
+Pets pair up with the most compatible available partner and raise each other's `social`
+and `happiness` motives in proportion to their compatibility; incompatible pets lower
+them instead. Partners are found through a `SocialIndex`, which buckets pets by
+personality and walks the buckets outwards with `trait_shell`, the same way
+`ItemRegistry.most_compatible` finds items. A partner search therefore visits nearby
+buckets only, and pairing a whole room is close to linear in the number of pets.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from homeostasis.common import Motives, Traits, trait_shell
+from homeostasis.pet import Pet
+from homeostasis.simulation.action import Action, Priority
+from homeostasis.types import Ticks
+
+# Largest L1 distance between two personalities with traits in 0-10
+MAX_DISTANCE = 4 * 10
+
+
+class SocialAction(Action):
+    """Spend time with another pet.
+
+    Each of the two pets performs its own `SocialAction`, so either one can be preempted
+    without affecting the other.
+
+    Attributes:
+        partner (Pet): The other pet.
+        compatibility (float): The compatibility of the two pets, from -1 to 1.
+        effect (Motives): The stats added to the pet's motives every tick.
+    """
+    SOCIAL_TICKS = 3
+    EFFECT_PER_TICK = Motives(social=8, happiness=2)
+
+    def __init__(self, partner: Pet, compatibility: float) -> None:
+        super().__init__("socialize", self.SOCIAL_TICKS)
+        self.partner = partner
+        self.compatibility = compatibility
+        self.effect = Motives(
+            social=self.EFFECT_PER_TICK.social * compatibility,
+            happiness=self.EFFECT_PER_TICK.happiness * compatibility,
+        )
+
+    def on_tick(self, pet: Pet) -> None:
+        """Change social and happiness motives each tick."""
+        pet.motives.add_stats(self.effect)
+
+    def advance(self, pet: Pet, ticks: Ticks, decay: Motives | None = None) -> Ticks:
+        ticks = max(0, min(ticks, self.remaining_ticks))
+        if ticks:
+            self.remaining_ticks -= ticks
+            pet.motives.add_stats_repeatedly((self.effect,) if decay is None else (self.effect, decay), ticks)
+            if self.is_complete():
+                self.on_complete(pet)
+        return ticks
+
+    def on_complete(self, pet: Pet) -> None:
+        pass
+
+
+def _grid_key(personality: Traits) -> tuple[int, int, int, int]:
+    """Bucket of a personality: its traits rounded and clamped to the 0-10 grid."""
+    return tuple(
+        max(0, min(10, round(value)))
+        for value in (personality.friendliness, personality.playfulness, personality.laziness, personality.curiosity)
+    )
+
+
+class SocialIndex:
+    """Pets bucketed by personality, for finding the most compatible partners.
+
+    Pets whose traits are integers within 0-10 are found in exact compatibility order.
+    Other personalities are bucketed by their rounded traits, so partners found for them
+    are only approximately the most compatible.
+    """
+    def __init__(self, pets: Iterable[Pet] = ()) -> None:
+        # Dicts keep insertion order, which breaks ties, and remove pets in O(1)
+        self._buckets: dict[tuple, dict[Pet, None]] = {}
+        self._keys: dict[Pet, tuple] = {}
+        for pet in pets:
+            self.add(pet)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, pet: Pet) -> bool:
+        return pet in self._keys
+
+    def add(self, pet: Pet) -> None:
+        key = _grid_key(pet.personality)
+        self._keys[pet] = key
+        self._buckets.setdefault(key, {})[pet] = None
+
+    def remove(self, pet: Pet) -> None:
+        key = self._keys.pop(pet)
+        bucket = self._buckets[key]
+        del bucket[pet]
+        if not bucket:
+            del self._buckets[key]
+
+    def nearest(self, personality: Traits, max_distance: int = MAX_DISTANCE) -> Pet | None:
+        """Get the indexed pet most compatible with a personality.
+
+        Args:
+            personality (Traits): The personality to match.
+            max_distance (int): Only consider pets within this L1 trait distance.
+
+        Returns:
+            Pet | None: The pet, or None if no pet is close enough.
+        """
+        center = _grid_key(personality)
+        max_distance = min(max_distance, MAX_DISTANCE)
+        visited = 0
+        for radius in range(max_distance + 1):
+            if visited > len(self._buckets):
+                # Sparse index: scoring the occupied buckets is cheaper than walking empty shells
+                return self._scan(center, max_distance)
+            for key in trait_shell(center, radius):
+                visited += 1
+                bucket = self._buckets.get(key)
+                if bucket:
+                    return next(iter(bucket))
+        return None
+
+    def _scan(self, center: tuple, max_distance: int) -> Pet | None:
+        best, best_distance = None, max_distance + 1
+        for key, bucket in self._buckets.items():
+            distance = sum(abs(value - origin) for value, origin in zip(key, center))
+            if distance < best_distance:
+                best, best_distance = bucket, distance
+        return None if best is None else next(iter(best))
+
+    def pair(self, min_compatibility: float = -1.0) -> list[tuple[Pet, Pet, float]]:
+        """Greedily pair the indexed pets, removing the paired pets from the index.
+
+        Pets are served by increasing `social` motive, each with the most compatible pet
+        still unpaired. Pets with no partner of at least `min_compatibility` stay indexed.
+
+        Returns:
+            list[tuple[Pet, Pet, float]]: The pairs and their compatibility.
+        """
+        # Compatibility is 1 - distance / 20, see `Traits.get_compatibility`
+        max_distance = int((1 - min_compatibility) * 20 + 1e-9)
+        pairs = []
+        lonely = []
+        for pet in sorted(self._keys, key=lambda pet: pet.motives.social):
+            if pet not in self._keys:
+                continue
+            self.remove(pet)
+            partner = self.nearest(pet.personality, max_distance)
+            if partner is None:
+                lonely.append(pet)
+                continue
+            compatibility = Traits.get_compatibility(pet.personality, partner.personality)
+            if compatibility < min_compatibility:
+                # Only possible for personalities off the integer grid
+                lonely.append(pet)
+                continue
+            self.remove(partner)
+            pairs.append((pet, partner, compatibility))
+        for pet in lonely:
+            self.add(pet)
+        return pairs
+
+
+def socialize(pets: Iterable[Pet], min_compatibility: float = 0.0,
+              priority: Priority = Priority.NORMAL) -> list[tuple[Pet, Pet, float]]:
+    """Pair up idle pets and queue a `SocialAction` for both pets of every pair.
+
+    Args:
+        pets (Iterable[Pet]): The pets of a room. Busy pets are left out.
+        min_compatibility (float): The lowest compatibility of a pair.
+        priority (Priority): The priority of the social actions.
+
+    Returns:
+        list[tuple[Pet, Pet, float]]: The pairs and their compatibility.
+    """
+    pairs = SocialIndex(pet for pet in pets if not pet.is_busy).pair(min_compatibility)
+    for pet, partner, compatibility in pairs:
+        pet.queue_action(SocialAction(partner, compatibility), priority)
+        partner.queue_action(SocialAction(pet, compatibility), priority)
+    return pairs
+
+
+__all__ = ["SocialAction", "SocialIndex", "socialize"]
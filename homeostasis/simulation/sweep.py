@@ -0,0 +1,219 @@
+"""Item balancing sweeps: many variants of an item, each tried on a synthetic population.
+
+A sweep replaces one item of a catalogue by each of its variants in turn, and lets a
+population of pets live with the catalogue for a number of ticks. Idle pets choose their
+actions with a `UtilityDecider`, and are ticked by the `PetPopulation` kernel.
+
+Variants are evaluated in batches. A batch of B variants is a single population of B
+copies of the synthetic pets, ticked with one set of array operations, where the pets of
+copy `b` may only choose variant `b` besides the rest of the catalogue. Batches are spread
+over a process pool. Pets never interact, so results do not depend on the batch size or
+on the number of workers.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, replace
+from itertools import product
+
+import numpy as np
+
+from homeostasis.common import Motives
+from homeostasis.items.base import ItemDefinition
+from homeostasis.simulation.decision import SLEEP, UtilityDecider
+from homeostasis.simulation.population import MOTIVE_FIELDS, TRAIT_FIELDS, PetPopulation
+
+HUNGER = MOTIVE_FIELDS.index("hunger")
+# Parts of an item definition a sweep can vary, each a dataclass of numbers
+PARAMETER_GROUPS = ("effects", "effect_weights", "personality")
+
+
+@dataclass(slots=True)
+class SweepResult:
+    """Outcome of a variant over a sweep.
+
+    Attributes:
+        variant (ItemDefinition): The variant tried.
+        starved (float): The fraction of pets whose hunger reached 0.
+        time_to_starvation (float): The median tick at which those pets first reached 0
+            hunger, or NaN if none did.
+        equilibrium (Motives): The average motives of the pets over the last quarter of the sweep.
+        usage_share (float): The fraction of item uses that used the variant.
+    """
+    variant: ItemDefinition
+    starved: float
+    time_to_starvation: float
+    equilibrium: Motives
+    usage_share: float
+
+
+def _with_parameters(base: ItemDefinition, parameters: Mapping[str, float]) -> ItemDefinition:
+    """Copy of a definition with parameters such as "effects.hunger" replaced, named after them."""
+    changes: dict[str, dict[str, float]] = {}
+    for parameter, value in parameters.items():
+        group, _, name = parameter.partition(".")
+        if group not in PARAMETER_GROUPS or not hasattr(getattr(base, group), name):
+            raise ValueError(f"Unknown item parameter '{parameter}'.")
+        changes.setdefault(group, {})[name] = value
+    label = ", ".join(f"{parameter}={value:g}" for parameter, value in parameters.items())
+    return replace(
+        base,
+        name=f"{base.name} [{label}]",
+        **{group: replace(getattr(base, group), **values) for group, values in changes.items()},
+    )
+
+
+def grid(base: ItemDefinition, axes: Mapping[str, Sequence[float]]) -> list[ItemDefinition]:
+    """Every combination of parameter values applied to an item.
+
+    Args:
+        base (ItemDefinition): The item to vary.
+        axes (Mapping[str, Sequence[float]]): Values per parameter, named like "effects.hunger",
+            "effect_weights.health" or "personality.friendliness".
+
+    Returns:
+        list[ItemDefinition]: The variants, each named after the item and its parameters.
+    """
+    return [_with_parameters(base, dict(zip(axes, values))) for values in product(*axes.values())]
+
+
+def sample(base: ItemDefinition, ranges: Mapping[str, tuple[float, float]], count: int,
+           seed: int = 0) -> list[ItemDefinition]:
+    """Random variants of an item, with parameters drawn uniformly from ranges, see `grid`."""
+    rng = np.random.default_rng(seed)
+    draws = {parameter: rng.uniform(low, high, count).tolist() for parameter, (low, high) in ranges.items()}
+    return [_with_parameters(base, {parameter: values[index] for parameter, values in draws.items()})
+            for index in range(count)]
+
+
+def synthetic_population(size: int, seed: int = 0, trait_mean: float | Sequence[float] = 5.0,
+                         trait_std: float | Sequence[float] = 2.5) -> PetPopulation:
+    """Idle pets with normally distributed traits, rounded and clipped to 0-10, and random motives.
+
+    Args:
+        size (int): The number of pets.
+        seed (int): The seed of the random draws.
+        trait_mean (float | Sequence[float]): The mean of every trait, or of each trait in `Traits` order.
+        trait_std (float | Sequence[float]): The standard deviation of every trait, or of each trait.
+    """
+    rng = np.random.default_rng(seed)
+    traits = np.clip(np.round(rng.normal(trait_mean, trait_std, (size, len(TRAIT_FIELDS)))), 0, 10)
+    population = PetPopulation(capacity=size)
+    population.extend(rng.uniform(20, 100, (size, len(MOTIVE_FIELDS))), traits)
+    return population
+
+
+def simulate_batch(catalogue: Sequence[ItemDefinition], variants: Sequence[ItemDefinition],
+                   population: PetPopulation, ticks: int, threshold: float = 0.0) -> list[SweepResult]:
+    """Try a batch of variants, each with its own copy of the population, as one population.
+
+    Args:
+        catalogue (Sequence[ItemDefinition]): The items every pet may choose.
+        variants (Sequence[ItemDefinition]): The variants, each added to the catalogue of one copy.
+        population (PetPopulation): The pets, copied for every variant.
+        ticks (int): The number of ticks simulated.
+        threshold (float): The minimum utility for a pet to start an action.
+    """
+    copies, size, items = len(variants), len(population), len(catalogue)
+    decider = UtilityDecider([*catalogue, *variants], threshold=threshold)
+    world = PetPopulation(capacity=copies * size)
+    columns = (population.motives, population.traits, population.decay)
+    world.extend(*(np.tile(column, (copies, 1)) for column in columns))
+    copy = np.repeat(np.arange(copies), size)
+
+    starved_at = np.full(len(world), -1)
+    # Item uses per copy: the catalogue's items, then the copy's variant
+    uses = np.zeros((copies, items + 1), dtype=np.int64)
+    settled = np.zeros((copies, len(MOTIVE_FIELDS)))
+    settle_from = ticks - max(ticks // 4, 1)
+    for tick in range(ticks):
+        idle = world.idle()
+        if len(idle):
+            allowed = np.zeros((len(idle), len(decider.items)), dtype=bool)
+            allowed[:, :items] = True
+            allowed[np.arange(len(idle)), items + copy[idle]] = True
+            choices = decider.choose(world.motives[idle], world.traits[idle], world.decay[idle], allowed)
+            world.start_sleep(idle[choices == SLEEP])
+            for index in np.unique(choices[choices >= 0]).tolist():
+                selected = idle[choices == index]
+                item = decider.items[index]
+                if "edible" in item.tags:
+                    world.start_eat(selected, item)
+                else:
+                    world.start_play(selected, item)
+                uses[:, min(index, items)] += np.bincount(copy[selected], minlength=copies)
+        world.tick()
+
+        starving = (world.motives[:, HUNGER] <= 0) & (starved_at < 0)
+        starved_at[starving] = tick + 1
+        if tick >= settle_from:
+            settled += world.motives.reshape(copies, size, -1).mean(axis=1)
+
+    settled /= ticks - settle_from
+    starved_at = starved_at.reshape(copies, size)
+    results = []
+    for index, variant in enumerate(variants):
+        starved = starved_at[index][starved_at[index] >= 0]
+        total = uses[index].sum()
+        results.append(SweepResult(
+            variant=variant,
+            starved=len(starved) / size,
+            time_to_starvation=float(np.median(starved)) if len(starved) else float("nan"),
+            equilibrium=Motives(**dict(zip(MOTIVE_FIELDS, settled[index].tolist()))),
+            usage_share=float(uses[index, items] / total) if total else 0.0,
+        ))
+    return results
+
+
+# Sweep settings of a worker process, set up by `_setup`
+_settings: dict = {}
+
+
+def _setup(catalogue: list[ItemDefinition], population: PetPopulation, ticks: int, threshold: float) -> None:
+    """Pool initializer receiving the settings shared by every batch once."""
+    _settings.update(catalogue=catalogue, population=population, ticks=ticks, threshold=threshold)
+
+
+def _simulate(variants: list[ItemDefinition]) -> list[SweepResult]:
+    return simulate_batch(variants=variants, **_settings)
+
+
+def run_sweep(catalogue: Sequence[ItemDefinition], target: str, variants: Sequence[ItemDefinition],
+              population: PetPopulation, ticks: int, workers: int | None = None, batch_size: int = 8,
+              threshold: float = 0.0) -> list[SweepResult]:
+    """Try every variant of an item in place of the item in a catalogue.
+
+    Args:
+        catalogue (Sequence[ItemDefinition]): The items the pets choose from, edible or playable.
+        target (str): The name of the item replaced by the variants.
+        variants (Sequence[ItemDefinition]): The variants, with distinct names, see `grid` and `sample`.
+        population (PetPopulation): The synthetic pets, see `synthetic_population`.
+        ticks (int): The number of ticks simulated for each variant.
+        workers (int | None): The number of worker processes, or None to run in this process.
+        batch_size (int): The number of variants simulated together. Every pet of a batch is
+            scored against every variant of the batch, so large batches waste work.
+        threshold (float): The minimum utility for a pet to start an action.
+
+    Returns:
+        list[SweepResult]: The result of every variant, in order.
+    """
+    others = [item for item in catalogue if item.name != target]
+    names = {item.name for item in others}
+    for variant in variants:
+        if variant.name in names:
+            raise ValueError(f"The variant name '{variant.name}' is already used.")
+        names.add(variant.name)
+
+    batches = [list(variants[start:start + batch_size]) for start in range(0, len(variants), batch_size)]
+    if workers is None:
+        _setup(others, population, ticks, threshold)
+        try:
+            return [result for batch in batches for result in _simulate(batch)]
+        finally:
+            _settings.clear()
+    with multiprocessing.Pool(workers, initializer=_setup, initargs=(others, population, ticks, threshold)) as pool:
+        return [result for results in pool.imap(_simulate, batches) for result in results]
+
+
+__all__ = ["SweepResult", "grid", "sample", "synthetic_population", "simulate_batch", "run_sweep"]
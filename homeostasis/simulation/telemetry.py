@@ -0,0 +1,181 @@
+"""Motive histories of a population, kept in bounded columnar ring buffers.
+
+A `MotiveRecorder` is opt-in: it records nothing until `record` is called, typically after
+every tick of a `PetPopulation`. It keeps two tiers of history, each a ring buffer with
+one (ticks x pets) column per motive:
+
+- the last `recent` ticks, at full resolution;
+- the last `windows` windows of `window` ticks, as the minimum, maximum and mean of every
+  pet's motives over each window.
+
+Memory is allocated once and never grows, however long the simulation runs. Since every
+motive is a separate column ordered by tick, "every pet's hunger over the last N ticks"
+is a slice of one column, or two slices where the ring wraps around.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from os import PathLike
+
+import numpy as np
+
+from homeostasis.pet import Pet
+from homeostasis.simulation.population import MOTIVE_FIELDS
+
+STATS = ("min", "max", "mean")
+
+
+class _Ring:
+    """Fixed-capacity ring of (channels x width) rows, stored as (channels x capacity x width)."""
+    def __init__(self, channels: int, capacity: int, width: int, dtype: np.dtype) -> None:
+        if capacity <= 0:
+            raise ValueError("A ring buffer needs a capacity of at least 1.")
+        self.data = np.zeros((channels, capacity, width), dtype=dtype)
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.data.shape[1]
+
+    def push(self, rows: np.ndarray) -> None:
+        self.data[:, self.count % self.capacity] = rows
+        self.count += 1
+
+    def last(self, channel: int, n: int) -> np.ndarray:
+        """The last `n` rows of a channel, oldest first: a view unless the ring wraps within them."""
+        n = max(0, min(n, self.count, self.capacity))
+        end = (self.count - 1) % self.capacity + 1 if self.count else 0
+        column = self.data[channel]
+        if n <= end:
+            return column[end - n:end]
+        return np.concatenate((column[end - n:], column[:end]))
+
+
+class MotiveRecorder:
+    """Opt-in recorder of the motives of a fixed number of pets, see the module documentation.
+
+    The recorder keeps `recent` ticks at full resolution and `windows` windows of `window`
+    ticks, stored as `dtype`.
+
+    Attributes:
+        pets (int): The number of pets recorded.
+        window (int): The number of ticks summarized by each downsampled window.
+        start (int): The tick of the first recorded row.
+    """
+    def __init__(self, pets: int, recent: int = 256, window: int = 16, windows: int = 1024,
+                 dtype: np.dtype = np.float32, start: int = 0) -> None:
+        if window <= 0:
+            raise ValueError("A window needs at least 1 tick.")
+        self.pets = pets
+        self.window = window
+        self.start = start
+        self._recent = _Ring(len(MOTIVE_FIELDS), recent, pets, dtype)
+        # Channel `stat * 6 + motive` holds one statistic of one motive
+        self._windows = _Ring(len(STATS) * len(MOTIVE_FIELDS), windows, pets, dtype)
+        self._low = np.full((len(MOTIVE_FIELDS), pets), np.inf)
+        self._high = np.full((len(MOTIVE_FIELDS), pets), -np.inf)
+        self._sum = np.zeros((len(MOTIVE_FIELDS), pets))
+        self._filled = 0
+
+    @property
+    def ticks(self) -> int:
+        """The number of ticks recorded."""
+        return self._recent.count
+
+    @property
+    def windows(self) -> int:
+        """The number of complete downsampled windows recorded."""
+        return self._windows.count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the recorder's buffers, fixed at creation."""
+        return sum(array.nbytes for array in (
+            self._recent.data, self._windows.data, self._low, self._high, self._sum,
+        ))
+
+    def record(self, motives: np.ndarray) -> None:
+        """Record one tick of an (N x 6) motives matrix, such as `PetPopulation.motives`."""
+        if motives.shape != (self.pets, len(MOTIVE_FIELDS)):
+            raise ValueError(f"Expected motives of shape {(self.pets, len(MOTIVE_FIELDS))}, got {motives.shape}.")
+        rows = motives.T
+        self._recent.push(rows)
+        np.minimum(self._low, rows, out=self._low)
+        np.maximum(self._high, rows, out=self._high)
+        self._sum += rows
+        self._filled += 1
+        if self._filled == self.window:
+            self._windows.push(np.concatenate((self._low, self._high, self._sum / self.window)))
+            self._low.fill(np.inf)
+            self._high.fill(-np.inf)
+            self._sum.fill(0)
+            self._filled = 0
+
+    def record_pets(self, pets: Iterable[Pet]) -> None:
+        """Record one tick of the motives of `Pet` objects, in a fixed order."""
+        self.record(np.array([
+            [getattr(pet.motives, stat) for stat in MOTIVE_FIELDS] for pet in pets
+        ], dtype=float).reshape(-1, len(MOTIVE_FIELDS)))
+
+    def recent(self, motive: str, ticks: int) -> np.ndarray:
+        """Get every pet's value of a motive over the last ticks at full resolution.
+
+        Args:
+            motive (str): The name of the motive, e.g. "hunger".
+            ticks (int): The number of ticks, clipped to the ticks kept.
+
+        Returns:
+            np.ndarray: A (ticks x pets) array, oldest tick first.
+        """
+        return self._recent.last(MOTIVE_FIELDS.index(motive), ticks)
+
+    def history(self, motive: str, windows: int) -> dict[str, np.ndarray]:
+        """Get the downsampled statistics of a motive over the last complete windows.
+
+        Args:
+            motive (str): The name of the motive, e.g. "hunger".
+            windows (int): The number of windows, clipped to the windows kept.
+
+        Returns:
+            dict[str, np.ndarray]: A (windows x pets) array per statistic of `STATS`, oldest window first.
+        """
+        column = MOTIVE_FIELDS.index(motive)
+        return {
+            stat: self._windows.last(index * len(MOTIVE_FIELDS) + column, windows)
+            for index, stat in enumerate(STATS)
+        }
+
+    def export(self, path: str | PathLike) -> None:
+        """Write every tick and window kept to a compressed `.npz` file, one array per column.
+
+        Columns are named "recent/<motive>" and "<stat>/<motive>", with rows ordered from
+        the oldest tick or window. `load_telemetry` reads the file back.
+        """
+        columns = {}
+        for motive in MOTIVE_FIELDS:
+            columns[f"recent/{motive}"] = self.recent(motive, self.ticks)
+            for stat, values in self.history(motive, self.windows).items():
+                columns[f"{stat}/{motive}"] = values
+        ticks_kept = min(self.ticks, self._recent.capacity)
+        windows_kept = min(self.windows, self._windows.capacity)
+        np.savez_compressed(
+            path,
+            recent_start=np.array(self.start + self.ticks - ticks_kept),
+            windows_start=np.array(self.start + (self.windows - windows_kept) * self.window),
+            window=np.array(self.window),
+            **columns,
+        )
+
+
+def load_telemetry(path: str | PathLike) -> dict[str, np.ndarray]:
+    """Read a file written by `MotiveRecorder.export`.
+
+    Returns:
+        dict[str, np.ndarray]: The columns, plus "recent_start" and "windows_start", the
+            ticks of the first full-resolution row and of the first window, and "window".
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+__all__ = ["MotiveRecorder", "load_telemetry", "STATS"]
@@ -0,0 +1,511 @@
+"""Binary snapshots of pets and item instances.
+
+A snapshot file is made of a header, the table of item names referenced by the records,
+then fixed-width pet records, fixed-width item instance records and the fixed-width
+records of the actions queued by the pets. Each pet record holds the current action and
+its priority, and the position and number of the pet's queued actions. Records refer to
+item definitions by their index in the name table, which holds the names of the item
+registry at the time of writing, and are resolved against the registry again when a
+record is decoded. Fixed-width records let `Snapshot` memory-map the file and decode any
+pet on demand, so opening a snapshot costs the same whatever its size.
+
+`write_snapshot` writes to a temporary file that then replaces the snapshot, so a crash
+while writing leaves the previous snapshot whole and readers that mapped it unaffected.
+
+A `SocialAction` is stored as the index of the partner among the snapshot's pets, and
+its compatibility is computed again from the two personalities when it is decoded.
+
+A `DeltaLog` is an append-only file of pet records, each followed by the pet's queued
+actions, written between full snapshots. Opening a snapshot with its delta log makes the
+latest logged record of each pet take precedence.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from os import PathLike
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS, ItemInstance
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import Action, EatAction, PlayAction, Priority, SleepAction
+from homeostasis.simulation.changes import action_item
+from homeostasis.simulation.social import SocialAction
+
+MAGIC = b"HMSS"
+DELTA_MAGIC = b"HMSD"
+VERSION = 3
+
+# magic, version, name count, pet count, item count, offset of the first pet record
+HEADER = struct.Struct("<4sHxxIIIQ")
+DELTA_HEADER = struct.Struct("<4sHxx")
+NAME_LENGTH = struct.Struct("<H")
+# name, style, age, traits, motives, decay rates, current action kind, its priority, remaining ticks,
+# item index and item durability, index of the first queued action, number of queued actions.
+# Social actions hold the partner's pet index in place of the item index.
+PET_RECORD = struct.Struct("<32s16si4i6d4dBBiiiII")
+# action kind, priority, whether the action was preempted, remaining ticks, item or partner index, item durability
+QUEUED_ACTION = struct.Struct("<BB?iii")
+# item index, durability
+ITEM_RECORD = struct.Struct("<ii")
+# pet index
+DELTA_PET = struct.Struct("<I")
+DELTA_NAME_ENTRY = b"N"
+DELTA_PET_ENTRY = b"P"
+
+NO_ACTION, SLEEP, EAT, PLAY, SOCIAL = range(5)
+NO_ITEM = -1
+
+
+class SnapshotError(Exception):
+    """The file is not a snapshot this version can read, or refers to an item that is not registered."""
+    pass
+
+
+def _encode_text(text: str, size: int, field: str) -> bytes:
+    encoded = text.encode()
+    if len(encoded) > size:
+        raise ValueError(f"The {field} '{text}' does not fit in {size} bytes.")
+    return encoded
+
+
+def _decode_text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode()
+
+
+class _NameTable:
+    """Item names referenced by records, and their indices."""
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.names: list[str] = list(names)
+        self._indices = {name: index for index, name in enumerate(self.names)}
+
+    def index(self, name: str) -> int | None:
+        return self._indices.get(name)
+
+    def add(self, name: str) -> int:
+        self._indices[name] = len(self.names)
+        self.names.append(name)
+        return self._indices[name]
+
+
+def _actions(pet: Pet) -> Iterator[Action]:
+    """Get the current action of a pet, if any, then its queued actions."""
+    if pet.current_action is not None:
+        yield pet.current_action
+    for _, action, _ in pet.queued_entries:
+        yield action
+
+
+def _partner_index(pet: Pet, action: SocialAction, indices: Mapping[Pet, int] | None) -> int:
+    """Get the pet index of a social action's partner, checking that the action can be decoded again."""
+    partner = None if indices is None else indices.get(action.partner)
+    if partner is None:
+        raise ValueError(f"The partner of '{pet.info.name}' is not one of the pets written.")
+    if action.compatibility != Traits.get_compatibility(pet.personality, action.partner.personality):
+        raise ValueError(f"The social action of '{pet.info.name}' does not match the partners' compatibility.")
+    return partner
+
+
+def _pack_action(pet: Pet, action: Action | None, names: _NameTable,
+                 indices: Mapping[Pet, int] | None) -> tuple[int, int, int, int]:
+    """Encode an action of a pet as its kind, remaining ticks, item or partner index and item durability."""
+    kind, item, partner = NO_ACTION, None, NO_ITEM
+    if isinstance(action, SleepAction):
+        kind = SLEEP
+    elif isinstance(action, EatAction):
+        kind, item = EAT, action.food_item
+    elif isinstance(action, PlayAction):
+        kind, item = PLAY, action.play_item
+    elif isinstance(action, SocialAction):
+        kind, partner = SOCIAL, _partner_index(pet, action, indices)
+    elif action is not None:
+        raise TypeError(f"Cannot snapshot the action '{action.name}'.")
+    return (
+        kind,
+        0 if action is None else action.remaining_ticks,
+        partner if item is None else names.index(item.definition.name),
+        0 if item is None else item.durability,
+    )
+
+
+def _pack_pet(pet: Pet, names: _NameTable, indices: Mapping[Pet, int] | None = None, queue_start: int = 0) -> bytes:
+    """Encode a pet as a fixed-width record. Item names must already be in `names`.
+
+    Args:
+        pet (Pet): The pet.
+        names (_NameTable): The item names of the file.
+        indices (Mapping[Pet, int] | None): The index of every pet of the snapshot, needed
+            to encode a social action's partner.
+        queue_start (int): The index of the first queued action of the pet among the queued
+            actions of the snapshot.
+    """
+    # A lazy pet is brought up to date before any of its fields is read
+    pet.catch_up()
+    kind, remaining, item, durability = _pack_action(pet, pet.current_action, names, indices)
+    personality, motives, decay = pet.personality, pet.motives, pet.decay
+    return PET_RECORD.pack(
+        _encode_text(pet.info.name, 32, "pet name"),
+        _encode_text(pet.info.style, 16, "pet style"),
+        pet.info.age,
+        personality.friendliness, personality.playfulness, personality.laziness, personality.curiosity,
+        motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+        decay.happiness_decay, decay.energy_decay, decay.social_decay, decay.hunger_decay,
+        kind,
+        pet.current_priority,
+        remaining,
+        item,
+        durability,
+        queue_start,
+        pet.queued_count,
+    )
+
+
+def _pack_queue(pet: Pet, names: _NameTable, indices: Mapping[Pet, int] | None = None) -> bytes:
+    """Encode the queued actions of a pet, in the order they will start. Item names must already be in `names`."""
+    records = []
+    for priority, action, preempted in pet.queued_entries:
+        kind, remaining, item, durability = _pack_action(pet, action, names, indices)
+        records.append(QUEUED_ACTION.pack(kind, priority, preempted, remaining, item, durability))
+    return b"".join(records)
+
+
+def _unpack_pet(buffer, offset: int) -> Pet:
+    """Decode a pet record without its actions, see `_unpack_actions`."""
+    fields = PET_RECORD.unpack_from(buffer, offset)
+    name, style, age = fields[:3]
+    return Pet(
+        info=PetSpec(name=_decode_text(name), age=age, style=_decode_text(style)),
+        personality=Traits(*fields[3:7]),
+        motives=Motives(*fields[7:13]),
+        decay=PetDecayRates(*fields[13:17]),
+    )
+
+
+def _unpack_actions(pet: Pet, buffer, offset: int, queue_offset: int | None, names: list[str],
+                    partner: Callable[[int], Pet]) -> None:
+    """Restore the current and queued actions of a pet record, resolving item names through the item registry.
+
+    Args:
+        pet (Pet): The pet decoded from the record.
+        buffer: The buffer holding the record.
+        offset (int): The offset of the record.
+        queue_offset (int | None): The offset of the queued actions of the snapshot, or None
+            if the queued actions of the pet follow its record, as in a delta log.
+        names (list[str]): The item names of the file.
+        partner (Callable[[int], Pet]): Decodes the pet at an index, the partner of a social action.
+
+    Raises:
+        SnapshotError: If the queued actions are cut short, or an item is not registered.
+    """
+    kind, priority, remaining, item, durability, queue_start, queued = PET_RECORD.unpack_from(buffer, offset)[17:]
+    if queue_offset is None:
+        queue_offset = offset + PET_RECORD.size
+    else:
+        queue_offset += queue_start * QUEUED_ACTION.size
+    if queue_offset + queued * QUEUED_ACTION.size > len(buffer):
+        raise SnapshotError(f"Truncated queued actions of the pet '{pet.info.name}'.")
+
+    action = _unpack_action(pet, kind, remaining, item, durability, names, partner)
+    if action is not None:
+        pet.queue_action(action, Priority(priority))
+    entries = []
+    for kind, priority, preempted, remaining, item, durability in QUEUED_ACTION.iter_unpack(
+            buffer[queue_offset:queue_offset + queued * QUEUED_ACTION.size]):
+        entries.append((
+            Priority(priority), _unpack_action(pet, kind, remaining, item, durability, names, partner), preempted,
+        ))
+    pet.restore_queue(entries)
+
+
+def _unpack_action(pet: Pet, kind: int, remaining: int, item_index: int, durability: int, names: list[str],
+                   partner: Callable[[int], Pet]) -> Action | None:
+    """Decode an action of a pet encoded by `_pack_action`."""
+    action: Action | None = None
+    if kind == SLEEP:
+        action = SleepAction()
+    elif kind in (EAT, PLAY):
+        item = _restore_item(names, item_index, durability)
+        action = EatAction(item) if kind == EAT else PlayAction(item)
+    elif kind == SOCIAL:
+        other = partner(item_index)
+        action = SocialAction(other, Traits.get_compatibility(pet.personality, other.personality))
+    if action is not None:
+        action.remaining_ticks = remaining
+    return action
+
+
+def _restore_item(names: list[str], item_index: int, durability: int) -> ItemInstance:
+    """Spawn an instance of the item at `item_index` of the name table.
+
+    Raises:
+        SnapshotError: If the index is out of the table, or the item is not registered.
+    """
+    if not 0 <= item_index < len(names):
+        raise SnapshotError(f"Corrupted item index {item_index}.")
+    definition = ITEMS.get(names[item_index])
+    if definition is None:
+        raise SnapshotError(f"The item '{names[item_index]}' is not registered.")
+    item = definition.spawn()
+    item.durability = durability
+    return item
+
+
+def _item_names(pets: Iterable[Pet], items: Iterable[ItemInstance]) -> _NameTable:
+    """Name table of the item registry, extended with any unregistered names referenced."""
+    names = _NameTable(ITEMS)
+    used = []
+    for pet in pets:
+        pet.catch_up()
+        used.extend(action_item(action) for action in _actions(pet))
+    for item in [*used, *items]:
+        if item is not None and names.index(item.definition.name) is None:
+            names.add(item.definition.name)
+    return names
+
+
+def write_snapshot(path: str | PathLike, pets: list[Pet], items: list[ItemInstance] = ()) -> None:
+    """Write a full snapshot of pets and free-standing item instances.
+
+    Items whose definitions are not registered are written by name, and must be registered
+    under that name before the snapshot is decoded.
+
+    Args:
+        path (str | PathLike): The file to write.
+        pets (list[Pet]): The pets, restored in the same order.
+        items (list[ItemInstance]): Item instances that are not held by a pet's action.
+    """
+    names = _item_names(pets, items)
+    encoded_names = b"".join(
+        NAME_LENGTH.pack(len(encoded)) + encoded for encoded in (name.encode() for name in names.names)
+    )
+    # Align the records to 8 bytes
+    pets_offset = -(-(HEADER.size + len(encoded_names)) // 8) * 8
+
+    # A new file, created with the permissions `open` would give it, replaces the snapshot once complete
+    temporary = f"{os.fspath(path)}.{os.urandom(4).hex()}.tmp"
+    try:
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(names.names), len(pets), len(items), pets_offset))
+            file.write(encoded_names)
+            file.write(b"\0" * (pets_offset - HEADER.size - len(encoded_names)))
+            indices = {pet: index for index, pet in enumerate(pets)}
+            queue_start = 0
+            for pet in pets:
+                file.write(_pack_pet(pet, names, indices, queue_start))
+                queue_start += pet.queued_count
+            for item in items:
+                file.write(ITEM_RECORD.pack(names.index(item.definition.name), item.durability))
+            for pet in pets:
+                file.write(_pack_queue(pet, names, indices))
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
+class DeltaLog:
+    """Append-only log of pet records written between full snapshots.
+
+    The log carries its own table of item names, appended as new names are referenced.
+    """
+    def __init__(self, path: str | PathLike) -> None:
+        self._file = open(path, "ab+")
+        self._file.seek(0)
+        data = self._file.read()
+        names, _, end = _read_delta_log(data)
+        self._names = _NameTable(names)
+        if end < len(data):
+            # Drop an entry torn by a crash so that new entries stay aligned
+            self._file.truncate(end)
+        if end == 0:
+            self._file.write(DELTA_HEADER.pack(DELTA_MAGIC, VERSION))
+
+    def __enter__(self) -> DeltaLog:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, index: int, pet: Pet, indices: Mapping[Pet, int] | None = None) -> None:
+        """Record the new state of the pet at `index` of the snapshot.
+
+        Args:
+            index (int): The index of the pet in the snapshot.
+            pet (Pet): The pet.
+            indices (Mapping[Pet, int] | None): The index of every pet of the snapshot,
+                needed if the pet is in a social action.
+        """
+        pet.catch_up()
+        for action in _actions(pet):
+            item = action_item(action)
+            if item is not None and self._names.index(item.definition.name) is None:
+                encoded = item.definition.name.encode()
+                self._file.write(DELTA_NAME_ENTRY + NAME_LENGTH.pack(len(encoded)) + encoded)
+                self._names.add(item.definition.name)
+        self._file.write(
+            DELTA_PET_ENTRY + DELTA_PET.pack(index) + _pack_pet(pet, self._names, indices)
+            + _pack_queue(pet, self._names, indices)
+        )
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _read_delta_log(data: bytes) -> tuple[list[str], dict[int, int], int]:
+    """Parse a delta log.
+
+    Returns:
+        tuple[list[str], dict[int, int], int]: The log's item names, the offset of the latest
+            record of every logged pet index, and the end of the last complete entry.
+    """
+    if not data:
+        return [], {}, 0
+    if len(data) < DELTA_HEADER.size:
+        raise SnapshotError("Truncated delta log header.")
+    magic, version = DELTA_HEADER.unpack_from(data)
+    if magic != DELTA_MAGIC or version != VERSION:
+        raise SnapshotError(f"Unsupported delta log (magic {magic!r}, version {version}).")
+
+    names: list[str] = []
+    latest: dict[int, int] = {}
+    end = DELTA_HEADER.size
+    while end < len(data):
+        entry, offset = data[end:end + 1], end + 1
+        if entry == DELTA_NAME_ENTRY:
+            if offset + NAME_LENGTH.size > len(data):
+                break
+            (length,) = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size + length
+            if offset > len(data):
+                break
+            names.append(data[offset - length:offset].decode())
+        elif entry == DELTA_PET_ENTRY:
+            if offset + DELTA_PET.size + PET_RECORD.size > len(data):
+                break
+            (index,) = DELTA_PET.unpack_from(data, offset)
+            record = offset + DELTA_PET.size
+            queued = PET_RECORD.unpack_from(data, record)[-1]
+            offset = record + PET_RECORD.size + queued * QUEUED_ACTION.size
+            if offset > len(data):
+                break
+            latest[index] = record
+        else:
+            raise SnapshotError(f"Corrupted delta log entry at offset {end}.")
+        end = offset
+    return names, latest, end
+
+
+class Snapshot:
+    """Memory-mapped snapshot decoding pets and item instances on demand.
+
+    Item names are resolved against the item registry when a record is decoded.
+
+    Raises:
+        SnapshotError: If the file is not a snapshot, or is too short for the records its
+            header announces. The queued actions of a pet are checked when it is decoded.
+    """
+    def __init__(self, path: str | PathLike, delta_log: str | PathLike | None = None) -> None:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise SnapshotError("Truncated snapshot header.")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except BaseException:
+            self._map.close()
+            raise
+
+        self._deltas = b""
+        self._delta_names: list[str] = []
+        self._latest: dict[int, int] = {}
+        if delta_log is not None:
+            with open(delta_log, "rb") as file:
+                self._deltas = file.read()
+            self._delta_names, self._latest, _ = _read_delta_log(self._deltas)
+
+    def _read_header(self) -> None:
+        """Read the header and the name table, and check that the file holds the records they announce."""
+        magic, version, name_count, self.pet_count, self.item_count, self._pets_offset = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot (magic {magic!r}, version {version}).")
+
+        self.names: list[str] = []
+        offset = HEADER.size
+        for _ in range(name_count):
+            if offset + NAME_LENGTH.size > len(self._map):
+                raise SnapshotError("Truncated snapshot name table.")
+            (length,) = NAME_LENGTH.unpack_from(self._map, offset)
+            offset += NAME_LENGTH.size + length
+            if offset > len(self._map):
+                raise SnapshotError("Truncated snapshot name table.")
+            self.names.append(self._map[offset - length:offset].decode())
+        if self._pets_offset < offset:
+            raise SnapshotError("Corrupted snapshot: the pet records overlap the name table.")
+        self._items_offset = self._pets_offset + self.pet_count * PET_RECORD.size
+        self._queues_offset = self._items_offset + self.item_count * ITEM_RECORD.size
+        if self._queues_offset > len(self._map):
+            raise SnapshotError(
+                f"Truncated snapshot: {self.pet_count} pets and {self.item_count} items need "
+                f"{self._queues_offset} bytes, the file has {len(self._map)}."
+            )
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.pet_count
+
+    def pet(self, index: int) -> Pet:
+        """Decode the pet at `index`, taking its latest delta log record into account.
+
+        The partner of a social action is decoded along with the pet.
+        """
+        return self._decode(index, {})
+
+    def _decode(self, index: int, decoded: dict[int, Pet]) -> Pet:
+        """Decode a pet, or get it from the pets already decoded, so that partners refer to each other."""
+        pet = decoded.get(index)
+        if pet is not None:
+            return pet
+        if not 0 <= index < self.pet_count:
+            raise IndexError(f"Pet index {index} out of range.")
+        buffer, offset, queue_offset, names = self._deltas, self._latest.get(index), None, self._delta_names
+        if offset is None:
+            buffer, offset, queue_offset, names = \
+                self._map, self._pets_offset + index * PET_RECORD.size, self._queues_offset, self.names
+        decoded[index] = pet = _unpack_pet(buffer, offset)
+        _unpack_actions(pet, buffer, offset, queue_offset, names, lambda partner: self._decode(partner, decoded))
+        return pet
+
+    def pets(self) -> Iterator[Pet]:
+        """Decode every pet in order, with social partners referring to the pets returned."""
+        decoded: dict[int, Pet] = {}
+        for index in range(self.pet_count):
+            yield self._decode(index, decoded)
+
+    def item(self, index: int) -> ItemInstance:
+        """Decode the free-standing item instance at `index`."""
+        if not 0 <= index < self.item_count:
+            raise IndexError(f"Item index {index} out of range.")
+        item_index, durability = ITEM_RECORD.unpack_from(self._map, self._items_offset + index * ITEM_RECORD.size)
+        return _restore_item(self.names, item_index, durability)
+
+    def items(self) -> Iterator[ItemInstance]:
+        """Decode every free-standing item instance in order."""
+        for index in range(self.item_count):
+            yield self.item(index)
+
+    def close(self) -> None:
+        self._map.close()
@@ -0,0 +1,11 @@
+import pytest
+
+from homeostasis.items.food import register_food_items
+from homeostasis.items.play import register_play_items
+
+
+@pytest.fixture(scope="session", autouse=True)
+def catalogue():
+    """Register the built-in food and play items once for every test."""
+    register_food_items()
+    register_play_items()
@@ -0,0 +1,126 @@
+import copy
+import random
+
+import pytest
+
+from homeostasis.common import Motives, Traits, advance_value
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, EatAction, PlayAction, Priority, SleepAction
+
+NUMBERS = (0, 1, 2, 3, 0.5, 0.25, 0.1, 0.3, 1e-3, 2.75)
+
+
+def _step_value(value: float, deltas: list[float], ticks: int, until: float | None) -> tuple[float, int, bool]:
+    """`advance_value` one addition at a time."""
+    for applied in range(1, ticks + 1):
+        stopped = False
+        for index, delta in enumerate(deltas):
+            value = max(0, min(100, value + delta))
+            if index == 0 and until is not None and value >= until:
+                stopped = True
+        if stopped:
+            return value, applied, True
+    return value, ticks, False
+
+
+def _number(rng: random.Random, low: float, high: float) -> float:
+    return rng.choice([rng.randint(int(low), int(high)), rng.uniform(low, high), round(rng.uniform(low, high)) / 4])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_advance_value_matches_adding_one_delta_at_a_time(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        value = _number(rng, -10, 110)
+        deltas = [rng.choice([-1, 1]) * rng.choice([*NUMBERS, _number(rng, 0, 5)]) for _ in range(rng.randint(0, 3))]
+        ticks = rng.choice([0, 1, 2, rng.randint(0, 100), rng.randint(0, 2000)])
+        until = rng.choice([None, _number(rng, 0, 100)])
+        assert advance_value(value, deltas, ticks, until) == _step_value(value, deltas, ticks, until)
+
+
+def _random_pet(rng: random.Random) -> Pet:
+    """A random pet with a random, possibly finished or doomed, action and a few queued ones."""
+    pet = Pet(
+        PetSpec("Buddy", 3, "Casual"), Traits(*(rng.randint(0, 10) for _ in range(4))),
+        Motives(*(rng.choice([rng.randint(0, 100), rng.uniform(0, 100)]) for _ in range(6))),
+        PetDecayRates(*(rng.choice([0, 1, 2, 0.5, 0.3, 0.1]) for _ in range(4))),
+    )
+    for _ in range(rng.randint(0, 3)):
+        if rng.random() < 0.3:
+            action = SleepAction()
+        else:
+            definition = rng.choice(list(ITEMS.values()))
+            item = definition.spawn()
+            item.durability = rng.randint(0, definition.max_durability)
+            action = EatAction(item) if "edible" in definition.tags else PlayAction(item)
+            action.remaining_ticks = rng.randint(0, 12)
+        pet.queue_action(action, Priority(rng.randrange(4)))
+    return pet
+
+
+def _state(pet: Pet) -> tuple:
+    action = pet.current_action
+    return (
+        pet.motives, None if action is None else (action.name, action.remaining_ticks),
+        [(priority, action.name, action.remaining_ticks) for priority, action in pet.queued_actions],
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pet_advance_matches_ticking(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        ticked = _random_pet(rng)
+        advanced = copy.deepcopy(ticked)
+        ticks = rng.randint(0, 150)
+
+        ticked_raised = advanced_raised = False
+        try:
+            for _ in range(ticks):
+                ticked.tick()
+        except ActionInterruptException:
+            ticked_raised = True
+        try:
+            advanced.advance(ticks)
+        except ActionInterruptException:
+            advanced_raised = True
+        assert advanced_raised == ticked_raised
+        assert _state(advanced) == _state(ticked)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pet_advance_cancelling_interrupted_actions_matches_ticking(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        ticked = _random_pet(rng)
+        advanced = copy.deepcopy(ticked)
+        ticks = rng.randint(0, 150)
+        for _ in range(ticks):
+            try:
+                ticked.tick()
+            except ActionInterruptException:
+                ticked.cancel_action()
+        advanced.advance(ticks, cancel_interrupted=True)
+        assert _state(advanced) == _state(ticked)
+
+
+@pytest.mark.parametrize("durability", range(-1, 6))
+@pytest.mark.parametrize("amount", range(0, 8))
+def test_item_use_in_bulk_matches_using_one_at_a_time(durability, amount):
+    bulk, single = ITEMS["Squeaky Ball"].spawn(), ITEMS["Squeaky Ball"].spawn()
+    bulk.durability = single.durability = durability
+    try:
+        bulk.use(amount)
+    except ValueError:
+        bulk_raised = True
+    else:
+        bulk_raised = False
+    single_raised = False
+    for _ in range(amount):
+        try:
+            single.use(1)
+        except ValueError:
+            single_raised = True
+            break
+    assert (bulk.durability, bulk.status, bulk_raised) == (single.durability, single.status, single_raised)
@@ -0,0 +1,67 @@
+import json
+import os
+import pickle
+import stat
+
+import pytest
+
+from homeostasis.items.catalogue import compile_catalogue, default_cache_path, iter_catalogue, source_hash
+
+RECORDS = [
+    {"name": "Squeaky Ball", "description": "A ball.", "max_durability": 5,
+     "personality": {"friendliness": 8, "playfulness": 10, "laziness": 3, "curiosity": 7},
+     "effects": {"happiness": 5, "social": 10, "energy": -15.5}, "effect_weights": {"social": 0.5},
+     "tags": ["playable", "toy"]},
+    {"name": "Ramen", "max_durability": 1,
+     "personality": {"friendliness": 1, "playfulness": 2, "laziness": 9, "curiosity": 4},
+     "effects": {"hunger": 30}, "tags": ["edible"]},
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "items.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in RECORDS))
+    path.chmod(0o644)
+    return path
+
+
+def test_cache_round_trips_items(source):
+    expected = list(iter_catalogue(source))
+    assert compile_catalogue(source) == expected
+    cache = default_cache_path(source)
+    assert json.loads(cache.read_text())["items"]
+    assert compile_catalogue(source) == expected
+
+
+def test_cache_gets_the_permissions_of_the_source(source):
+    compile_catalogue(source)
+    assert stat.S_IMODE(default_cache_path(source).stat().st_mode) == 0o644
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"\xff\xfe not text",
+    b"{not json",
+    b"[1, 2, 3]",
+    b'{"format": 2, "sha256": "SOURCE", "items": {"tag_sets": [], "rows": [[1]]}}',
+    b'{"format": 2, "sha256": "SOURCE", "items": {"tag_sets": [], "rows": [["a", "", 1, [1, 2, 3, 4], '
+    b'[0, 0, 0, 0, 0, 0], [1, 1, 1, 1, 1, 1], 3]]}}',
+    b'{"format": 2, "sha256": "SOURCE"}',
+])
+def test_undecodable_cache_is_reparsed(source, content):
+    cache = default_cache_path(source)
+    cache.write_bytes(content.replace(b"SOURCE", source_hash(source).encode()))
+    assert compile_catalogue(source) == list(iter_catalogue(source))
+
+
+def test_pickled_cache_is_never_loaded(source, tmp_path):
+    marker = tmp_path / "executed"
+
+    class Payload:
+        def __reduce__(self):
+            return os.mkdir, (str(marker),)
+
+    default_cache_path(source).write_bytes(pickle.dumps(Payload()))
+    assert compile_catalogue(source) == list(iter_catalogue(source))
+    assert not marker.exists()
@@ -0,0 +1,181 @@
+from dataclasses import astuple
+
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import EatAction, PlayAction, Priority, SleepAction
+from homeostasis.simulation.changes import Change, ChangeTracker
+
+
+def _pet(name: str = "Buddy", clock=None) -> Pet:
+    return Pet(PetSpec(name, 3, "Casual"), Traits(5, 5, 5, 5), Motives(50, 50, 50, 50, 50, 50), clock=clock)
+
+
+def _drained_flags(tracker: ChangeTracker) -> dict[int, Change]:
+    return {change.index: change.flags for change in tracker.drain_changes()}
+
+
+def test_tick_of_an_idle_pet_changes_its_motives():
+    pet = _pet()
+    tracker = ChangeTracker([pet])
+    pet.tick()
+    assert _drained_flags(tracker) == {0: Change.MOTIVES}
+
+
+def test_pet_without_decay_and_action_does_not_change_when_ticked():
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(), Motives(), PetDecayRates(0, 0, 0, 0))
+    tracker = ChangeTracker([pet])
+    pet.tick()
+    pet.advance(10)
+    assert tracker.dirty_count == 0
+    assert tracker.drain_changes() == []
+
+
+def test_advance_changes_the_motives():
+    pet = _pet()
+    tracker = ChangeTracker([pet])
+    pet.advance(5)
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.MOTIVES
+    assert change.motives == (45, 50, 45, 45, 45, 50)
+    assert change.action is change.queued is None
+
+
+def test_set_action_changes_the_action():
+    pet = _pet()
+    tracker = ChangeTracker([pet])
+    pet.set_action(SleepAction())
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.ACTION
+    assert (change.action, change.remaining_ticks, change.queued, change.durability) == \
+        ("sleep", SleepAction.MAX_SLEEP_TICKS, 0, None)
+    assert change.motives is None
+
+
+def test_queueing_and_preempting_change_the_action():
+    pet = _pet()
+    tracker = ChangeTracker([pet])
+    pet.queue_action(SleepAction())
+    tracker.drain_changes()
+
+    pet.queue_action(SleepAction(), Priority.LOW)
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.ACTION
+    assert (change.action, change.queued) == ("sleep", 1)
+
+    meal = ITEMS["Dirty Martini"].spawn()
+    pet.queue_action(EatAction(meal), Priority.URGENT)
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.ACTION
+    assert (change.action, change.queued, change.durability) == ("eat", 2, meal.durability)
+
+
+def test_cancel_action_changes_the_action():
+    pet = _pet()
+    pet.set_action(SleepAction())
+    tracker = ChangeTracker([pet])
+    pet.cancel_action()
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.ACTION
+    assert change.action is None and change.queued == 0
+
+    pet.cancel_action()
+    assert tracker.drain_changes() == []
+
+
+def test_using_an_item_changes_the_item_and_motives():
+    pet = _pet()
+    toy = ITEMS["Squeaky Ball"].spawn()
+    action = PlayAction(toy)
+    action.remaining_ticks = 3
+    pet.set_action(action)
+    tracker = ChangeTracker([pet])
+    pet.tick()
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.MOTIVES | Change.ITEM
+    assert (change.action, change.remaining_ticks, change.durability) == ("play", 2, toy.definition.max_durability - 1)
+    assert change.queued is None
+
+    pet.tick()
+    pet.tick()
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.MOTIVES | Change.ACTION | Change.ITEM
+    assert (change.action, change.durability, change.queued) == (None, None, 0)
+
+
+def test_item_used_directly_is_reported_with_mark_changed():
+    pet = _pet()
+    toy = ITEMS["Squeaky Ball"].spawn()
+    pet.set_action(PlayAction(toy))
+    tracker = ChangeTracker([pet])
+    toy.use()
+    assert tracker.dirty_count == 0
+    pet.mark_changed(Change.ITEM)
+    [change] = tracker.drain_changes()
+    assert (change.flags, change.durability) == (Change.ITEM, toy.durability)
+
+
+def test_drain_visits_only_the_dirty_pets_in_the_order_they_first_changed():
+    read: list[int] = []
+    # Lazy pets read their clock whenever they are caught up, which tells which pets the drain visits
+    pets = [_pet(f"Pet {index}", clock=lambda index=index: read.append(index) or 0) for index in range(1000)]
+    tracker = ChangeTracker(pets)
+    for index in (700, 3, 700, 512, 3):
+        pets[index].tick()
+    pets[512].set_action(SleepAction())
+    assert tracker.dirty_count == 3
+
+    read.clear()
+    changes = tracker.drain_changes()
+    assert [change.index for change in changes] == list(dict.fromkeys(read)) == [700, 3, 512]
+    assert [change.flags for change in changes] == [Change.MOTIVES, Change.MOTIVES, Change.MOTIVES | Change.ACTION]
+
+
+def test_drain_clears_the_changes():
+    pets = [_pet(f"Pet {index}") for index in range(3)]
+    tracker = ChangeTracker(pets)
+    pets[1].tick()
+    assert tracker.flags(1) == Change.MOTIVES
+    assert len(tracker.drain_changes()) == 1
+    assert tracker.dirty_count == 0
+    assert tracker.flags(1) == Change(0)
+    assert tracker.drain_changes() == []
+
+    pets[1].set_action(SleepAction())
+    assert _drained_flags(tracker) == {1: Change.ACTION}
+
+
+def test_dirty_lazy_pet_is_caught_up_by_the_drain():
+    now = 0
+    pet, twin = _pet(clock=lambda: now), _pet()
+    tracker = ChangeTracker([pet])
+    pet.set_action(SleepAction())
+    twin.set_action(SleepAction())
+    now = 10
+    twin.advance(10)
+    [change] = tracker.drain_changes()
+    assert change.flags == Change.MOTIVES | Change.ACTION
+    assert change.remaining_ticks == SleepAction.MAX_SLEEP_TICKS - 10
+    assert change.motives == (40, 50, 40, 60, 40, 50) == astuple(twin.motives)
+
+
+def test_clean_lazy_pet_is_reported_once_read():
+    now = 0
+    pet = _pet(clock=lambda: now)
+    tracker = ChangeTracker([pet])
+    now = 10
+    assert tracker.drain_changes() == []
+    assert pet.motives.hunger == 40
+    assert _drained_flags(tracker) == {0: Change.MOTIVES}
+
+
+def test_pet_cannot_be_tracked_twice():
+    pet = _pet()
+    tracker = ChangeTracker([pet])
+    with pytest.raises(ValueError):
+        tracker.track(pet)
+    with pytest.raises(ValueError):
+        ChangeTracker([pet])
+    assert len(tracker) == 1
@@ -0,0 +1,147 @@
+import gc
+import random
+import weakref
+
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import EatAction, PlayAction, Priority, SleepAction
+from homeostasis.simulation.clock import Scheduler
+
+TICKS = 400
+
+
+def _state(pet: Pet) -> tuple:
+    motives, action = pet.motives, pet.current_action
+    return (
+        motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+        None if action is None else action.name, None if action is None else action.remaining_ticks,
+        pet.queued_count,
+    )
+
+
+def _twins(rng: random.Random, clock=None) -> tuple[Pet, Pet]:
+    """The same random pet twice, the first one optionally lazy."""
+    traits = Traits(*(rng.randint(0, 10) for _ in range(4)))
+    motives = [rng.choice([rng.randint(0, 100), rng.uniform(0, 100)]) for _ in range(6)]
+    decay = [rng.choice([0, 1, 2, 0.5, 0.25]) for _ in range(4)]
+    return (
+        Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives), PetDecayRates(*decay), clock=clock),
+        Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives), PetDecayRates(*decay)),
+    )
+
+
+def _random_actions(rng: random.Random) -> dict[int, list]:
+    """Actions to issue at random ticks, as factories so that each pet gets its own item.
+
+    The first action is issued at tick 0, when the scheduler starts driving the pet.
+    """
+    food, toys = ITEMS.with_tags("edible"), ITEMS.with_tags("playable")
+    actions: dict[int, list] = {}
+    for number in range(rng.randint(1, 8)):
+        kind = rng.randrange(3)
+        if kind == 0:
+            factory = SleepAction
+        elif kind == 1:
+            factory = (lambda definition: lambda: EatAction(definition.spawn()))(rng.choice(food))
+        else:
+            factory = (lambda definition: lambda: PlayAction(definition.spawn()))(rng.choice(toys))
+        actions.setdefault(rng.randrange(TICKS) if number else 0, []).append((factory, Priority(rng.randrange(4))))
+    return actions
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_scheduler_matches_per_tick_stepping(seed, lazy):
+    rng = random.Random(seed)
+    scheduler = Scheduler()
+    pet, twin = _twins(rng, clock=scheduler.clock if lazy else None)
+    actions = _random_actions(rng)
+
+    for tick, issued in actions.items():
+        for factory, priority in issued:
+            scheduler.schedule(tick, lambda factory=factory, priority=priority:
+                               scheduler.queue_action(pet, factory(), priority))
+    checkpoints = {*rng.sample(range(TICKS), 5), TICKS}
+    for tick in range(TICKS + 1):
+        if tick:
+            twin.tick()
+        for factory, priority in actions.get(tick, ()):
+            twin.queue_action(factory(), priority)
+        if tick in checkpoints:
+            scheduler.run_until(tick)
+            scheduler.sync(pet)
+            assert _state(pet) == _state(twin)
+
+
+def test_idle_pet_keeps_decaying_after_its_action_completes():
+    scheduler = Scheduler()
+    pet, twin = _twins(random.Random(0))
+    pet.motives = Motives(50, 50, 50, 50, 50, 50)
+    twin.motives = Motives(50, 50, 50, 50, 50, 50)
+    scheduler.start_action(pet, EatAction(ITEMS["Dirty Martini"].spawn()))
+    twin.set_action(EatAction(ITEMS["Dirty Martini"].spawn()))
+    scheduler.run()
+    scheduler.run_until(60)
+    scheduler.sync(pet)
+    for _ in range(60):
+        twin.tick()
+    assert _state(pet) == _state(twin)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_motive_events_run_at_the_tick_the_level_is_reached(seed, lazy):
+    rng = random.Random(seed)
+    scheduler = Scheduler()
+    pet, twin = _twins(rng, clock=scheduler.clock if lazy else None)
+    actions = _random_actions(rng)
+    watches = [
+        (rng.choice(list(Motives.__dataclass_fields__)), rng.uniform(0, 100), rng.random() < 0.3)
+        for _ in range(4)
+    ]
+
+    reached: dict[int, int] = {}
+    for index, (motive, level, rising) in enumerate(watches):
+        scheduler.watch_motive(pet, motive, level, lambda index=index: reached.setdefault(index, scheduler.now), rising)
+    for tick, issued in actions.items():
+        for factory, priority in issued:
+            scheduler.schedule(tick, lambda factory=factory, priority=priority:
+                               scheduler.queue_action(pet, factory(), priority))
+    scheduler.run_until(TICKS)
+
+    expected: dict[int, int] = {}
+    for tick in range(TICKS + 1):
+        if tick:
+            twin.tick()
+        for index, (motive, level, rising) in enumerate(watches):
+            value = getattr(twin.motives, motive)
+            if index not in expected and (value >= level if rising else value <= level):
+                expected[index] = tick
+        for factory, priority in actions.get(tick, ()):
+            twin.queue_action(factory(), priority)
+    assert reached == expected
+
+
+def test_watch_motive_rejects_unknown_motive():
+    with pytest.raises(ValueError):
+        Scheduler().watch_motive(_twins(random.Random(0))[0], "thirst", 10, lambda: None)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_scheduler_forgets_idle_pets_nobody_refers_to(lazy):
+    scheduler = Scheduler()
+    pets = [_twins(random.Random(seed), clock=scheduler.clock if lazy else None)[0] for seed in range(3)]
+    scheduler.start_action(pets[0], SleepAction(), on_complete=lambda: None)
+    scheduler.queue_action(pets[1], EatAction(ITEMS["Dirty Martini"].spawn()), on_idle=lambda: None)
+    # A level the idle pet never reaches, which schedules no event
+    scheduler.watch_motive(pets[2], "hunger", 200, lambda: None, rising=True)
+    scheduler.run()
+    references = [weakref.ref(pet) for pet in pets]
+    del pets
+    gc.collect()
+    assert [reference() for reference in references] == [None, None, None]
+    assert not scheduler._synced and not scheduler._on_idle and not scheduler._motive_watches
+    assert not scheduler._completions and not scheduler._motive_checks
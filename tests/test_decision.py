@@ -0,0 +1,70 @@
+import random
+import tracemalloc
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.clock import Scheduler
+from homeostasis.simulation.decision import UtilityDecider
+
+
+def _catalogue(size: int) -> list:
+    items = [item for item in ITEMS.values() if {"edible", "playable"} & item.tags]
+    return [replace(items[index % len(items)], name=f"Variant {index}") for index in range(size)]
+
+
+def _pets(count: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 100, (count, 6)), rng.integers(0, 11, (count, 4)).astype(float)
+
+
+def test_scores_do_not_depend_on_the_memory_budget():
+    catalogue = _catalogue(40)
+    motives, traits = _pets(300)
+    expected = UtilityDecider(catalogue, memory_budget=1 << 30).score(motives, traits)
+    for budget in (1, 40 * 56 * 7, 1 << 20):
+        assert np.array_equal(UtilityDecider(catalogue, memory_budget=budget).score(motives, traits), expected)
+
+
+def test_scratch_memory_stays_within_budget():
+    catalogue = _catalogue(5000)
+    motives, traits = _pets(400)
+    decider = UtilityDecider(catalogue, memory_budget=8 << 20)
+    scores = np.empty((len(motives), len(catalogue) + 1))
+    tracemalloc.start()
+    try:
+        decider.score(motives, traits)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The scores themselves, plus the budget and a few per-pet arrays
+    assert peak < scores.nbytes + (8 << 20) + (1 << 20)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_driven_pet_matches_choosing_an_action_whenever_idle(seed, lazy):
+    rng = random.Random(seed)
+    decider = UtilityDecider(_catalogue(6), threshold=rng.choice([0.0, 50.0, 500.0]))
+    scheduler = Scheduler()
+    traits = Traits(*(rng.randint(0, 10) for _ in range(4)))
+    motives = [rng.uniform(0, 100) for _ in range(6)]
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives), clock=scheduler.clock if lazy else None)
+    twin = Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives))
+
+    decider.drive(scheduler, pet)
+    scheduler.run_until(300)
+    scheduler.sync(pet)
+    for tick in range(301):
+        if tick:
+            twin.tick()
+        if not twin.is_busy:
+            action = decider.choose_action(twin)
+            if action is not None:
+                twin.set_action(action)
+    assert pet.motives == twin.motives
+    assert (pet.current_action and pet.current_action.name) == (twin.current_action and twin.current_action.name)
@@ -0,0 +1,114 @@
+import json
+import random
+from dataclasses import replace
+
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS, ItemDefinition
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import Action, EatAction, PlayAction, SleepAction
+from homeostasis.simulation.instrumentation import Instrumentation, JsonLinesSink, LatencyHistogram, MemorySink
+
+
+def _hooks() -> dict[tuple[type, str], object]:
+    """The methods instrumentation wraps, as defined on their class."""
+    hooks = {(Pet, "tick"): vars(Pet)["tick"], (Pet, "advance"): vars(Pet)["advance"],
+             (Action, "tick"): vars(Action)["tick"], (ItemDefinition, "effect"): vars(ItemDefinition)["effect"],
+             (Motives, "add_stats"): vars(Motives)["add_stats"]}
+    for cls in (Action, SleepAction, EatAction, PlayAction):
+        hooks[cls, "on_tick"] = vars(cls)["on_tick"]
+    return hooks
+
+
+def test_disable_restores_the_original_methods():
+    originals = _hooks()
+    instrumentation = Instrumentation()
+    with instrumentation:
+        assert instrumentation.enabled
+        assert vars(Pet)["tick"] is not originals[Pet, "tick"]
+        assert vars(Action)["tick"] is not originals[Action, "tick"]
+    assert not instrumentation.enabled
+    assert all(_hooks()[key] is original for key, original in originals.items())
+
+
+def test_only_one_instrumentation_is_enabled_at_a_time():
+    originals = _hooks()
+    with Instrumentation():
+        with pytest.raises(RuntimeError):
+            Instrumentation().enable()
+    with Instrumentation():
+        pass
+    assert _hooks() == originals
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_histogram_buckets_bound_every_sample_within_an_eighth(seed):
+    rng = random.Random(seed)
+    for nanoseconds in [*range(64), *(rng.randrange(1 << rng.randrange(6, 40)) for _ in range(2000))]:
+        upper = LatencyHistogram._upper_bound(LatencyHistogram._bucket(nanoseconds))
+        assert nanoseconds <= upper <= nanoseconds + nanoseconds // 8
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.summary() == {"count": 0, "total_ns": 0, "mean_ns": 0.0, "p50_ns": 0, "p99_ns": 0}
+    for nanoseconds in range(1, 11):
+        histogram.record(nanoseconds)
+    assert (histogram.percentile(50), histogram.percentile(99), histogram.percentile(100)) == (5, 10, 10)
+
+    histogram = LatencyHistogram()
+    for _ in range(98):
+        histogram.record(10)
+    histogram.record(1000)
+    histogram.record(1000)
+    summary = histogram.summary()
+    assert (summary["count"], summary["total_ns"], summary["mean_ns"]) == (100, 2980, 29.8)
+    # 1000 falls in the bucket [960, 1023]
+    assert (summary["p50_ns"], summary["p99_ns"]) == (10, 1023)
+
+
+def _pet() -> Pet:
+    return Pet(PetSpec("Buddy", 3, "Casual"), Traits(1, 2, 3, 4), Motives())
+
+
+def test_counters_match_the_ticks_run():
+    pets = [_pet() for _ in range(3)]
+    pets[0].set_action(SleepAction())
+    with Instrumentation() as instrumentation:
+        for _ in range(7):
+            for pet in pets:
+                pet.tick()
+        report = instrumentation.report()
+    assert report["latencies"]["Pet.tick"]["count"] == 21
+    assert report["actions"] == {"SleepAction": 7}
+    assert report["latencies"]["SleepAction.tick"]["count"] == 7
+    assert report["latencies"]["SleepAction.on_tick"]["count"] == 7
+
+
+def test_effect_cache_hit_rate():
+    # A definition of its own has no cached effects yet
+    definition = replace(ITEMS["Dirty Martini"], name="Instrumented Martini")
+    with Instrumentation() as instrumentation:
+        for pet in [_pet() for _ in range(4)]:
+            pet.set_action(EatAction(definition.spawn()))
+            pet.tick()
+        report = instrumentation.report()
+    assert report["effect_cache"] == {"hits": 3, "misses": 1, "hit_rate": 0.75}
+    assert report["latencies"]["ItemDefinition.effect"]["count"] == 1
+
+
+def test_flush_sends_reports_to_every_sink_and_resets(tmp_path):
+    memory = MemorySink()
+    with JsonLinesSink(tmp_path / "reports.jsonl") as lines:
+        instrumentation = Instrumentation([memory, lines])
+        with instrumentation:
+            pet = _pet()
+            for ticks in (2, 5):
+                for _ in range(ticks):
+                    pet.tick()
+                instrumentation.flush()
+    assert [report["latencies"]["Pet.tick"]["count"] for report in memory.reports] == [2, 5]
+    written = [json.loads(line) for line in (tmp_path / "reports.jsonl").read_text().splitlines()]
+    assert written == memory.reports
+    assert instrumentation.report()["latencies"] == {}
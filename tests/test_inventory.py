@@ -0,0 +1,58 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from homeostasis.items.base import ITEMS
+from homeostasis.items.inventory import Inventory
+
+
+def test_per_pet_lookups_match_columns():
+    rng = np.random.default_rng(5)
+    definitions = list(ITEMS.values())
+    inventory = Inventory(200)
+    for definition in definitions:
+        inventory.grant(rng.integers(0, 200, 300), definition)
+    for _ in range(400):
+        definition = definitions[rng.integers(len(definitions))]
+        pets = np.unique(rng.integers(0, 200, 20))
+        if rng.random() < 0.5:
+            inventory.consume(pets, definition)
+        else:
+            item = inventory.take(int(pets[0]), definition)
+            if item is not None:
+                item.use(1)
+
+    counts = {definition.name: inventory.counts(definition) for definition in definitions}
+    for pet in range(200):
+        expected = {name: int(column[pet]) for name, column in counts.items() if column[pet]}
+        assert inventory.items(pet) == expected
+        for definition in definitions:
+            assert inventory.count(pet, definition) == counts[definition.name][pet]
+
+
+def test_per_pet_lookups_check_the_index():
+    inventory = Inventory(3)
+    inventory.grant(0, ITEMS["Squeaky Ball"])
+    assert inventory.count(0, ITEMS["Dirty Martini"]) == 0
+    with pytest.raises(IndexError):
+        inventory.count(3, ITEMS["Squeaky Ball"])
+    with pytest.raises(IndexError):
+        inventory.items(-1)
+
+
+def test_variants_with_the_same_name_have_their_own_columns():
+    base = ITEMS["Squeaky Ball"]
+    variant = replace(base, max_durability=2)
+    inventory = Inventory(2)
+    inventory.grant([0, 1], base)
+    inventory.grant(1, variant, 3)
+    assert (inventory.count(0, variant), inventory.count(1, variant), inventory.count(1, base)) == (0, 3, 1)
+    assert inventory.items(1) == {"Squeaky Ball": 4}
+
+    item = inventory.take(1, variant)
+    item.use(1)
+    assert (item.durability, inventory.count(1, variant)) == (1, 3)
+    assert inventory.consume(np.array([0, 1]), base).tolist() == [True, True]
+    assert inventory.take(1, base).durability == base.max_durability - 1
+    assert inventory.counts(variant).tolist() == [0, 3]
@@ -0,0 +1,47 @@
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, EatAction, Priority, SleepAction
+
+
+def _state(pet: Pet) -> tuple:
+    motives, action = pet.motives, pet.current_action
+    return (
+        motives.happiness, motives.health, motives.hunger, motives.energy, motives.social, motives.fun,
+        None if action is None else action.name, None if action is None else action.remaining_ticks,
+        pet.queued_count,
+    )
+
+
+def _consumed_meal_pet(clock=None) -> Pet:
+    """A pet eating an item already used up, with a sleep queued behind it."""
+    item = ITEMS["Dirty Martini"].spawn()
+    item.durability = 0
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(5, 3, 10, 7), Motives(50, 50, 50, 50, 50, 50), clock=clock)
+    pet.set_action(EatAction(item))
+    pet.queue_action(SleepAction(), Priority.LOW)
+    return pet
+
+
+def test_lazy_pet_cancels_interrupted_action_like_eager_world():
+    now = 0
+    lazy = _consumed_meal_pet(clock=lambda: now)
+    eager = _consumed_meal_pet()
+    for jump in (9, 1, 30, 75):
+        for _ in range(jump):
+            try:
+                eager.tick()
+            except ActionInterruptException:
+                eager.cancel_action()
+        now += jump
+        assert _state(lazy) == _state(eager)
+
+
+def test_lazy_pet_read_after_interrupt_keeps_elapsed_ticks():
+    now = 0
+    pet = _consumed_meal_pet(clock=lambda: now)
+    now = 9
+    assert pet.is_busy
+    assert pet.current_action.name == "sleep"
+    # The interrupted tick raises before the decay, like `tick` does
+    assert pet.motives.hunger == 42
@@ -0,0 +1,69 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS, ItemDefinition
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, EatAction, PlayAction, SleepAction
+from homeostasis.simulation.population import MOTIVE_FIELDS, ItemTable, PetPopulation
+
+
+def _random_pet(rng: random.Random) -> tuple[Pet, Pet]:
+    """The same random pet twice, each with its own item, busy with an action that may be done or doomed."""
+    traits = Traits(*(rng.randint(0, 10) for _ in range(4)))
+    motives = [rng.choice([rng.randint(0, 100), rng.uniform(0, 100)]) for _ in range(6)]
+    decay = [rng.choice([0, 1, 2, 0.5, 0.25]) for _ in range(4)]
+    definition = rng.choice(list(ITEMS.values()))
+    durability = rng.randint(0, 3)
+    remaining = rng.choice([0, 1, 3])
+    kind = rng.randrange(4)
+    twins = []
+    for _ in range(2):
+        pet = Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives), PetDecayRates(*decay))
+        if kind:
+            item = definition.spawn()
+            item.durability = durability
+            if kind == 1:
+                action = SleepAction()
+            else:
+                action = EatAction(item) if "edible" in definition.tags else PlayAction(item)
+            if kind == 3:
+                action.remaining_ticks = remaining
+            pet.set_action(action)
+        twins.append(pet)
+    return twins[0], twins[1]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_tick_matches_the_pet_loop(seed):
+    rng = random.Random(seed)
+    pets, twins = zip(*(_random_pet(rng) for _ in range(300)))
+    population = PetPopulation.from_pets(list(twins))
+    for _ in range(120):
+        interrupted = set()
+        for index, pet in enumerate(pets):
+            try:
+                pet.tick()
+            except ActionInterruptException:
+                pet.cancel_action()
+                interrupted.add(index)
+        assert set(population.tick().tolist()) == interrupted
+        assert population.motives.tolist() == [[getattr(pet.motives, stat) for stat in MOTIVE_FIELDS] for pet in pets]
+        assert [population.is_busy(index) for index in range(len(pets))] == [pet.is_busy for pet in pets]
+
+
+def test_item_table_tells_variants_with_the_same_name_apart():
+    base = ITEMS["Squeaky Ball"]
+    variant = ItemDefinition(
+        name=base.name, description="", max_durability=1, personality=base.personality,
+        effects=Motives(fun=base.effects.fun * 2), tags=base.tags,
+    )
+    table = ItemTable()
+    assert (table.index(base), table.index(variant), table.index(base)) == (0, 1, 0)
+    assert not np.array_equal(table.weighted_effects[0], table.weighted_effects[1])
+
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored.index(restored.definitions[1]) == 1
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS
+from homeostasis.pet import Pet, PetDecayRates, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, EatAction, PlayAction, Priority, SleepAction
+
+TICKS = 300
+
+
+def _state(pet: Pet) -> tuple:
+    # Reading the motives first brings a lazy pet up to date
+    motives, action = pet.motives, pet.current_action
+    item = getattr(action, "food_item", None) or getattr(action, "play_item", None)
+    return (
+        motives, pet.current_priority,
+        None if action is None else (action.name, action.remaining_ticks, None if item is None else item.durability),
+        [(priority, action.name, action.remaining_ticks, preempted)
+         for priority, action, preempted in pet.queued_entries],
+    )
+
+
+def _random_script(rng: random.Random) -> dict[int, list]:
+    """Commands to give at random ticks, as functions of a pet so that each pet gets its own items."""
+    definitions = list(ITEMS.values())
+    script: dict[int, list] = {}
+    for _ in range(rng.randint(1, 25)):
+        roll = rng.random()
+        if roll < 0.1:
+            command = Pet.cancel_action
+        elif roll < 0.15:
+            command = Pet.clear_queue
+        else:
+            priority = Priority(rng.randrange(4))
+            if roll < 0.4:
+                command = (lambda priority: lambda pet: pet.queue_action(SleepAction(), priority))(priority)
+            else:
+                definition = rng.choice(definitions)
+                durability = rng.randint(0, definition.max_durability)
+
+                def command(pet, definition=definition, durability=durability, priority=priority):
+                    item = definition.spawn()
+                    item.durability = durability
+                    action = EatAction(item) if "edible" in definition.tags else PlayAction(item)
+                    pet.queue_action(action, priority)
+        script.setdefault(rng.randrange(TICKS), []).append(command)
+    return script
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_lazy_and_jumping_pets_match_a_ticked_pet_with_preemption(seed):
+    rng = random.Random(seed)
+    traits = Traits(*(rng.randint(0, 10) for _ in range(4)))
+    motives = [rng.choice([rng.randint(0, 100), rng.uniform(0, 100)]) for _ in range(6)]
+    decay = [rng.choice([0, 1, 2, 0.5, 0.25]) for _ in range(4)]
+    now = 0
+    ticked, jumping, lazy = (
+        Pet(PetSpec("Buddy", 3, "Casual"), traits, Motives(*motives), PetDecayRates(*decay), clock=clock)
+        for clock in (None, None, lambda: now)
+    )
+    script = _random_script(rng)
+    # Ticks at which the lazy pet is read, and thereby caught up, without being given a command
+    reads = set(rng.sample(range(TICKS), 10))
+
+    jumped_to = 0
+    for tick in range(TICKS + 1):
+        if tick:
+            try:
+                ticked.tick()
+            except ActionInterruptException:
+                ticked.cancel_action()
+        now = tick
+        if tick in script or tick in reads or tick == TICKS:
+            jumping.advance(tick - jumped_to, cancel_interrupted=True)
+            jumped_to = tick
+            assert _state(lazy) == _state(jumping) == _state(ticked)
+        for command in script.get(tick, ()):
+            for pet in (ticked, jumping, lazy):
+                command(pet)
+
+
+def test_urgent_meal_preempts_sleep_which_resumes_where_it_stopped():
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(), Motives(50, 50, 10, 20, 50, 50))
+    pet.queue_action(SleepAction())
+    pet.advance(10)
+    energy = pet.motives.energy
+    meal = ITEMS["Dirty Martini"].spawn()
+    assert pet.queue_action(EatAction(meal), Priority.URGENT)
+    assert [(priority, action.name, action.remaining_ticks) for priority, action in pet.queued_actions] == \
+        [(Priority.NORMAL, "sleep", SleepAction.MAX_SLEEP_TICKS - 10)]
+
+    pet.tick()
+    assert meal.durability == meal.definition.max_durability - 1
+    assert pet.current_action.name == "sleep"
+    assert pet.current_action.remaining_ticks == SleepAction.MAX_SLEEP_TICKS - 10
+    assert pet.motives.energy == energy - 1
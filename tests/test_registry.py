@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+import homeostasis.items.base as base
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import FrozenRegistryError, ItemDefinition, ItemRegistry
+
+
+@pytest.fixture(scope="module")
+def registry() -> ItemRegistry:
+    rng = random.Random(8)
+    registry = ItemRegistry()
+    for index in range(3000):
+        tags = {"all"} | {tag for tag, share in (("rare", 0.01), ("common", 0.4)) if rng.random() < share}
+        registry.register(ItemDefinition(
+            name=f"Item {index}", description="", max_durability=1,
+            personality=Traits(*(rng.randint(0, 10) for _ in range(4))), effects=Motives(), tags=frozenset(tags),
+        ))
+    return registry
+
+
+def _brute_force(registry: ItemRegistry, personality: Traits, k: int, query: str) -> list[ItemDefinition]:
+    candidates = [item for item in registry.values() if query in item.tags]
+    ranked = sorted(
+        candidates,
+        key=lambda item: (-Traits.get_compatibility(item.personality, personality), registry.index(item.name)),
+    )
+    return ranked[:k]
+
+
+@pytest.mark.parametrize("scan_ratio", [0, 10 ** 9], ids=["walk", "scan"])
+@pytest.mark.parametrize("query", ["rare", "common", "all"])
+@pytest.mark.parametrize("k", [1, 7, 60])
+def test_most_compatible_matches_brute_force(registry, monkeypatch, scan_ratio, query, k):
+    monkeypatch.setattr(base, "_SCAN_RATIO", scan_ratio)
+    rng = random.Random(k)
+    for _ in range(20):
+        personality = Traits(*(rng.randint(0, 10) for _ in range(4)))
+        assert registry.most_compatible(personality, k, query) == _brute_force(registry, personality, k, query)
+
+
+def test_select_returns_items_in_index_order(registry):
+    bits = registry.query_bits("rare")
+    assert registry.select(bits) == [item for item in registry.values() if "rare" in item.tags]
+    assert registry.select(0) == []
+
+
+def _toy(effects: Motives) -> ItemDefinition:
+    return ItemDefinition(
+        name="Test Toy", description="", max_durability=1, personality=Traits(5, 5, 5, 5), effects=effects,
+        tags=frozenset({"playable"}),
+    )
+
+
+def test_effect_cache_tells_definitions_with_the_same_name_apart():
+    cache = base.EffectCache()
+    old, new = _toy(Motives(fun=10)), _toy(Motives(fun=20))
+    personality = Traits(5, 5, 5, 5)
+    assert cache.get(old, personality).fun == 10
+    assert cache.get(new, personality).fun == 20
+    assert cache.get(old, Traits(5, 5, 5, 5)).fun == 10
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_register_item_discards_the_effects_of_the_replaced_definition(monkeypatch):
+    monkeypatch.setattr(base, "ITEMS", ItemRegistry())
+    monkeypatch.setattr(base, "EFFECT_CACHE", base.EffectCache())
+    old, new = _toy(Motives(fun=10)), _toy(Motives(fun=20))
+    base.register_item(old)
+    old.cached_effect(Traits(5, 5, 5, 5))
+    base.register_item(new)
+    assert len(base.EFFECT_CACHE) == 0
+    assert base.ITEMS["Test Toy"].cached_effect(Traits(5, 5, 5, 5)).fun == 20
+
+
+def test_frozen_registry_rejects_new_items():
+    registry = ItemRegistry()
+    item = ItemDefinition("Item", "", 1, Traits(), Motives(), tags=frozenset({"edible"}))
+    registry.register(item)
+    registry.freeze()
+    registry.freeze()
+    assert registry.frozen
+    with pytest.raises(FrozenRegistryError):
+        registry.register(item)
+    with pytest.raises(FrozenRegistryError):
+        registry.register(ItemDefinition("Other", "", 1, Traits(), Motives()))
+    assert list(registry) == ["Item"]
+    assert registry.with_tags("edible") == [item]
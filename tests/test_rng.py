@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from homeostasis.simulation.rng import PetRandom, philox4x32, philox4x32_array, random_array
+
+# Known-answer vectors of Philox4x32-10 from the Random123 distribution
+KNOWN_ANSWERS = [
+    ((0, 0, 0, 0), (0, 0), (0x6627E8D5, 0xE169C58D, 0xBC57AC4C, 0x9B00DBD8)),
+    ((0xFFFFFFFF,) * 4, (0xFFFFFFFF,) * 2, (0x408F276D, 0x41C83B0E, 0xA20BC7C6, 0x6D5451FD)),
+    ((0x243F6A88, 0x85A308D3, 0x13198A2E, 0x03707344), (0xA4093822, 0x299F31D0),
+     (0xD16CFE09, 0x94FDCCEB, 0x5001E420, 0x24126EA1)),
+]
+
+
+@pytest.mark.parametrize("counter, key, expected", KNOWN_ANSWERS)
+def test_philox_known_answers(counter, key, expected):
+    assert philox4x32(counter, key) == expected
+    assert philox4x32(tuple(np.uint32(word) for word in counter), tuple(np.uint32(word) for word in key)) == expected
+    assert tuple(philox4x32_array(np.array([counter]), key)[0].tolist()) == expected
+
+
+@pytest.mark.parametrize("integer", [int, np.int64, np.uint64, np.int32, np.uint32])
+def test_numpy_integer_ids_draw_like_python_ints(integer):
+    expected = PetRandom(7, 4)
+    rng = PetRandom(integer(7), integer(4))
+    assert type(rng.seed) is int and type(rng.pet_id) is int
+    for tick in range(50):
+        value = rng.random(integer(tick), integer(1))
+        assert 0 <= value < 1
+        assert value == expected.random(tick, 1)
+        assert rng.randrange(tick, integer(10)) == expected.randrange(tick, 10)
+
+
+def test_random_array_matches_pet_random():
+    ids = np.arange(0, 5000, 37, dtype=np.int64)
+    values = random_array(np.uint64(2024), ids, np.int64(3), 2)
+    assert values.tolist() == [PetRandom(2024, pet_id).random(3, 2) for pet_id in ids]
+
+
+def test_ids_must_be_integers():
+    with pytest.raises(TypeError):
+        PetRandom(7, 4.0)
+    with pytest.raises(ValueError):
+        PetRandom(7, -1)
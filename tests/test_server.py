@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from homeostasis.common import Motives, Traits
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.server import WorldServer
+
+
+async def _exchange(port: int, data: bytes) -> list[dict]:
+    """Send data to the server, then read every frame until it closes the connection."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    writer.write_eof()
+    frames = [json.loads(frame) async for frame in reader]
+    writer.close()
+    return frames
+
+
+def _run(data: bytes) -> tuple[list[dict], WorldServer]:
+    async def scenario():
+        pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(), Motives(50, 50, 50, 50, 50, 50))
+        server = WorldServer([pet])
+        tcp = await server.serve()
+        try:
+            return await asyncio.wait_for(_exchange(tcp.sockets[0].getsockname()[1], data), 5), server
+        finally:
+            await server.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_oversize_line_gets_an_error_frame_and_the_next_line_is_served():
+    frames, server = _run(b"x" * (1 << 18) + b'\n{"id": 1, "command": "sleep", "pet": "Buddy"}\n')
+    assert [frame["status"] for frame in frames] == ["error", "started"]
+    assert server.subscribers == 0
+
+
+def test_oversize_last_line_gets_an_error_frame():
+    frames, server = _run(b'{"id": 1, "command": "sleep", "pet": "Buddy"}\n' + b"[" * (1 << 18))
+    assert [frame["status"] for frame in frames] == ["started", "error"]
+    assert server.subscribers == 0
+
+
+def test_last_line_without_newline_is_served():
+    frames, _ = _run(b'{"id": 1, "command": "sleep", "pet": "Buddy"}')
+    assert [frame["status"] for frame in frames] == ["started"]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from homeostasis.items.base import ITEMS
+from homeostasis.simulation.population import PetPopulation
+from homeostasis.simulation.sharding import ShardedWorld
+
+SIZE = 301
+
+
+def _population(seed: int) -> PetPopulation:
+    """Idle pets with random motives, traits and decay rates."""
+    rng = np.random.default_rng(seed)
+    population = PetPopulation(capacity=SIZE)
+    population.extend(
+        rng.uniform(0, 100, (SIZE, 6)), rng.integers(0, 11, (SIZE, 4)).astype(float),
+        rng.choice([0, 0.25, 0.5, 1, 2], (SIZE, 6)),
+    )
+    return population
+
+
+def _assign_actions(population: PetPopulation, rng: np.random.Generator) -> None:
+    """Give every idle pet a sleep, eat or play action, with items that may run out before the action ends."""
+    definitions = list(ITEMS.values())
+    idle = population.idle()
+    choice = rng.integers(0, len(definitions) + 1, len(idle))
+    population.start_sleep(idle[choice == len(definitions)])
+    for row, definition in enumerate(definitions):
+        selected = idle[choice == row]
+        if "edible" in definition.tags:
+            started = population.start_eat(selected, definition)
+        else:
+            started = population.start_play(selected, definition)
+        population.columns()["durability"][started] = rng.integers(0, 4, len(started))
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_sharded_world_matches_a_single_population(workers):
+    population = _population(0)
+    with ShardedWorld(_population(0), workers) as world:
+        rng, world_rng = np.random.default_rng(1), np.random.default_rng(1)
+        for ticks in [1, 0, 3, 1, 5, 2, 1, 10]:
+            _assign_actions(population, rng)
+            _assign_actions(world.population, world_rng)
+            expected = set()
+            for _ in range(ticks):
+                expected.update(population.tick().tolist())
+            interrupted = world.tick(ticks)
+            assert sorted(interrupted.tolist()) == sorted(expected)
+            assert np.array_equal(world.population.motives, population.motives)
+            assert np.array_equal(world.population.kind, population.kind)
+
+
+def test_ticking_zero_times_changes_nothing():
+    with ShardedWorld(_population(0), 2) as world:
+        motives = world.population.motives.copy()
+        interrupted = world.tick(0)
+        assert len(interrupted) == 0 and interrupted.dtype.kind == "i"
+        assert np.array_equal(world.population.motives, motives)
@@ -0,0 +1,38 @@
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from homeostasis.items.base import ITEMS
+
+
+@pytest.fixture
+def frequent_switches():
+    """Make threads switch far more often than usual, to surface races."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_concurrent_reservations_never_grant_more_than_the_durability(seed, frequent_switches):
+    rng = random.Random(seed)
+    item = ITEMS["Squeaky Ball"].spawn_shared()
+    item.durability = durability = rng.randint(0, 5000)
+    requests = [rng.randint(0, 5) for _ in range(4000)]
+    seen: list[int] = []
+
+    def reserve(amount: int) -> int:
+        granted = item.reserve(amount)
+        seen.append(item.durability)
+        return granted
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        granted = list(executor.map(reserve, requests))
+
+    assert sum(granted) == min(sum(requests), durability)
+    assert all(0 <= amount <= requested for amount, requested in zip(granted, requests))
+    assert min(seen) >= 0
+    assert item.durability == durability - sum(granted)
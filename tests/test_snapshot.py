@@ -0,0 +1,173 @@
+from dataclasses import astuple
+
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.items.base import ITEMS, ItemDefinition
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.action import ActionInterruptException, EatAction, PlayAction, Priority, SleepAction
+from homeostasis.simulation.replay import Replay, ReplayLog
+from homeostasis.simulation.social import socialize
+from homeostasis.snapshot import (
+    DELTA_PET, HEADER, PET_RECORD, QUEUED_ACTION, DeltaLog, Snapshot, SnapshotError, write_snapshot,
+)
+
+
+def _lazy_sleeper(clock) -> Pet:
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(5, 3, 10, 7), Motives(50, 50, 50, 50, 50, 50), clock=clock)
+    pet.set_action(SleepAction())
+    return pet
+
+
+def test_lazy_pet_is_caught_up_before_being_written(tmp_path):
+    now = 0
+    pet = _lazy_sleeper(lambda: now)
+    now = 200
+    write_snapshot(tmp_path / "world.snap", [pet])
+    with Snapshot(tmp_path / "world.snap") as snapshot:
+        restored = snapshot.pet(0)
+    assert restored.current_action is None
+    assert restored.motives == pet.motives
+
+
+def test_lazy_pet_is_caught_up_before_being_logged(tmp_path):
+    now = 0
+    pet = _lazy_sleeper(lambda: now)
+    write_snapshot(tmp_path / "world.snap", [pet])
+    pet.queue_action(PlayAction(ITEMS["Squeaky Ball"].spawn()))
+    now = 200
+    with DeltaLog(tmp_path / "world.delta") as log:
+        log.append(0, pet)
+    with Snapshot(tmp_path / "world.snap", tmp_path / "world.delta") as snapshot:
+        restored = snapshot.pet(0)
+    assert restored.current_action is None
+    assert restored.motives == pet.motives
+
+
+def _queued_state(pet: Pet) -> tuple:
+    action = pet.current_action
+    return (
+        pet.personality, pet.motives, pet.current_priority,
+        None if action is None else (action.name, action.remaining_ticks),
+        [(priority, action.name, action.remaining_ticks, preempted)
+         for priority, action, preempted in pet.queued_entries],
+    )
+
+
+def _busy_world() -> list[Pet]:
+    """Pets with queues holding preempted, item and social actions."""
+    pets = [
+        Pet(PetSpec(f"Pet {index}", 2, "Casual"), Traits(index, 10 - index, 5, 7), Motives(*[30 + index] * 6))
+        for index in range(3)
+    ]
+    first, second, third = pets
+    ball = ITEMS["Squeaky Ball"].spawn()
+    ball.durability = 3
+    first.queue_action(SleepAction(), Priority.LOW)
+    first.queue_action(PlayAction(ball), Priority.HIGH)
+    first.queue_action(EatAction(ITEMS["Dirty Martini"].spawn()), Priority.LOW)
+    first.queue_action(SleepAction(), Priority.URGENT)
+    assert socialize([second, third], min_compatibility=-1.0)
+    second.queue_action(SleepAction(), Priority.LOW)
+    for pet in pets:
+        pet.tick()
+    return pets
+
+
+def _tick_all(pets: list[Pet], ticks: int) -> None:
+    for _ in range(ticks):
+        for pet in pets:
+            try:
+                pet.tick()
+            except ActionInterruptException:
+                pet.cancel_action()
+
+
+def test_traits_queue_and_priorities_survive_a_snapshot(tmp_path):
+    pets = _busy_world()
+    write_snapshot(tmp_path / "world.snap", pets)
+    with Snapshot(tmp_path / "world.snap") as snapshot:
+        restored = list(snapshot.pets())
+    assert [_queued_state(pet) for pet in restored] == [_queued_state(pet) for pet in pets]
+    assert all(type(trait) is int for pet in restored for trait in astuple(pet.personality))
+
+    _tick_all(pets, 150)
+    _tick_all(restored, 150)
+    assert [_queued_state(pet) for pet in restored] == [_queued_state(pet) for pet in pets]
+
+
+def test_queue_survives_the_delta_log(tmp_path):
+    pets = _busy_world()
+    idle = [Pet(pet.info, pet.personality, Motives()) for pet in pets]
+    write_snapshot(tmp_path / "world.snap", idle)
+    with DeltaLog(tmp_path / "world.delta") as log:
+        indices = {pet: index for index, pet in enumerate(pets)}
+        for index, pet in enumerate(pets):
+            log.append(index, pet, indices)
+    with Snapshot(tmp_path / "world.snap", tmp_path / "world.delta") as snapshot:
+        restored = list(snapshot.pets())
+    assert [_queued_state(pet) for pet in restored] == [_queued_state(pet) for pet in pets]
+
+
+def test_torn_queue_in_the_delta_log_is_ignored(tmp_path):
+    pets = _busy_world()
+    write_snapshot(tmp_path / "world.snap", pets)
+    with DeltaLog(tmp_path / "world.delta") as log:
+        log.append(0, pets[0])
+    data = (tmp_path / "world.delta").read_bytes()
+    (tmp_path / "world.delta").write_bytes(data[:-1])
+    with Snapshot(tmp_path / "world.snap", tmp_path / "world.delta") as snapshot:
+        assert _queued_state(snapshot.pet(0)) == _queued_state(pets[0])
+    with DeltaLog(tmp_path / "world.delta"):
+        pass
+    entry = 1 + DELTA_PET.size + PET_RECORD.size + pets[0].queued_count * QUEUED_ACTION.size
+    assert (tmp_path / "world.delta").stat().st_size == len(data) - entry
+
+
+def test_replay_starts_from_a_snapshot_with_queued_actions(tmp_path):
+    pets = _busy_world()
+    write_snapshot(tmp_path / "world.snap", pets)
+    with ReplayLog(tmp_path / "world.replay", start=1) as log:
+        for tick in range(1, 40):
+            if tick == 5:
+                action = EatAction(ITEMS["Dirty Martini"].spawn())
+                log.append(tick, 2, action, Priority.HIGH)
+                pets[2].queue_action(action, Priority.HIGH)
+            _tick_all(pets, 1)
+    with Replay(tmp_path / "world.snap", tmp_path / "world.replay") as replay:
+        assert [_queued_state(pet) for pet in replay.pets(40)] == [_queued_state(pet) for pet in pets]
+
+
+def test_unregistered_item_is_reported_on_restore(tmp_path):
+    custom = ItemDefinition("Custom Toy", "Not in the registry.", 5, Traits(), Motives(fun=5), tags={"playable"})
+    pet = Pet(PetSpec("Buddy", 3, "Casual"), Traits(), Motives())
+    pet.set_action(PlayAction(custom.spawn()))
+    write_snapshot(tmp_path / "world.snap", [pet], [custom.spawn()])
+    with Snapshot(tmp_path / "world.snap") as snapshot:
+        with pytest.raises(SnapshotError, match="Custom Toy"):
+            snapshot.pet(0)
+        with pytest.raises(SnapshotError, match="Custom Toy"):
+            snapshot.item(0)
+
+
+@pytest.mark.parametrize("keep", [0, 2, HEADER.size, HEADER.size + 3, -QUEUED_ACTION.size, -1])
+def test_truncated_snapshot_raises_snapshot_error(tmp_path, keep):
+    write_snapshot(tmp_path / "world.snap", _busy_world(), [ITEMS["Squeaky Ball"].spawn()])
+    data = (tmp_path / "world.snap").read_bytes()
+    (tmp_path / "world.snap").write_bytes(data[:keep])
+    with pytest.raises(SnapshotError):
+        with Snapshot(tmp_path / "world.snap") as snapshot:
+            list(snapshot.pets())
+
+
+def test_failed_write_keeps_the_previous_snapshot(tmp_path):
+    pets = _busy_world()
+    write_snapshot(tmp_path / "world.snap", pets)
+    data = (tmp_path / "world.snap").read_bytes()
+    with Snapshot(tmp_path / "world.snap") as snapshot:
+        long_name = Pet(PetSpec("A name too long for its record" * 2, 3, "Casual"), Traits(), Motives())
+        with pytest.raises(ValueError):
+            write_snapshot(tmp_path / "world.snap", [*pets, long_name])
+        assert _queued_state(snapshot.pet(0)) == _queued_state(pets[0])
+    assert (tmp_path / "world.snap").read_bytes() == data
+    assert [path.name for path in tmp_path.iterdir()] == ["world.snap"]
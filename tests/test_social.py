@@ -0,0 +1,85 @@
+import pytest
+
+from homeostasis.common import Motives, Traits
+from homeostasis.pet import Pet, PetSpec
+from homeostasis.simulation.population import PetPopulation
+from homeostasis.simulation.replay import Replay, ReplayLog
+from homeostasis.simulation.social import SocialAction, socialize
+from homeostasis.snapshot import DeltaLog, Snapshot, write_snapshot
+
+
+def _room() -> list[Pet]:
+    return [
+        Pet(PetSpec(f"Pet {index}", 2, "Casual"), Traits(index % 11, 5, (3 * index) % 11, 7),
+            Motives(50, 60, 70, 80, 10 + index, 40))
+        for index in range(6)
+    ]
+
+
+def _state(pet: Pet) -> tuple:
+    action = pet.current_action
+    return (
+        pet.motives, None if action is None else action.name, None if action is None else action.remaining_ticks,
+        getattr(action, "compatibility", None),
+    )
+
+
+def test_social_actions_survive_a_snapshot(tmp_path):
+    pets = _room()
+    pairs = socialize(pets)
+    assert pairs
+    for pet in pets:
+        pet.tick()
+    write_snapshot(tmp_path / "room.snap", pets)
+
+    with Snapshot(tmp_path / "room.snap") as snapshot:
+        restored = list(snapshot.pets())
+        alone = snapshot.pet(0)
+    assert [_state(pet) for pet in restored] == [_state(pet) for pet in pets]
+    assert _state(alone) == _state(pets[0])
+    for pet, partner, _ in pairs:
+        first, second = restored[pets.index(pet)], restored[pets.index(partner)]
+        assert first.current_action.partner is second
+        assert second.current_action.partner is first
+
+
+def test_social_action_partner_must_be_written(tmp_path):
+    pets = _room()
+    socialize(pets)
+    with pytest.raises(ValueError):
+        write_snapshot(tmp_path / "room.snap", pets[:1])
+
+
+def test_social_actions_in_delta_log(tmp_path):
+    pets = _room()
+    write_snapshot(tmp_path / "room.snap", pets)
+    socialize(pets)
+    indices = {pet: index for index, pet in enumerate(pets)}
+    with DeltaLog(tmp_path / "room.delta") as log:
+        for index, pet in enumerate(pets):
+            log.append(index, pet, indices)
+    with Snapshot(tmp_path / "room.snap", tmp_path / "room.delta") as snapshot:
+        assert [_state(pet) for pet in snapshot.pets()] == [_state(pet) for pet in pets]
+
+
+def test_social_actions_are_replayed(tmp_path):
+    pets = _room()
+    write_snapshot(tmp_path / "room.snap", pets)
+    indices = {pet: index for index, pet in enumerate(pets)}
+    with ReplayLog(tmp_path / "room.replay") as log:
+        for tick in range(8):
+            if tick == 2:
+                for pet, partner, _ in socialize(pets):
+                    log.append(tick, indices[pet], pet.current_action, partner=indices[partner])
+                    log.append(tick, indices[partner], partner.current_action, partner=indices[pet])
+            for pet in pets:
+                pet.tick()
+    with Replay(tmp_path / "room.snap", tmp_path / "room.replay") as replay:
+        assert [_state(pet) for pet in replay.pets(8)] == [_state(pet) for pet in pets]
+
+
+def test_population_rejects_social_actions():
+    pets = _room()
+    population = PetPopulation.from_pets(pets)
+    with pytest.raises(TypeError, match="sleep, eat and play"):
+        population.set_action(0, SocialAction(pets[1], 0.5))
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from importlib import import_module
+from pathlib import Path
+
+import pytest
+
+import homeostasis.__main__ as application
+import homeostasis.items
+import homeostasis.items.base as base
+import homeostasis.simulation
+from homeostasis.items.base import ItemRegistry
+
+
+@pytest.mark.parametrize("package", [homeostasis.items, homeostasis.simulation])
+def test_lazy_names_resolve_to_their_submodule(package):
+    assert set(package._LAZY) <= set(dir(package))
+    assert package.__all__ == list(package._LAZY)
+    for name, module in package._LAZY.items():
+        assert getattr(package, name) is getattr(import_module(f"{package.__name__}.{module}"), name)
+
+
+@pytest.mark.parametrize("package", [homeostasis.items, homeostasis.simulation])
+def test_unknown_name_raises_attribute_error(package):
+    with pytest.raises(AttributeError, match="no_such_name"):
+        package.no_such_name
+    assert not hasattr(package, "no_such_name")
+    with pytest.raises(ImportError):
+        exec(f"from {package.__name__} import no_such_name", {})
+
+
+def test_importing_a_package_does_not_import_its_submodules():
+    code = (
+        "import sys, homeostasis.simulation, homeostasis.items\n"
+        "print(sorted(name for name in sys.modules if name.startswith(('homeostasis.', 'numpy', 'asyncio'))))"
+    )
+    root = Path(__file__).resolve().parents[1]
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root).stdout
+    assert output.strip() == "['homeostasis.items', 'homeostasis.simulation']"
+
+
+def test_main_can_run_twice_in_a_process(monkeypatch, capsys):
+    # A registry of its own, which `main` freezes, leaves the registry of the other tests writable
+    registry = ItemRegistry()
+    monkeypatch.setattr(base, "ITEMS", registry)
+    monkeypatch.setattr(application, "ITEMS", registry)
+    application.main(tick_seconds=None)
+    application.main(tick_seconds=None)
+    assert registry.frozen
+    assert capsys.readouterr().out.count("Simulated") == 2
@@ -0,0 +1,43 @@
+import pytest
+
+from homeostasis.bench.__main__ import _report
+from homeostasis.bench.suite import Comparison, compare
+
+
+def _result(timings: dict[str, float]) -> dict:
+    return {
+        "environment": {"python": "3.13", "revision": None},
+        "results": {name: {"ns_per_op": ns} for name, ns in timings.items()},
+    }
+
+
+def test_compare_flags_slowdowns_above_the_threshold():
+    current = _result({"Pet.tick": 120.0, "Motives.add_stats": 50.0, "ItemInstance.use": 105.0})
+    baseline = _result({"Pet.tick": 100.0, "Motives.add_stats": 100.0, "ItemInstance.use": 100.0})
+    comparisons = compare(current, baseline, threshold=0.1)
+    assert comparisons == [
+        Comparison("Pet.tick", 100.0, 120.0, True),
+        Comparison("Motives.add_stats", 100.0, 50.0, False),
+        Comparison("ItemInstance.use", 100.0, 105.0, False),
+    ]
+    assert [comparison.change for comparison in comparisons] == pytest.approx([0.2, -0.5, 0.05])
+
+
+def test_compare_reports_added_and_removed_benchmarks():
+    current = _result({"Pet.tick": 100.0, "SocialAction.tick": 80.0})
+    baseline = _result({"Old.benchmark": 30.0, "Pet.tick": 100.0})
+    comparisons = compare(current, baseline)
+    assert comparisons == [
+        Comparison("Pet.tick", 100.0, 100.0, False),
+        Comparison("SocialAction.tick", None, 80.0, False),
+        Comparison("Old.benchmark", 30.0, None, False),
+    ]
+    assert comparisons[1].change is None and comparisons[2].change is None
+
+
+def test_report_prints_added_and_removed_benchmarks(capsys):
+    regressed = _report(_result({"New": 10.0, "Kept": 30.0}), _result({"Kept": 10.0, "Gone": 5.0}), 0.1)
+    lines = capsys.readouterr().out.splitlines()
+    assert regressed
+    assert [line.split()[0] for line in lines] == ["New", "Kept", "Gone"]
+    assert "added" in lines[0] and "REGRESSED" in lines[1] and "removed" in lines[2]
@@ -0,0 +1,34 @@
+import math
+from dataclasses import astuple
+
+import pytest
+
+from homeostasis.items.base import ITEMS
+from homeostasis.simulation.sweep import SweepResult, grid, run_sweep, synthetic_population
+
+TARGET = "Fufu Sauce Graine"
+
+
+def _outcome(result: SweepResult) -> tuple:
+    """The fields of a result, with NaN made comparable."""
+    starvation = None if math.isnan(result.time_to_starvation) else result.time_to_starvation
+    return result.variant, result.starved, starvation, astuple(result.equilibrium), result.usage_share
+
+
+@pytest.fixture(scope="module")
+def variants():
+    return grid(ITEMS[TARGET], {"effects.hunger": [0, 20, 60], "effects.health": [-30, 40]})
+
+
+def test_parallel_sweep_matches_a_serial_one_in_grid_order(variants):
+    catalogue, population = list(ITEMS.values()), synthetic_population(60)
+    serial = run_sweep(catalogue, TARGET, variants, population, 60, batch_size=1)
+    parallel = run_sweep(catalogue, TARGET, variants, population, 60, workers=2, batch_size=4)
+    assert [result.variant for result in parallel] == variants
+    assert [_outcome(result) for result in parallel] == [_outcome(result) for result in serial]
+    assert len({_outcome(result)[1:] for result in serial}) > 1
+
+
+def test_variant_names_must_be_unique(variants):
+    with pytest.raises(ValueError):
+        run_sweep(list(ITEMS.values()), TARGET, [variants[0], variants[0]], synthetic_population(5), 5)
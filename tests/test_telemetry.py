@@ -0,0 +1,98 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from homeostasis.simulation.population import MOTIVE_FIELDS
+from homeostasis.simulation.telemetry import STATS, MotiveRecorder, load_telemetry
+
+PETS = 7
+
+
+def _ticks(count: int, seed: int = 0) -> np.ndarray:
+    """(count x pets x 6) random motives."""
+    return np.random.default_rng(seed).uniform(0, 100, (count, PETS, len(MOTIVE_FIELDS)))
+
+
+def _recorder(ticks: np.ndarray, **options) -> MotiveRecorder:
+    recorder = MotiveRecorder(PETS, dtype=np.float64, **options)
+    for motives in ticks:
+        recorder.record(motives)
+    return recorder
+
+
+def test_memory_stays_bounded_over_long_runs():
+    recorder = MotiveRecorder(PETS, recent=32, window=4, windows=16)
+    nbytes = recorder.nbytes
+    motives = np.full((PETS, len(MOTIVE_FIELDS)), 50.0)
+    for _ in range(100):
+        recorder.record(motives)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(20_000):
+            recorder.record(motives)
+        grown = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert recorder.nbytes == nbytes
+    assert grown < 4096
+    assert (recorder.ticks, recorder.windows) == (20_100, 20_100 // 4)
+    assert recorder.recent("hunger", 10**6).shape == (32, PETS)
+    assert recorder.history("hunger", 10**6)["mean"].shape == (16, PETS)
+
+
+@pytest.mark.parametrize("count", [0, 4, 5, 13, 23, 40])
+def test_recent_ticks_are_the_last_rows_recorded(count):
+    ticks = _ticks(count)
+    recorder = _recorder(ticks, recent=8, window=5, windows=3)
+    for column, motive in enumerate(MOTIVE_FIELDS):
+        for n in (0, 1, 3, 8, 100):
+            expected = ticks[max(0, count - min(n, 8)):, :, column]
+            assert np.array_equal(recorder.recent(motive, n), expected)
+
+
+@pytest.mark.parametrize("count", [0, 4, 5, 13, 23, 40])
+def test_windows_hold_the_min_max_and_mean_of_their_ticks(count):
+    ticks = _ticks(count)
+    recorder = _recorder(ticks, recent=8, window=5, windows=3)
+    complete = count // 5
+    assert recorder.windows == complete
+    for column, motive in enumerate(MOTIVE_FIELDS):
+        windows = ticks[:complete * 5, :, column].reshape(complete, 5, PETS)
+        expected = {"min": windows.min(axis=1), "max": windows.max(axis=1), "mean": windows.mean(axis=1)}
+        for n in (1, 2, 3, 10):
+            history = recorder.history(motive, n)
+            assert set(history) == set(STATS)
+            kept = min(n, 3, complete)
+            for stat in STATS:
+                assert np.allclose(history[stat], expected[stat][complete - kept:])
+
+
+def test_last_ticks_are_a_slice_of_the_column_until_the_ring_wraps():
+    ticks = _ticks(13)
+    recorder = _recorder(ticks, recent=8)
+    # Ticks 5 to 12 are in rows 5 to 7 then 0 to 4 of the ring
+    assert recorder.recent("hunger", 5).base is not None
+    assert recorder.recent("hunger", 6).base is None
+    for motives in ticks[:3]:
+        recorder.record(motives)
+    assert recorder.recent("energy", 8).base is not None
+
+
+def test_export_round_trip(tmp_path):
+    ticks = _ticks(23)
+    recorder = _recorder(ticks, recent=8, window=5, windows=3, start=100)
+    recorder.export(tmp_path / "telemetry.npz")
+    data = load_telemetry(tmp_path / "telemetry.npz")
+    assert (int(data["recent_start"]), int(data["windows_start"]), int(data["window"])) == (115, 105, 5)
+    for motive in MOTIVE_FIELDS:
+        assert np.array_equal(data[f"recent/{motive}"], recorder.recent(motive, 8))
+        for stat, values in recorder.history(motive, 3).items():
+            assert np.array_equal(data[f"{stat}/{motive}"], values)
+    assert len(data) == 3 + len(MOTIVE_FIELDS) * (1 + len(STATS))
+
+
+def test_record_rejects_motives_of_the_wrong_shape():
+    with pytest.raises(ValueError):
+        MotiveRecorder(PETS).record(np.zeros((PETS + 1, len(MOTIVE_FIELDS))))